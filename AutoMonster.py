@@ -2,6 +2,7 @@ import os
 import pathlib
 import sys
 import time
+from contextlib import contextmanager
 from typing import List, Callable, Optional, Tuple
 
 import cv2
@@ -10,21 +11,24 @@ import scrcpy
 
 from utils.AutoMonsterErrors import *
 from utils.assets import (
-    ASSETS, IN_GAME_ASSETS, Ancestral_Cavers, AdLocationsHorizontal, AdLocationsVertical,
+    ASSETS, IN_GAME_ASSETS, Ancestral_Cavers,
     CAVERN_TO_ASSETS
 )
 from config.config import (
+    NATIVE_RESOLUTION,
     SLIDER_MAX_RETRIES,
     DEFAULT_TEMPLATE_THRESHOLD,
-    RUNE_THRESHOLD,
-    ASSET_THRESHOLDS,
-    ASSET_GRAY_IMG
+    WAITER_GUARD_INTERVAL
 )
 from utils.HelperFunctions import compare_imgs
 from config.config import GAME_WIDTH, GAME_HEIGHT
 from utils.logger import setup_logger
-from utils.region_utils import init as init_region_utils
+from utils.device_context import DeviceContext
 from utils.vision_manager import VisionManager
+from utils.template_pack import match_params, TemplateStore
+from utils.startup_timeline import StartupTimeline
+from utils.frame_waiter import FrameWaiter
+from utils import input_dispatcher as gestures
 from device_manager import DeviceManager
 from features.ads import AdManager
 from features.game import GameManager
@@ -36,16 +40,22 @@ logger = setup_logger()
 
 
 class Controller:
-    def __init__(self, save_screen: bool = False, skip_game_launch: bool = False, serial: Optional[str] = None):
+    def __init__(self, save_screen: bool = False, skip_game_launch: bool = False, serial: Optional[str] = None,
+                 vision_workers: Optional[int] = None):
         self.gui_logger = None
-        self.device_manager = DeviceManager(serial=serial)
-        self.client = self.device_manager.client
+        self.startup = StartupTimeline()
 
-        # Set screen dimensions for region recommendations
-        sw = self.device_manager.new_width if self.device_manager.new_width else GAME_WIDTH
-        init_region_utils(sw, GAME_HEIGHT)
+        # Templates load (or the pack rebuilds) while adb connects and scrcpy starts; VisionManager
+        # picks up the shared store below. Native resolution only knows its template scale once connected.
+        if not NATIVE_RESOLUTION:
+            self.startup.background("templates", TemplateStore.for_scale, 1.0)
 
-        self.vision_manager = VisionManager(self.device_manager)
+        with self.startup.phase("connect"):
+            self.device_manager = DeviceManager(serial=serial, timeline=self.startup)
+
+        # Screen size, ad locations and asset regions for this device only
+        sw, sh = self.device_manager.frame_size
+        self.context = DeviceContext(sw or GAME_WIDTH, sh)
 
         self.ad_manager = AdManager(self)
         self.game_manager = GameManager(self)
@@ -53,30 +63,89 @@ class Controller:
         self.monster_manager = MonsterManager(self)
         self.navigator = Navigator(self)
 
-        # Only launch game if not skipping (for faster GUI startup)
+        # Only launch game if not skipping (for faster GUI startup). The game gets 2 s to come up,
+        # which the vision setup below counts towards.
+        if not skip_game_launch:
+            with self.startup.phase("launch game"):
+                self.launch_game()
+            launched = time.perf_counter()
+
+        with self.startup.phase("vision"):
+            # The farm runner sizes the matching pool to the cores a worker is pinned to
+            self.vision_manager = (VisionManager(self.device_manager, context=self.context) if vision_workers is None
+                                   else VisionManager(self.device_manager, workers=vision_workers, context=self.context))
+            self.frame_waiter = FrameWaiter(self.device_manager, self.vision_manager)
+
         if not skip_game_launch:
-            self.launch_game()
-            time.sleep(2)
+            with self.startup.phase("game settle"):
+                time.sleep(max(0.0, 2 - (time.perf_counter() - launched)))
 
         # insert the ad locations at the beginning of the list
         if self.device_manager.resized:
             size = self.device_manager.client.resolution
-            AdLocationsHorizontal.insert(0, (int((size[0] - 130) / self.device_manager.ratio[0]), 85))
+            self.context.add_ad_location(int((size[0] - 130) / self.device_manager.ratio[0]), 85)
 
         if save_screen:
             self.save_screen(take_new=True)
 
         # Only open game if not skipping (GUI will handle this later)
         if not skip_game_launch:
-            self.open_game(force_close=False)
+            with self.startup.phase("open game"):
+                self.open_game(force_close=False)
+
+        logger.info(f"Controller ready in {self.startup.elapsed():.2f}s")
+        logger.debug(f"Startup timeline:\n{self.startup.report()}")
+
+    def close(self) -> None:
+        """Release the device and worker threads (headless runs; the GUI just exits)."""
+        self.frame_waiter.close()
+        self.vision_manager.close()
+        self.device_manager.close()
 
     def load_templates(self) -> None:
         """Reload all templates from disk"""
         self.vision_manager.load_templates()
 
+    def start_roi_learning(self) -> None:
+        """Record where every asset matches so a tight ROI table can be saved later."""
+        self.vision_manager.clear_roi_history()
+        self.vision_manager.learn_rois = True
+        self.log_gui("ROI learning started", "info")
+
+    def stop_roi_learning(self, save: bool = True) -> None:
+        self.vision_manager.learn_rois = False
+        if save:
+            self.vision_manager.save_roi_table()
+        self.log_gui("ROI learning stopped", "info")
+
+    @property
+    def client(self):
+        # Follows the device manager, which replaces the client on capture profile changes
+        return self.device_manager.client
+
+    def set_capture_profile(self, name: str) -> None:
+        """Switch the scrcpy stream to another entry of CAPTURE_PROFILES."""
+        if name == self.device_manager.capture_profile:
+            return
+        self.device_manager.set_capture_profile(name)
+        self.vision_manager.invalidate_cache()
+        self.context.set_screen_size(*self.device_manager.frame_size)
+        self.vision_manager.set_scale(self.device_manager.template_scale)
+
+    @contextmanager
+    def capture_profile(self, name: str):
+        """Use a capture profile for the duration of a with-block, then switch back."""
+        previous = self.device_manager.capture_profile
+        self.set_capture_profile(name)
+        try:
+            yield
+        finally:
+            self.set_capture_profile(previous)
+
     def refresh_resolution(self) -> None:
         self.device_manager.check_resolution()
-        init_region_utils(self.device_manager.new_width, GAME_HEIGHT)
+        self.context.set_screen_size(*self.device_manager.frame_size)
+        self.vision_manager.set_scale(self.device_manager.template_scale)
 
     def get_battery_level(self) -> str:
         return self.device_manager.get_battery_level()
@@ -121,8 +190,9 @@ class Controller:
         if self.gui_logger is not None:
             self.gui_logger(msg, level)
 
-    def take_screenshot(self) -> np.ndarray:
-        return self.device_manager.take_screenshot()
+    def take_screenshot(self, fresh: bool = False, timeout: Optional[float] = None) -> np.ndarray:
+        """Latest frame as a read-only view that stays valid while referenced (see DeviceManager)."""
+        return self.device_manager.take_screenshot(fresh=fresh, timeout=timeout)
 
     def get_last_screenshot(self) -> Optional[np.ndarray]:
         return self.device_manager.get_last_screenshot()
@@ -164,21 +234,7 @@ class Controller:
         x1, y1 = from_cords[0]
         x2, y2 = to_cords[0]
         
-        touch_id = 1
-        
-        # Finger down on source
-        self.client.control.touch(x1, y1, scrcpy.ACTION_DOWN, touch_id=touch_id)
-        time.sleep(0.15)
-        
-        # Move finger to destination
-        for i in range(1, steps + 1):
-            x = int(x1 + (x2 - x1) * i / steps)
-            y = int(y1 + (y2 - y1) * i / steps)
-            self.client.control.touch(x, y, scrcpy.ACTION_MOVE, touch_id=touch_id)
-            time.sleep(0.03)
-        
-        # Lift finger
-        self.client.control.touch(x2, y2, scrcpy.ACTION_UP, touch_id=touch_id)
+        self.device_manager.perform(gestures.swipe(x1, y1, x2, y2, steps=steps))
         return True
 
     def zoom_in(self) -> None:
@@ -192,44 +248,12 @@ class Controller:
         logger.debug(f"Zoom IN - Center: ({center_x}, {center_y})")
         self.log_gui(f"Zooming in...", "debug")
 
-        # First gesture: Full pinch (100px -> 300px)
-        start_offset = self.scale_x(100)
-        end_offset = self.scale_x(300)
-
-        self.client.control.touch(center_x - start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=1)
-        self.client.control.touch(center_x + start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=2)
-        time.sleep(0.02)
-
-        steps = 15
-        for step in range(steps):
-            progress = (step + 1) / steps
-            offset = int(start_offset + (end_offset - start_offset) * progress)
-            self.client.control.touch(center_x - offset, center_y, scrcpy.ACTION_MOVE, touch_id=1)
-            self.client.control.touch(center_x + offset, center_y, scrcpy.ACTION_MOVE, touch_id=2)
-            time.sleep(0.01)
-
-        self.client.control.touch(center_x - end_offset, center_y, scrcpy.ACTION_UP, touch_id=1)
-        self.client.control.touch(center_x + end_offset, center_y, scrcpy.ACTION_UP, touch_id=2)
-        time.sleep(0.05)
-
-        # Second gesture: Half pinch (100px -> 200px for gentler zoom)
-        start_offset = self.scale_x(100)
-        end_offset = self.scale_x(200)
-
-        self.client.control.touch(center_x - start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=1)
-        self.client.control.touch(center_x + start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=2)
-        time.sleep(0.02)
-
-        half_steps = 8  # Half the steps for quicker gesture
-        for step in range(half_steps):
-            progress = (step + 1) / half_steps
-            offset = int(start_offset + (end_offset - start_offset) * progress)
-            self.client.control.touch(center_x - offset, center_y, scrcpy.ACTION_MOVE, touch_id=1)
-            self.client.control.touch(center_x + offset, center_y, scrcpy.ACTION_MOVE, touch_id=2)
-            time.sleep(0.01)
-
-        self.client.control.touch(center_x - end_offset, center_y, scrcpy.ACTION_UP, touch_id=1)
-        self.client.control.touch(center_x + end_offset, center_y, scrcpy.ACTION_UP, touch_id=2)
+        # Full pinch (100px -> 300px), then a half pinch (100px -> 200px) for a gentler zoom
+        self.device_manager.perform(gestures.chain(
+            gestures.pinch(center_x, center_y, self.scale_x(100), self.scale_x(300), steps=15),
+            0.05,
+            gestures.pinch(center_x, center_y, self.scale_x(100), self.scale_x(200), steps=8),
+        ))
 
         self.log_gui("Zoomed in", "info")
 
@@ -244,67 +268,41 @@ class Controller:
         logger.debug(f"Zoom OUT - Center: ({center_x}, {center_y})")
         self.log_gui(f"Zooming out...", "debug")
 
-        # First gesture: Full pinch (300px -> 100px)
-        start_offset = self.scale_x(300)
-        end_offset = self.scale_x(100)
-
-        self.client.control.touch(center_x - start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=1)
-        self.client.control.touch(center_x + start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=2)
-        time.sleep(0.02)
-
-        steps = 15
-        for step in range(steps):
-            progress = (step + 1) / steps
-            offset = int(start_offset - (start_offset - end_offset) * progress)
-            self.client.control.touch(center_x - offset, center_y, scrcpy.ACTION_MOVE, touch_id=1)
-            self.client.control.touch(center_x + offset, center_y, scrcpy.ACTION_MOVE, touch_id=2)
-            time.sleep(0.01)
-
-        self.client.control.touch(center_x - end_offset, center_y, scrcpy.ACTION_UP, touch_id=1)
-        self.client.control.touch(center_x + end_offset, center_y, scrcpy.ACTION_UP, touch_id=2)
-        time.sleep(0.05)
-
-        # Second gesture: Half pinch (200px -> 100px for gentler zoom)
-        start_offset = self.scale_x(200)
-        end_offset = self.scale_x(100)
-
-        self.client.control.touch(center_x - start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=1)
-        self.client.control.touch(center_x + start_offset, center_y, scrcpy.ACTION_DOWN, touch_id=2)
-        time.sleep(0.02)
-
-        half_steps = 8  # Half the steps for quicker gesture
-        for step in range(half_steps):
-            progress = (step + 1) / half_steps
-            offset = int(start_offset - (start_offset - end_offset) * progress)
-            self.client.control.touch(center_x - offset, center_y, scrcpy.ACTION_MOVE, touch_id=1)
-            self.client.control.touch(center_x + offset, center_y, scrcpy.ACTION_MOVE, touch_id=2)
-            time.sleep(0.01)
-
-        self.client.control.touch(center_x - end_offset, center_y, scrcpy.ACTION_UP, touch_id=1)
-        self.client.control.touch(center_x + end_offset, center_y, scrcpy.ACTION_UP, touch_id=2)
+        # Full pinch (300px -> 100px), then a half pinch (200px -> 100px) for a gentler zoom
+        self.device_manager.perform(gestures.chain(
+            gestures.pinch(center_x, center_y, self.scale_x(300), self.scale_x(100), steps=15),
+            0.05,
+            gestures.pinch(center_x, center_y, self.scale_x(200), self.scale_x(100), steps=8),
+        ))
 
         self.log_gui("Zoomed out", "info")
 
+    def _match_params(self, asset_code: str, threshold: float, gray_img: bool) -> Tuple[float, bool]:
+        return match_params(asset_code, threshold, gray_img)
+
     def _get_cords(self, asset_code: str, screenshot: Optional[np.ndarray] = None, threshold: float = DEFAULT_TEMPLATE_THRESHOLD, gray_img: bool = False) -> List[List[int]]:
         if screenshot is None:
             screenshot = self.take_screenshot()
-        # Check for per-asset threshold override (ASSETS enum or string key)
-        for key, value in ASSET_THRESHOLDS.items():
-            key_str = key.value if hasattr(key, 'value') else key
-            if asset_code == key_str:
-                threshold = value
-                break
-        # Dynamic rune variants (rune{level}{type}{s/t}.png) need higher threshold
-        if threshold == DEFAULT_TEMPLATE_THRESHOLD and asset_code.startswith(('rune1', 'rune2', 'rune3', 'rune4', 'rune5')):
-            threshold = RUNE_THRESHOLD
-        # Check for per-asset gray image override
-        for key in ASSET_GRAY_IMG:
-            key_str = key.value if hasattr(key, 'value') else key
-            if asset_code == key_str:
-                gray_img = True
-                break
+        threshold, gray_img = self._match_params(asset_code, threshold, gray_img)
         return self.vision_manager.get_cords(asset_code, screenshot, threshold, gray_img)
 
+    def _exists(self, asset_code: str, screenshot: Optional[np.ndarray] = None, threshold: float = DEFAULT_TEMPLATE_THRESHOLD, gray_img: bool = False) -> bool:
+        """Yes/no variant of _get_cords that skips grouping and coordinate building."""
+        if screenshot is None:
+            screenshot = self.take_screenshot()
+        threshold, gray_img = self._match_params(asset_code, threshold, gray_img)
+        return self.vision_manager.exists(asset_code, screenshot, threshold, gray_img)
+
+    def _detect_many(self, assets: Tuple[str, ...], screenshot: np.ndarray, threshold: float = DEFAULT_TEMPLATE_THRESHOLD,
+                     gray_img: bool = False, any_of: bool = False) -> List[str]:
+        """Batched _exists: the assets are matched in parallel with their per-asset overrides.
+
+        Assets the screen index says can't be on the current screen are skipped.
+        """
+        assets = self.vision_manager.possible_assets(assets, screenshot)
+        queries = [(asset, *self._match_params(asset, threshold, gray_img)) for asset in assets]
+        return self.vision_manager.detect_many(queries, screenshot, any_of=any_of)
+
     def count(self, *assets: Optional[str | tuple[str, ...]], gray_img: bool = False, threshold: float = DEFAULT_TEMPLATE_THRESHOLD, screenshot: Optional[np.ndarray] = None) -> int:
         if screenshot is None:
             screenshot = self.take_screenshot()
@@ -317,7 +315,7 @@ class Controller:
         result = []
         for asset in assets:
             cords = self._get_cords(asset, screenshot, gray_img=gray_img, threshold=threshold)
-            if self.device_manager.resized:
+            if self.device_manager.frames_resized:
                 cords = [[int(x / self.device_manager.ratio[0]), int(y / self.device_manager.ratio[1])] for x, y in cords]
             colors = [(0, 255, 0)]
             if len(cords) > 1:
@@ -382,24 +380,35 @@ class Controller:
                 raise  ClickError(f"Index {index} is out of range for asset {asset}")
             if len(cords) > 0:
                 x, y = cords[index]
-                self.client.control.touch(x, y, scrcpy.ACTION_DOWN)
-                self.pause(.1)
-                self.client.control.touch(x, y, scrcpy.ACTION_UP)
+                self.tap(x, y)
                 self.pause(pause)
                 return True
         if raise_error:
             raise  ClickError(f"Could not find any of the assets: {assets}")
         return False
 
+    def tap(self, x: int, y: int, hold: float = 0.1) -> None:
+        """Tap (or long-press, with a longer ``hold``) at device coordinates and wait for it."""
+        self.device_manager.perform(gestures.tap(x, y, hold))
+
     def click_back(self, skip_ad_check: bool = False, pause: float = 2) -> None:
         if not skip_ad_check and not self.in_game():
             self._skip_ad()
-        self.client.device.keyevent("KEYCODE_BACK")
+        # Over the scrcpy control socket rather than an adb shell round trip
+        self.client.control.keycode(scrcpy.KEYCODE_BACK, scrcpy.ACTION_DOWN)
+        self.client.control.keycode(scrcpy.KEYCODE_BACK, scrcpy.ACTION_UP)
         self.pause(pause)
 
+    def _slider_cords(self, screenshot: np.ndarray) -> List[List[int]]:
+        """Where the are-you-there slider is on this frame, looked up once per frame."""
+        cords = self.vision_manager.frame_guard(
+            screenshot, "slider",
+            lambda: self._get_cords(ASSETS.Slider, screenshot) or self._get_cords(ASSETS.Slider2, screenshot))
+        return [list(c) for c in cords]
+
     def are_you_there_skip(self, screenshot: np.ndarray) -> bool:
         # find slider asset and drag it a bit to the right
-        cords = self._get_cords(ASSETS.Slider, screenshot) or self._get_cords(ASSETS.Slider2, screenshot)
+        cords = self._slider_cords(screenshot)
         times = 0
         user_notified = False
         while len(cords) > 0:
@@ -414,9 +423,7 @@ class Controller:
                 self.pause(0.5)
                 if len(con_coord := self._get_cords(ASSETS.Continue)) > 0:
                     x, y = con_coord[0]
-                    self.client.control.touch(x, y, scrcpy.ACTION_DOWN)
-                    self.pause(.1)
-                    self.client.control.touch(x, y, scrcpy.ACTION_UP)
+                    self.tap(x, y)
                     count = 0
                     while True:
                         sc = self.take_screenshot()
@@ -440,9 +447,7 @@ class Controller:
 
             if len(con_coord := self._get_cords(ASSETS.Continue)) > 0:
                 x, y = con_coord[0]
-                self.client.control.touch(x, y, scrcpy.ACTION_DOWN)
-                self.pause(.1)
-                self.client.control.touch(x, y, scrcpy.ACTION_UP)
+                self.tap(x, y)
                 count = 0
                 while True:
                     sc = self.take_screenshot()
@@ -470,21 +475,32 @@ class Controller:
             if screenshot is None:
                 screenshot = self.take_screenshot()
 
-            if not skip_ad_check and not self.in_game(screenshot):
-                if self._skip_ad():
-                    screenshot = self.take_screenshot()
-
-            if self.are_you_there_skip(screenshot):
-                screenshot = self.take_screenshot()
-
-            for asset in assets:
-                if len(self._get_cords(asset, screenshot, threshold=threshold, gray_img=gray_img)) > 0:
-                    return True
+            screenshot = self._guard_screenshot(screenshot, skip_ad_check)
+            if self._detect_many(assets, screenshot, threshold=threshold, gray_img=gray_img, any_of=True):
+                return True
             screenshot = None
             if i < retries - 1:
                 self.pause(pause_for)
         return False
 
+    def find_visible(self, *assets: str, screenshot: Optional[np.ndarray] = None, skip_ad_check: bool = False,
+                     gray_img: bool = False, threshold=DEFAULT_TEMPLATE_THRESHOLD) -> List[str]:
+        """Like in_screen, but checks every asset and returns the ones that are visible."""
+        if screenshot is None:
+            screenshot = self.take_screenshot()
+        screenshot = self._guard_screenshot(screenshot, skip_ad_check)
+        return self._detect_many(assets, screenshot, threshold=threshold, gray_img=gray_img)
+
+    def _guard_screenshot(self, screenshot: np.ndarray, skip_ad_check: bool) -> np.ndarray:
+        """Clear ads and the are-you-there slider, returning a new screenshot if either was handled."""
+        if not skip_ad_check and not self.in_game(screenshot):
+            if self._skip_ad():
+                screenshot = self.take_screenshot()
+
+        if self.are_you_there_skip(screenshot):
+            screenshot = self.take_screenshot()
+        return screenshot
+
     def in_game(self, screenshot: Optional[np.ndarray] = None) -> bool:
         if screenshot is None:
             screenshot = self.take_screenshot()
@@ -494,24 +510,53 @@ class Controller:
         if screenshot.shape[1] < 1000:
             return False
 
-        for asset in IN_GAME_ASSETS:
-            if len(self._get_cords(asset, screenshot)) > 0:
-                return True
-        
-        return False
+        return self.vision_manager.frame_guard(
+            screenshot, "in_game", lambda: bool(self._detect_many(IN_GAME_ASSETS, screenshot, any_of=True)))
 
     def wait_for(self, *assets: str | tuple[str, ...], timeout: float = 10, skip_ad_check: bool = False,
                  raise_error=False, pause_for: float = 0.5) -> bool:
-        start_time = time.perf_counter()
-        while time.perf_counter() - start_time < timeout:
-            if self.in_screen(*assets, skip_ad_check=skip_ad_check, pause_for=0):
-                self.pause(pause_for)
-                return True
-            self.pause(.1)
+        if self.wait_until(present=assets, timeout=timeout, skip_ad_check=skip_ad_check):
+            self.pause(pause_for)
+            return True
         if raise_error:
             raise  WaitError(f"Could not find any of the assets: {assets} in {timeout} seconds")
         return False
 
+    def wait_for_absent(self, *assets: str, timeout: float = 10, skip_ad_check: bool = False) -> bool:
+        """Wait until any of the assets is no longer visible."""
+        return self.wait_until(absent=assets, timeout=timeout, skip_ad_check=skip_ad_check)
+
+    def wait_until(self, present: Tuple[str, ...] = (), absent: Tuple[str, ...] = (), timeout: float = 10,
+                   skip_ad_check: bool = False, poll: float = 0) -> bool:
+        """Wait until any ``present`` asset is visible or any ``absent`` asset is gone.
+
+        New frames are checked by the frame waiter as they arrive. Every
+        WAITER_GUARD_INTERVAL (and whenever the waiter reports a hit) the latest
+        frame is checked here too, clearing ads and the are-you-there slider.
+
+        A call that succeeds takes at least ``poll`` seconds (capped by
+        ``timeout``), so a caller looping on wait_until while the condition
+        already holds re-checks at most that often instead of spinning.
+        """
+        present_queries = [(a, *self._match_params(a, DEFAULT_TEMPLATE_THRESHOLD, False)) for a in present]
+        absent_queries = [(a, *self._match_params(a, DEFAULT_TEMPLATE_THRESHOLD, False)) for a in absent]
+        start = time.perf_counter()
+        deadline = start + timeout
+        while True:
+            screenshot = self._guard_screenshot(self.take_screenshot(), skip_ad_check)
+            if (present and self._detect_many(present, screenshot, any_of=True)) or \
+                    (absent and len(set(self._detect_many(absent, screenshot))) < len(set(absent))):
+                left = min(poll, timeout) - (time.perf_counter() - start)
+                if left > 0:
+                    self.pause(left)
+                return True
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            self.frame_waiter.wait(present_queries, absent_queries, after_seq=self.device_manager.screenshot_seq,
+                                   timeout=min(remaining, WAITER_GUARD_INTERVAL),
+                                   cancel_token=self.device_manager.cancel_token)
+
     def follow_sequence(self, *sequence: Optional[str | tuple[str, ...]], max_tries: int = 1,
                         reset_func: Optional[Callable] = None, raise_error: bool = False, timeout: float = 7) -> bool:
         # follow sequence of actions, click and wait till then next "thing to click" appears if last is none then
@@ -804,8 +849,10 @@ class Controller:
 
         self.navigator.goto_cavern()
         while num_dungeons > 0:
+            # Check every remaining cavern icon in one batched pass per screen
+            visible = self.find_visible(*[d for d in dungeons_to_do if d not in dungeons_done])
             for dungeon in dungeons_to_do:
-                if dungeon in dungeons_done or not self.in_screen(dungeon):
+                if dungeon in dungeons_done or dungeon not in visible:
                     continue
 
                 if self.click(ASSETS.EnterCavern, pause=2):
@@ -865,6 +912,7 @@ class Controller:
                 else:
                     logger.debug(f"Finished {dungeon.replace('.png', '')}, {num_dungeons} left")
                 dungeons_done.append(dungeon)
+                visible = self.find_visible(*[d for d in dungeons_to_do if d not in dungeons_done])
 
             if self.in_screen(ASSETS.DungeonNotAvailable):
                 logger.debug("Dungeon not available time might be up")
@@ -960,15 +1008,15 @@ class Controller:
     @property
     def cancel_flag(self) -> bool:
         """Check if cancellation was requested (thread-safe)."""
-        return self.device_manager._cancel_event.is_set()
+        return self.device_manager.cancel_token.is_set()
 
     @cancel_flag.setter
     def cancel_flag(self, value: bool):
         """Set cancellation flag (thread-safe)."""
         if value:
-            self.device_manager._cancel_event.set()
+            self.device_manager.cancel_token.cancel()
         else:
-            self.device_manager._cancel_event.clear()
+            self.device_manager.cancel_token.clear()
 
     def pause(self, seconds: float) -> None:
         self.device_manager.pause(seconds)
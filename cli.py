@@ -0,0 +1,162 @@
+"""Headless runner: run one command or a saved macro on a device without the GUI.
+
+Nothing here imports Tk, customtkinter or PIL, so a worker starts faster and
+uses less memory than the GUI. Commands go through the same registry as the
+GUI (features/commands.py). Progress is written to stdout as JSON lines, one
+event per line; logs go to stderr.
+
+Usage:
+    python cli.py run --serial SERIAL --macro NAME [--repeat N]
+    python cli.py run --serial SERIAL --command "PVP" --param num_battles=5
+    python cli.py list
+
+Exit codes: 0 done, 1 a command failed, 2 bad arguments or no device,
+130 stopped with Ctrl+C.
+"""
+
+import argparse
+import json
+import signal
+import sys
+import time
+from typing import Optional
+
+from features.commands import COMMANDS, default_params, run_macro
+from gui.gui_config import GUI_COMMANDS
+from utils.AutoMonsterErrors import ExecutionFlag
+from utils.config_manager import ConfigManager
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def emit(event: str, **fields) -> None:
+    """Write one progress event to stdout as a JSON line."""
+    sys.stdout.write(json.dumps({"event": event, "time": round(time.time(), 3), **fields}) + "\n")
+    sys.stdout.flush()
+
+
+def parse_param(command_name: str, assignment: str) -> tuple:
+    """NAME=VALUE from the command line, converted to the type GUI_COMMANDS declares for NAME."""
+    name, sep, raw = assignment.partition("=")
+    specs = GUI_COMMANDS[command_name]
+    if not sep or name not in specs:
+        raise ValueError(f"Expected NAME=VALUE with NAME one of {', '.join(specs) or '(none)'}, got '{assignment}'")
+    spec = specs[name]
+    kind = spec["type"]
+    if kind == "int":
+        value = int(raw)
+        if not spec.get("min", value) <= value <= spec.get("max", value):
+            raise ValueError(f"{name} must be between {spec['min']} and {spec['max']}")
+    elif kind == "bool":
+        if raw.lower() not in ("true", "false", "1", "0", "yes", "no"):
+            raise ValueError(f"{name} must be true or false")
+        value = raw.lower() in ("true", "1", "yes")
+    elif kind == "choice":
+        if raw not in spec["choices"]:
+            raise ValueError(f"{name} must be one of: {', '.join(spec['choices'])}")
+        value = raw
+    else:
+        # multiple_choice: comma separated
+        value = [item.strip() for item in raw.split(",") if item.strip()]
+    return name, value
+
+
+def list_commands(config: ConfigManager) -> int:
+    for name in COMMANDS:
+        emit("command", name=name, params=default_params(name, config.defaults))
+    for name, steps in config.get_macros().items():
+        emit("macro", name=name, steps=[step["command"] for step in steps])
+    return EXIT_OK
+
+
+def run(args: argparse.Namespace, config: ConfigManager) -> int:
+    if args.macro is not None:
+        macros = config.get_macros()
+        if args.macro not in macros:
+            logger.error(f"Unknown macro: {args.macro}")
+            return EXIT_USAGE
+        steps, options = macros[args.macro], config.get_macro_options()
+    else:
+        try:
+            params = default_params(args.command, config.defaults)
+            params.update(parse_param(args.command, assignment) for assignment in args.param)
+        except ValueError as e:
+            logger.error(e)
+            return EXIT_USAGE
+        steps, options = [{"command": args.command, "params": params}], {}
+
+    emit("connecting", serial=args.serial)
+    try:
+        # Not imported at the top so `list` and argument errors stay instant
+        from AutoMonster import Controller
+        controller = Controller(serial=args.serial, skip_game_launch=args.skip_launch)
+    except Exception as e:
+        emit("error", stage="connect", error=f"{type(e).__name__}: {e}")
+        return EXIT_USAGE
+    controller.gui_logger = lambda msg, level="info": emit("log", level=level, message=msg)
+    emit("connected", serial=controller.device_manager.device.serial)
+
+    def stop(signum, frame) -> None:
+        # First Ctrl+C stops the running command cleanly, a second one kills the runner
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        controller.cancel_flag = True
+
+    signal.signal(signal.SIGINT, stop)
+    runs = 0
+    try:
+        while args.repeat == 0 or runs < args.repeat:
+            result = run_macro(
+                controller, steps, options,
+                on_step=lambda i, command: emit("step", run=runs + 1, index=i, total=len(steps), command=command),
+                progress_callback=lambda progress: emit("progress", progress=round(progress, 4)),
+            )
+            runs += 1
+            emit("run", runs=runs)
+            if result == "EXIT":
+                break
+    except (ExecutionFlag, KeyboardInterrupt):
+        emit("stopped", runs=runs)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        emit("error", stage="run", error=f"{type(e).__name__}: {e}")
+        return EXIT_FAILED
+    finally:
+        controller.close()
+    emit("done", runs=runs)
+    return EXIT_OK
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run AutoMonster commands and macros without the GUI")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    run_parser = sub.add_parser("run", help="Run a command or a saved macro")
+    target = run_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--macro", help="Macro name from macros.json")
+    target.add_argument("--command", choices=list(COMMANDS), help="A single command")
+    run_parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                            help="Command parameter (repeatable); unset ones use the saved defaults")
+    run_parser.add_argument("--serial", help="ADB serial (default: the first device)")
+    run_parser.add_argument("--repeat", type=int, default=1, help="Times to run, 0 to loop until Ctrl+C")
+    run_parser.add_argument("--skip-launch", action="store_true", help="Don't launch the game on connect")
+
+    sub.add_parser("list", help="List commands (with their default parameters) and macros")
+
+    args = parser.parse_args(argv)
+    if args.action == "run" and args.param and args.command is None:
+        parser.error("--param only applies to --command")
+
+    config = ConfigManager()
+    if args.action == "list":
+        return list_commands(config)
+    return run(args, config)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
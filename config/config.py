@@ -2,6 +2,8 @@
 # Configurable thresholds, timeouts, and runtime configuration
 # =============================================================================
 
+import os
+
 from utils.assets import ASSETS
 
 # Default template matching threshold (0.0 to 1.0)
@@ -105,9 +107,45 @@ ASSET_THRESHOLDS = {
 # Battle timeout in seconds (how long to wait before assuming battle is stuck)
 BATTLE_TIMEOUT_SECONDS = 600    # 10 minutes default
 
+# Breeding: how long to wait for the Repeat button before assuming breeding is stuck
+BREED_TIMEOUT_SECONDS = 300    # 5 minutes default
+
 # Slider retry limit before asking user for help
 SLIDER_MAX_RETRIES = 35
 
+# Longest wait for a new frame in take_screenshot(fresh=True). scrcpy only sends
+# frames when the screen changes, so a static screen ends the wait here.
+FRESH_FRAME_TIMEOUT = 1.0
+
+# While the frame waiter watches for assets, the caller still re-checks the
+# latest frame (and clears ads / the are-you-there slider) this often, in seconds
+WAITER_GUARD_INTERVAL = 1.0
+
+# Frames kept in the device manager's ring of reused frame buffers. A buffer is
+# only reused once no caller still holds the frame stored in it.
+FRAME_STORE_SIZE = 8
+
+# =============================================================================
+# Pyramid (coarse-to-fine) template matching
+# =============================================================================
+
+# Assets matched on a downscaled frame first, with each candidate confirmed at
+# full resolution. Only add assets that tests/vision_benchmark.py --mode pyramid
+# reports as identical to exact matching on your recorded frames.
+PYRAMID_ASSETS = set()
+
+# Downscale factor for the coarse pass
+PYRAMID_SCALE = 0.5
+
+# The coarse pass accepts candidates this far below the real threshold
+PYRAMID_THRESHOLD_MARGIN = 0.15
+
+# Templates smaller than this (in pixels, either side) always use exact matching
+PYRAMID_MIN_TEMPLATE_SIZE = 24
+
+# More coarse candidates than this means the pyramid won't save anything; match exactly
+PYRAMID_MAX_CANDIDATES = 8
+
 # =============================================================================
 # Game Resolution Constants
 # =============================================================================
@@ -124,6 +162,35 @@ RECOMMENDED_HEIGHT = 720
 DEFAULT_DEVICE_WIDTH = 1080
 DEFAULT_DEVICE_HEIGHT = 1920
 
+# Match at the device's own resolution instead of resizing every frame to 720p.
+# Templates and ROIs are rescaled once at connect (cached per scale in the
+# template pack). Fixed game-space coordinates still go through scale_x/scale_y.
+NATIVE_RESOLUTION = False
+
+# =============================================================================
+# Capture profiles (scrcpy video stream settings)
+# =============================================================================
+# max_size: longest side the device encodes at. None = just big enough for the
+#           short side to be GAME_HEIGHT (no resizing on our side), 0 = native.
+# bitrate:  H.264 bitrate in bits/s, None = scrcpy's default (8 Mbps).
+# max_fps:  frame rate cap (0 = uncapped).
+# "default" is the stream the templates were captured from (native size, full
+# bitrate, 10 fps). The downscaled and low-bitrate profiles use less decode CPU
+# per device but change the frames that get matched; they are opt-in only
+# (set DEFAULT_CAPTURE_PROFILE) and should be checked against your templates.
+CAPTURE_PROFILES = {
+    "default": {"max_size": 0, "bitrate": None, "max_fps": 10},
+    # Faster reaction while clicking through menus
+    "navigation": {"max_size": 0, "bitrate": None, "max_fps": 20},
+    # Long waits (stamina refill) where nothing needs to be seen quickly
+    "idle": {"max_size": 0, "bitrate": None, "max_fps": 1},
+    # Opt-in: the device downscales to a GAME_HEIGHT short side (no resize on our side)
+    "downscaled": {"max_size": None, "bitrate": None, "max_fps": 10},
+    # Opt-in: downscaled and half the bitrate, for many devices on one machine
+    "low_bitrate": {"max_size": None, "bitrate": 4_000_000, "max_fps": 10},
+}
+DEFAULT_CAPTURE_PROFILE = "default"
+
 # =============================================================================
 # Image Similarity Threshold
 # =============================================================================
@@ -142,6 +209,82 @@ SWIPE_END_Y_FRACTION = 0.15
 # Scroll start position (as fraction of screen height)
 SCROLL_START_Y_FRACTION = 0.55
 
+# =============================================================================
+# Parallel template matching
+# =============================================================================
+# Worker threads used by VisionManager.detect_many() / count() to match several
+# assets against the same frame at once (cv2.matchTemplate releases the GIL).
+# 1 disables the pool and matches serially on the calling thread.
+VISION_WORKERS = min(4, os.cpu_count() or 1)
+
+# Frames whose match results (and in-game / slider guards) VisionManager keeps
+# at once. The bot, the frame waiter and the pool threads may each be looking
+# at a different recent frame, so one slot would keep evicting the others.
+VISION_FRAME_CACHE_SIZE = 4
+
+# =============================================================================
+# Template pack
+# =============================================================================
+# Templates are compiled into a memory-mapped pack here and rebuilt
+# automatically when a PNG changes (python -m utils.template_pack to crush the
+# PNGs and rebuild by hand)
+TEMPLATE_PACK_DIR = "assets/.pack"
+
+# Processes used to crush/decode PNGs while building the pack
+TEMPLATE_PACK_WORKERS = min(4, os.cpu_count() or 1)
+
+# =============================================================================
+# Screen fingerprint index
+# =============================================================================
+# Recorded frames live in SCREENS_DIR/<label>/*.png (e.g. screens/islands/).
+# Build the index with: python -m utils.screen_index
+# When the index file exists, in_screen/in_game skip templates that were never
+# seen on the screen the current frame is identified as.
+SCREENS_DIR = "screens"
+SCREEN_INDEX_FILE = "screen_index.json"
+
+# Thumbnail (width, height) used as the frame signature
+SCREEN_SIGNATURE_SIZE = (32, 18)
+
+# Minimum cosine similarity to a recorded frame to trust the screen label
+SCREEN_MATCH_SIMILARITY = 0.97
+
+# Assets are recorded as possible on a screen at this (lenient) threshold, in
+# color or gray, so the possible-set covers every per-asset threshold in use
+SCREEN_INDEX_BUILD_THRESHOLD = 0.7
+
+# =============================================================================
+# Device telemetry
+# =============================================================================
+# Battery, brightness and power/lock state are read in one batched shell call
+# on a background thread this often (seconds); the GUI and features only read
+# the cached values.
+TELEMETRY_INTERVAL = 30.0
+
+# =============================================================================
+# Persistent ADB shell
+# =============================================================================
+# Shell commands go through this many long-lived `sh` sessions per device
+# instead of opening an adb transport per call. A command that doesn't answer
+# within the timeout (seconds) drops its session and runs as a one-shot call.
+ADB_SHELL_SESSIONS = 2
+ADB_SHELL_TIMEOUT = 10.0
+
+# =============================================================================
+# Farm runner (python farm.py)
+# =============================================================================
+# Each worker process reports its frame, match and CPU counters this often (s)
+FARM_STATS_INTERVAL = 5.0
+
+# Workers are started one at a time; each worker count is measured for this
+# long (seconds) before the next worker starts. 0 starts them all at once
+# (no scaling report).
+FARM_RAMP_INTERVAL = 60.0
+
+# Adding a worker counts as scaling linearly while the per-worker frame and
+# match rates stay above this fraction of the single-worker rates
+FARM_SATURATION_EFFICIENCY = 0.8
+
 # =============================================================================
 # Changelog (version-specific update messages)
 # =============================================================================
@@ -22,6 +22,16 @@ class Region:
 
 AD_REGION = Region.AD_AREA
 
+# Learned ROI table written by VisionManager.save_roi_table(), and the margin (px)
+# added around every learned rectangle when it is loaded
+ROI_TABLE_FILE = "roi_table.json"
+ROI_MARGIN = 16
+
+# Exact pixel rectangles (x, y, w, h) on the game frame. An asset listed here is
+# searched only inside its rectangles, overriding ASSET_REGIONS.
+ASSET_ROIS = {
+}
+
 # Region definitions for each asset
 ASSET_REGIONS = {
     ASSETS.Cancel: Region.TOP_RIGHT,
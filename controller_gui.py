@@ -1,8 +1,15 @@
 """Main GUI orchestrator for AutoMonster.
 
 Delegates UI construction to gui_frames.py and event handling to gui_events.py.
+
+Only what the device selection screen needs is imported up front. The
+Controller (cv2, numpy, scrcpy, the features) is imported by the connect
+thread, gui_events once the main interface exists, and the macro dialog and
+debug tool when they are first opened (tests/import_budget.py checks this).
 """
 
+from __future__ import annotations
+
 import logging
 import os
 import sys
@@ -12,24 +19,20 @@ from typing import Callable, Optional
 import pathlib
 import subprocess
 
-import numpy as np
-
 import customtkinter as ctk
-import scrcpy
 
 from utils.AutoMonsterErrors import *
-from AutoMonster import Controller
 from gui.gui_config import GUI_COMMANDS, GUI_COMMAND_DESCRIPTIONS
 from gui.command_frame import CommandFrame
 from gui.device_selection_frame import DeviceSelectionFrame
-from gui.macro_dialog import MacroDialog
 from utils.config_manager import ConfigManager
 from gui.gui_frames import build_main_interface, _show_update_message_dialog
-from gui.gui_events import (
-    update_image, update_image_safe,
-    on_mouse_down, on_mouse_move, on_mouse_up,
-    on_window_resize, on_log_scroll, on_auto_scroll_toggle,
-)
+
+def _events():
+    """gui_events (cv2, numpy, PIL); only used once the main interface is built."""
+    from gui import gui_events
+    return gui_events
+
 
 if os.path.isfile("version.txt"):
     with open("version.txt", "r") as file:
@@ -101,6 +104,7 @@ class ControllerGUI(ctk.CTk):
             self.controller = None
             self._connection_error = None
             try:
+                from AutoMonster import Controller
                 self.controller = Controller(serial=device_serial)
             except Exception as e:
                 self._connection_error = str(e)
@@ -175,28 +179,28 @@ class ControllerGUI(ctk.CTk):
     # =====================================================================
 
     def update_image(self, frame: np.ndarray) -> None:
-        update_image(self, frame)
+        _events().update_image(self, frame)
 
     def update_image_safe(self, frame: np.ndarray) -> None:
-        update_image_safe(self, frame)
+        _events().update_image_safe(self, frame)
 
     def on_mouse_down(self, event: object) -> None:
-        on_mouse_down(self, event)
+        _events().on_mouse_down(self, event)
 
     def on_mouse_move(self, event: object) -> None:
-        on_mouse_move(self, event)
+        _events().on_mouse_move(self, event)
 
     def on_mouse_up(self, event: object) -> None:
-        on_mouse_up(self, event)
+        _events().on_mouse_up(self, event)
 
     def on_window_resize(self, event: object) -> None:
-        on_window_resize(self, event)
+        _events().on_window_resize(self, event)
 
     def on_log_scroll(self, event: object) -> None:
-        on_log_scroll(self, event)
+        _events().on_log_scroll(self, event)
 
     def on_auto_scroll_toggle(self) -> None:
-        on_auto_scroll_toggle(self)
+        _events().on_auto_scroll_toggle(self)
 
     # =====================================================================
     # Panel toggling
@@ -307,53 +311,8 @@ class ControllerGUI(ctk.CTk):
         self.param_frame.pack(expand=True, fill="both")
 
     def get_command_callback(self, command_name: str) -> Callable[..., Optional[str]]:
-        if command_name == "PVP":
-            return lambda **kwargs: self.controller.do_pvp(
-                kwargs.pop("num_battles", 2), kwargs.pop("handle_boxes", True),
-                kwargs.pop("reduce_box_time", True),
-                progress_callback=self.update_command_progress
-            )
-        elif command_name == "Era Saga":
-            return self.controller.do_era_saga
-        elif command_name == "Resource Dungeons":
-            return lambda **kwargs: self.controller.do_resource_dungeons(
-                wait_for_stamina_to_refill=kwargs.pop("wait_for_stamina", False)
-            )
-        elif command_name == "Ads":
-            return self.controller.play_ads
-        elif command_name == "Reduce Time":
-            return lambda **kwargs: self.controller.reduce_time(
-                kwargs.pop("number_of_ads", 3)
-            )
-        elif command_name == "Cavern":
-            return lambda **kwargs: self.controller.do_cavern(
-                *kwargs.pop("caverns", []), max_rooms=kwargs.pop("max_rooms", 3),
-                change_team=kwargs.pop("change_team", True),
-                progress_callback=self.update_command_progress
-            )
-        elif command_name == "Breed Monsters":
-            return lambda **kwargs: self.controller.breed_monsters(
-                kwargs.pop("num_breeds", 1), kwargs.pop("use_tree", False),
-                kwargs.pop("feed_and_sell_monsters", False), kwargs.pop("sell", False),
-                batch_size=kwargs.pop("batch_size", 15),
-                progress_callback=self.update_command_progress
-            )
-        elif command_name == "Feed and Sell Monsters":
-            return lambda **kwargs: self.controller.feed_and_sell_monsters()
-        elif command_name == "Craft Runes":
-            return lambda **kwargs: self.controller.craft_runes(
-                kwargs.pop("num_runes", 10),
-                kwargs.pop("level", "I"),
-                kwargs.pop("rune_type", "Life"),
-                kwargs.pop("team", False),
-                progress_callback=self.update_command_progress
-            )
-        elif command_name == "Close Game":
-            return lambda **kwargs: self.controller.close_game(
-                action=kwargs.pop("action", "Close Game Only")
-            )
-        else:
-            raise ValueError(f"Unknown command: {command_name}")
+        from features.commands import command_callback
+        return command_callback(self.controller, command_name, self.update_command_progress)
 
     def update_command_progress(self, progress: float) -> None:
         command = self.command_var.get()
@@ -479,6 +438,10 @@ class ControllerGUI(ctk.CTk):
         self.debug_mode = not self.debug_mode
 
         if self.debug_mode:
+            if self.debug_tool is None:
+                # Created on first use: it pulls in cv2, PIL and the asset capture tool
+                from gui.debug_tool import DebugTool
+                self.debug_tool = DebugTool(self.main_frame, self.controller)
             self.screenshot_btn.pack(side="left", fill="x", expand=True, padx=(2, 1))
             self.open_sc_folder_btn.pack(side="left", fill="x", expand=True, padx=(1, 2))
             self.main_frame.grid_columnconfigure(5, weight=0, minsize=self.panel_width)
@@ -504,6 +467,7 @@ class ControllerGUI(ctk.CTk):
         self.start_macro()
 
     def open_macro_dialog(self) -> None:
+        from gui.macro_dialog import MacroDialog
         dialog = MacroDialog(self, self.commands)
         self.wait_window(dialog)
         self.macros = self.load_macros()
@@ -642,8 +606,7 @@ class ControllerGUI(ctk.CTk):
         controller = getattr(self, "controller", None)
         if controller is not None:
             try:
-                controller.client.remove_listener(scrcpy.EVENT_FRAME)
-                controller.client.stop()
+                controller.close()
             except Exception:
                 # Ignore errors during cleanup
                 pass
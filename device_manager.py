@@ -8,36 +8,68 @@ from adbutils import adb
 
 from utils.AutoMonsterErrors import *
 from utils.logger import setup_logger
+from utils.frame_store import FrameStore
+from utils.device_state import DeviceState
+from utils.device_telemetry import DeviceTelemetry
+from utils.adb_shell import ShellPool
+from utils.input_dispatcher import InputDispatcher, Gesture
+from utils.cancellation import CancelToken
+from utils.startup_timeline import StartupTimeline
 from config.config import (
     RECOMMENDED_WIDTH, RECOMMENDED_HEIGHT,
     DEFAULT_DEVICE_WIDTH, DEFAULT_DEVICE_HEIGHT,
-    GAME_HEIGHT,
+    GAME_HEIGHT, NATIVE_RESOLUTION, FRESH_FRAME_TIMEOUT,
+    CAPTURE_PROFILES, DEFAULT_CAPTURE_PROFILE,
     SWIPE_START_Y_FRACTION, SWIPE_END_Y_FRACTION
 )
 
 logger = setup_logger()
 
 class DeviceManager:
-    def __init__(self, serial: Optional[str] = None):
+    def __init__(self, serial: Optional[str] = None, timeline: Optional[StartupTimeline] = None):
+        # Connect phases are recorded here (the Controller passes its own to cover the whole startup)
+        self.timeline = timeline or StartupTimeline()
         self.client: Optional[scrcpy.Client] = None
         self.device = None
+        # Persistent shell sessions for self.device (see shell())
+        self.shell_pool: Optional[ShellPool] = None
         self.ratio: Optional[Tuple[float, float]] = None
         self.new_width: int = 0
         self.resized: bool = False
+        self.native: bool = NATIVE_RESOLUTION
+        self.native_size: Optional[Tuple[int, int]] = None
         self.__last_screenshot: Optional[np.ndarray] = None
+        # Frames from the scrcpy listener, numbered in arrival order
+        self._frame_cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self.frame_seq: int = 0
+        self.frame_time: float = 0.0
+        # Sequence number of the frame take_screenshot last returned
+        self.screenshot_seq: int = 0
+        # Recent frames as handed out (resized once per frame into reused buffers)
+        self.frame_store = FrameStore()
+        self.capture_profile: str = DEFAULT_CAPTURE_PROFILE
+        # Resolution, orientation and screen state, from frames where possible
+        self.state = DeviceState(self.shell)
+        self.state.add_listener(self._on_state_change)
+        # Battery, brightness and power readings, polled in the background
+        self.telemetry = DeviceTelemetry(self.shell)
+        self.telemetry.add_listener(self._on_telemetry)
+        # Touch gestures, played on their own thread over the current client's control socket
+        self.input = InputDispatcher(lambda: self.client.control)
         self._paused: bool = False
-        self._cancel_event = threading.Event()  # Thread-safe cancellation signal
+        # Set by the Stop button; every wait below wakes on it at once
+        self.cancel_token = CancelToken()
 
         self.connect(serial)
 
     def pause(self, seconds: float):
-        start = time.time()
-        while time.time() - start < seconds:
-            if self._cancel_event.is_set():
-                self._cancel_event.clear()
-                logger.debug("Cancelled current operation in pause")
-                raise  ExecutionFlag
-            time.sleep(min(0.1, seconds - (time.time() - start)))
+        self.cancel_token.sleep(seconds, "pause")
+
+    def perform(self, gesture: Gesture) -> None:
+        """Play a gesture and wait for it; cancelling lifts its fingers and raises ExecutionFlag."""
+        if not self.input.perform(gesture, self.cancel_token):
+            self.cancel_token.raise_if_cancelled("a gesture")
 
     def connect(self, serial: Optional[str] = None):
         try:
@@ -56,23 +88,135 @@ class DeviceManager:
                 target_device = devices[0]
 
             self.device = target_device
-            self.ensure_screen_on_and_unlocked()
-
-            self.client = scrcpy.Client(max_fps=10, stay_awake=True, block_frame=True,
-                                        device=target_device)
-            self.client.start(True, True)
+            if self.shell_pool is not None:
+                self.shell_pool.close()
+            self.shell_pool = ShellPool(target_device)
+            self.state.reset()
+            # Waking and unlocking (shell calls and settle delays) run during the scrcpy handshake
+            unlocked = self.timeline.background("unlock", self.ensure_screen_on_and_unlocked)
+
+            with self.timeline.phase("scrcpy"):
+                self.client = self._create_client(self.capture_profile)
+                self.client.start(True, True)
+            unlocked.result()
             logger.info(f'Device connected: {target_device.serial}')
-            
-            self.check_resolution()
+
+            with self.timeline.phase("resolution"):
+                self.check_resolution()
+            # The unlock check above already took the first reading
+            self.telemetry.start()
         except Exception as e:
             logger.error(f"Failed to connect to device: {e}")
             raise e
 
+    def close(self) -> None:
+        """Stop the video stream, telemetry polling and shell sessions."""
+        self.telemetry.stop()
+        if self.client is not None:
+            try:
+                self.client.remove_listener(scrcpy.EVENT_FRAME, self._on_frame)
+                self.client.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping scrcpy client: {e}")
+        if self.shell_pool is not None:
+            self.shell_pool.close()
+
+    def _capture_max_size(self, max_size: Optional[int]) -> int:
+        """Resolve a profile's max_size; None asks for the short side to be GAME_HEIGHT."""
+        if max_size is not None:
+            return max_size
+        try:
+            size = self.device.window_size()
+        except Exception as e:
+            logger.warning(f"Could not read the screen size, streaming at native resolution: {e}")
+            return 0
+        long_side, short_side = max(size), min(size)
+        if short_side <= GAME_HEIGHT:
+            return 0
+        return round(GAME_HEIGHT * long_side / short_side)
+
+    def _create_client(self, profile_name: str) -> scrcpy.Client:
+        profile = CAPTURE_PROFILES[profile_name]
+        options = {"bitrate": profile["bitrate"]} if profile["bitrate"] is not None else {}
+        client = scrcpy.Client(device=self.device, max_width=self._capture_max_size(profile["max_size"]),
+                               max_fps=profile["max_fps"], stay_awake=True, block_frame=True, **options)
+        client.add_listener(scrcpy.EVENT_FRAME, self._on_frame)
+        return client
+
+    def set_capture_profile(self, name: str) -> None:
+        """Restart the video stream with another capture profile, keeping every frame listener."""
+        if name not in CAPTURE_PROFILES:
+            raise ValueError(f"Unknown capture profile: {name}")
+        if name == self.capture_profile:
+            return
+        old_client = self.client
+        new_client = self._create_client(name)
+        for event, listeners in old_client.listeners.items():
+            for listener in listeners:
+                if listener not in new_client.listeners.get(event, []):
+                    new_client.add_listener(event, listener)
+        old_client.stop()
+        self.client = new_client
+        self.capture_profile = name
+        self.client.start(True, True)
+        logger.debug(f"Capture profile: {name}")
+        self.check_resolution()
+
+    def _on_frame(self, frame: Optional[np.ndarray]) -> None:
+        """scrcpy frame listener: number the frame, timestamp it and wake anyone waiting."""
+        if frame is None:
+            return
+        with self._frame_cond:
+            self._frame = frame
+            self.frame_seq += 1
+            self.frame_time = time.perf_counter()
+            self._frame_cond.notify_all()
+        self.state.on_frame(frame)
+
+    def shell(self, command: str) -> str:
+        """Run a shell command on the device over a persistent session."""
+        return self.shell_pool.shell(command)
+
+    def _on_telemetry(self, readings: dict) -> None:
+        self.state.set("screen_on", readings["screen_on"])
+
+    def _on_state_change(self, fact: str, old, new) -> None:
+        if old is not None:
+            logger.debug(f"Device {fact} changed: {old} -> {new}")
+
+    def wait_for_frame(self, after_seq: int, timeout: Optional[float] = None,
+                       cancel_token: Optional[CancelToken] = None) -> Optional[int]:
+        """Block until a frame newer than ``after_seq`` arrives; return its sequence number, or None on timeout.
+
+        Also returns None as soon as ``cancel_token`` is set, without consuming it, so
+        callers decide how to react to cancellation.
+        """
+        if cancel_token is None:
+            with self._frame_cond:
+                if self._frame_cond.wait_for(lambda: self.frame_seq > after_seq, timeout):
+                    return self.frame_seq
+            return None
+
+        with cancel_token.watch(self._wake_frame_waiters), self._frame_cond:
+            self._frame_cond.wait_for(lambda: self.frame_seq > after_seq or cancel_token.is_set(), timeout)
+            return self.frame_seq if self.frame_seq > after_seq else None
+
+    def _wake_frame_waiters(self) -> None:
+        with self._frame_cond:
+            self._frame_cond.notify_all()
+
+    def _latest_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        with self._frame_cond:
+            if self._frame is not None:
+                return self.frame_seq, self._frame
+        # No listener frame yet (e.g. right after connecting)
+        return self.frame_seq, self.client.last_frame
+
     def check_resolution(self):
         size = self.client.resolution
         self.new_width = size[0]
         self.resized = False
-        
+
         if size[0] != RECOMMENDED_WIDTH or size[1] != RECOMMENDED_HEIGHT:
             self.resized = True
             # Wait for a frame to be available before accessing it
@@ -95,6 +239,7 @@ class DeviceManager:
                 logger.error("Could not get frame from device after 1 second. Device may not be responding.")
                 raise Exception("Failed to get frame from device - device connection failed")
 
+            self.native_size = (image.shape[1], image.shape[0])
             self.new_width = int(GAME_HEIGHT * image.shape[1] / image.shape[0])
             resized_image = cv2.resize(image, (self.new_width, GAME_HEIGHT))
             width_original, height_original = image.shape[1], image.shape[0]
@@ -103,64 +248,120 @@ class DeviceManager:
             logger.debug(f"Screen resolution is {size[0]}x{size[1]}, recommended resolution is 1280x720, resizing to "
                         f"{self.new_width}x720 might cause some issues")
 
+    @property
+    def frames_resized(self) -> bool:
+        """True if take_screenshot resizes frames to 720p, so frame coordinates need scale_x/scale_y."""
+        return self.resized and not self.native
+
+    @property
+    def template_scale(self) -> float:
+        """Factor templates must be scaled by to match the frames take_screenshot returns."""
+        return self.ratio[1] if self.resized and self.native else 1.0
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) of the landscape frames handed out by take_screenshot."""
+        if self.resized and self.native:
+            return self.native_size
+        return self.new_width, GAME_HEIGHT
+
     def scale_x(self, x: int) -> int:
         return int(x * self.ratio[0]) if self.resized else x
 
     def scale_y(self, y: int) -> int:
         return int(y * self.ratio[1]) if self.resized else y
 
+    def frame_to_device(self, x: int, y: int) -> Tuple[int, int]:
+        """Map a point in a take_screenshot frame to device touch coordinates."""
+        if self.frames_resized:
+            return self.scale_x(x), self.scale_y(y)
+        return x, y
+
     def get_battery_level(self) -> str:
-        return self.client.device.shell("dumpsys battery | grep level").strip().replace("level: ", "")
+        """Battery level from the last telemetry poll (empty until the first one)."""
+        return self.telemetry.get("battery", "")
 
     def lock_device(self):
-        self.client.device.shell("input keyevent 26")
+        self.shell("input keyevent 26")
+        self.state.set("screen_on", False)
 
     def get_orientation(self) -> str:
-        output = self.client.device.shell(r"dumpsys input | grep SurfaceOrientation").strip()
-        if output in ["SurfaceOrientation: 1", "SurfaceOrientation: 3"]:
-            return "portrait"
-        return "landscape"
+        """Cached orientation from the frame listener; only the first call (or a square frame) asks the device."""
+        return self.state.orientation()
+
+    def is_screen_on(self) -> bool:
+        return self.state.screen_on()
 
     def lower_brightness(self):
-        self.client.device.shell("settings put system screen_brightness_mode 0")
-        self.client.device.shell("settings put system screen_brightness 0")
+        self.shell_pool.shell_many(["settings put system screen_brightness_mode 0",
+                                    "settings put system screen_brightness 0"])
+        self.telemetry.set("brightness_mode", "0")
+        self.telemetry.set("brightness", "0")
 
     def set_auto_brightness(self):
-        self.client.device.shell("settings put system screen_brightness_mode 1")
+        self.shell("settings put system screen_brightness_mode 1")
+        self.telemetry.set("brightness_mode", "1")
 
     def get_brightness_info(self):
-        mode = self.client.device.shell("settings get system screen_brightness_mode")
-        level = self.client.device.shell("settings get system screen_brightness")
-        return mode, level
+        """(mode, level) from the last telemetry poll."""
+        return self.telemetry.get("brightness_mode", ""), self.telemetry.get("brightness", "")
 
     def enable_show_taps(self):
-        self.client.device.shell("settings put system show_touches 1")
+        self.shell("settings put system show_touches 1")
 
     def disable_show_taps(self):
-        self.client.device.shell("settings put system show_touches 0")
+        self.shell("settings put system show_touches 0")
+
+    def take_screenshot(self, fresh: bool = False, timeout: Optional[float] = None) -> np.ndarray:
+        """Return the latest frame (resized to 720p unless in native mode).
 
-    def take_screenshot(self) -> np.ndarray:
-        if self._cancel_event.is_set():
-            self._cancel_event.clear()
-            logger.debug("Cancelled current operation in take_screenshot")
-            raise  ExecutionFlag
+        With ``fresh`` it first waits (up to ``timeout``, FRESH_FRAME_TIMEOUT by default)
+        for a frame newer than the one last returned, so loops never analyze the same
+        frame twice. On timeout the screen hasn't changed and the latest frame is returned.
+        The frame is a read-only view into the frame store (see current_frame). Keep it,
+        or anything sliced from it, for as long as needed; copy it before writing to it.
+        """
+        self.cancel_token.raise_if_cancelled("take_screenshot")
 
         while self._paused:
             self.pause(5)
-            if self._cancel_event.is_set():
-                self._cancel_event.clear()
-                logger.debug("Cancelled current operation")
-                raise  ExecutionFlag
-
-        self.__last_screenshot = self.client.last_frame
-        if self.resized:
-            image = self.__last_screenshot
+
+        if fresh:
+            self._wait_for_fresh_frame(FRESH_FRAME_TIMEOUT if timeout is None else timeout)
+
+        seq, image = self.current_frame()
+        self.screenshot_seq = seq
+        self.__last_screenshot = image
+        return self.__last_screenshot
+
+    def current_frame(self) -> Tuple[int, Optional[np.ndarray]]:
+        """(seq, frame) of the latest frame as take_screenshot would return it, without
+        waiting, cancellation checks or updating the last screenshot (for background readers).
+
+        The frame is a read-only view into the frame store; the store doesn't reuse its
+        buffer while the frame or any view, slice or memoryview of it is still alive.
+        Only raw pointers to its pixels aren't tracked.
+        """
+        seq, image = self._latest_frame()
+        if image is None:
+            return seq, image
+        stored = self.frame_store.get(seq) if seq else None
+        if stored is not None:
+            return seq, stored
+        new_size = None
+        if self.frames_resized:
             new_size = (self.new_width, 720)
             if image.shape[0] > image.shape[1]:
                 new_size = (720, self.new_width)
-            resized_image = cv2.resize(image, new_size)
-            self.__last_screenshot = resized_image
-        return self.__last_screenshot
+            if new_size == (image.shape[1], image.shape[0]):
+                # A stream the device already encodes at 720p (the 'downscaled' capture profile)
+                new_size = None
+        return seq, self.frame_store.put(seq, image, new_size)
+
+    def _wait_for_fresh_frame(self, timeout: float) -> None:
+        """Wait for a frame newer than the last screenshot, raising ExecutionFlag if cancelled meanwhile."""
+        if self.wait_for_frame(self.screenshot_seq, timeout, self.cancel_token) is None:
+            self.cancel_token.raise_if_cancelled("waiting for a frame")
 
     def get_last_screenshot(self) -> Optional[np.ndarray]:
         return self.__last_screenshot
@@ -178,38 +379,39 @@ class DeviceManager:
         try:
             # 1. Wake up the device
             # Check if screen is on first to avoid unnecessary wakeups
-            dump_power = self.device.shell("dumpsys power")
-            is_screen_on = "mWakefulness=Awake" in dump_power
+            # Power and lock state come from one batched shell call
+            readings = self.telemetry.poll() or {}
+            is_screen_on = readings.get("screen_on", False)
             
             if not is_screen_on:
                 logger.debug("Screen is off, turning it on...")
                 # KEYCODE_WAKEUP (224) is more reliable than POWER (26) as it doesn't toggle off if already on
-                self.device.shell("input keyevent KEYCODE_WAKEUP")
+                self.shell("input keyevent KEYCODE_WAKEUP")
+                self.state.set("screen_on", True)
                 time.sleep(1.0) # Critical delay to allow screen to fully wake up
+                # The keyguard only shows up once the screen is on
+                readings = self.telemetry.poll() or readings
             
             # 2. Check if locked
-            # We check 'mIsShowing=true' or 'mKeyguardShowing=true' in 'dumpsys window policy'
-            dump_policy = self.device.shell("dumpsys window policy")
-            is_locked = ("mIsShowing=true" in dump_policy or 
-                        "mKeyguardShowing=true" in dump_policy or
-                        "showing=true" in dump_policy.lower())
+            # 'mIsShowing=true' or 'mKeyguardShowing=true' in 'dumpsys window policy'
+            is_locked = readings.get("locked", False)
             
             if is_locked:
                 logger.debug("Device is locked. Executing robust unlock sequence...")
                 
                 # Method A: Menu Key (82)
                 # This key event often triggers the "unlock" action on swipe screens
-                self.device.shell("input keyevent 82")
+                self.shell("input keyevent 82")
                 time.sleep(0.5)
                 
                 # Method B: Direct Dismiss Command
                 # Works on some Android versions/ROMs
-                self.device.shell("wm dismiss-keyguard")
+                self.shell("wm dismiss-keyguard")
                 time.sleep(0.5)
                 
                 # Method C: Swipe Up (The most common manual action)
                 # Get resolution to calculate swipe coordinates
-                wm_size = self.device.shell("wm size")
+                wm_size = self.shell("wm size")
                 width, height = DEFAULT_DEVICE_WIDTH, DEFAULT_DEVICE_HEIGHT
                 if "Physical size:" in wm_size:
                     try:
@@ -229,17 +431,16 @@ class DeviceManager:
                 
                 # Try a "Fling" swipe (faster duration = 300ms)
                 # This is often more effective for unlocking than a slow drag
-                self.device.shell(f"input swipe {center_x} {start_y} {center_x} {end_y} 300")
+                self.shell(f"input swipe {center_x} {start_y} {center_x} {end_y} 300")
                 time.sleep(1)
                 
                 # Verify if still locked and retry if necessary
-                dump_policy_retry = self.device.shell("dumpsys window policy")
-                is_still_locked = ("mIsShowing=true" in dump_policy_retry or 
-                                  "mKeyguardShowing=true" in dump_policy_retry)
+                readings_retry = self.telemetry.poll() or {}
+                is_still_locked = readings_retry.get("locked", False)
                 if is_still_locked:
                      logger.debug("Still locked, trying alternative longer swipe...")
                      # Try a slower, longer swipe (1000ms)
-                     self.device.shell(f"input swipe {center_x} {int(height * 0.9)} {center_x} {int(height * 0.1)} 1000")
+                     self.shell(f"input swipe {center_x} {int(height * 0.9)} {center_x} {int(height * 0.1)} 1000")
 
         except Exception as e:
             logger.error(f"Failed to ensure screen on/unlocked: {e}")
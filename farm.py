@@ -0,0 +1,402 @@
+"""Headless farm runner: one worker process, each with its own Controller, per ADB serial.
+
+Macros from macros.json are handed out to the workers round-robin. The
+template pack is built once up front, so every worker maps the same pack file
+(the OS shares its pages) instead of decoding PNGs. Each worker is pinned to
+its own cores and sends progress, errors and throughput counters back to the
+supervisor.
+
+Workers are started one at a time (FARM_RAMP_INTERVAL) and the supervisor
+measures the combined frame and match rate at each worker count, so it can
+report where adding workers stops scaling linearly and whether decode or
+matching ran out first.
+
+Usage: python farm.py --macro NAME [--macro NAME ...] [--serial SERIAL ...]
+                      [--repeat N] [--ramp SECONDS]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.config import FARM_STATS_INTERVAL, FARM_RAMP_INTERVAL, FARM_SATURATION_EFFICIENCY
+from utils.AutoMonsterErrors import ExecutionFlag
+from utils.config_manager import ConfigManager
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Controller.log_gui levels
+_LOG_LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+
+# =============================================================================
+# CPU affinity
+# =============================================================================
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_affinity(workers: int, cpus: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """Split the cores into one contiguous set per worker; with more workers than cores they share round-robin."""
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    if workers >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(workers)]
+    share, extra = divmod(len(cpus), workers)
+    plan, start = [], 0
+    for i in range(workers):
+        end = start + share + (1 if i < extra else 0)
+        plan.append(cpus[start:end])
+        start = end
+    return plan
+
+
+def pin_to_cpus(cpus: Sequence[int]) -> bool:
+    """Pin the calling process to ``cpus``: os.sched_setaffinity on Linux, psutil (if installed) elsewhere."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+            return True
+        import psutil
+        psutil.Process().cpu_affinity(list(cpus))
+        return True
+    except Exception as e:
+        logger.debug(f"Could not pin to CPUs {list(cpus)}: {e}")
+        return False
+
+
+# =============================================================================
+# Worker process
+# =============================================================================
+
+def _counters(controller) -> dict:
+    """Throughput counters: frames decoded, template matches run, CPU seconds used by this process."""
+    return {
+        "frames": controller.device_manager.frame_seq,
+        "matches": controller.vision_manager.template_matches,
+        "cpu": time.process_time(),
+    }
+
+
+def _worker(serial: str, macro_name: str, steps: list, options: dict, repeat: int,
+            cpus: List[int], messages, stop, stats_interval: float) -> None:
+    def send(kind: str, **fields) -> None:
+        messages.put({"serial": serial, "type": kind, "time": time.time(), **fields})
+
+    pinned = pin_to_cpus(cpus)
+    try:
+        # Imported here so the supervisor never loads scrcpy or the feature managers
+        from AutoMonster import Controller
+        from features.commands import run_macro
+        controller = Controller(serial=serial, vision_workers=len(cpus) if pinned else None)
+    except Exception as e:
+        send("error", stage="connect", error=f"{type(e).__name__}: {e}")
+        send("done", runs=0)
+        return
+
+    controller.gui_logger = lambda msg, level="info": send("log", level=level, message=msg)
+    finished = threading.Event()
+
+    def report_stats() -> None:
+        while not finished.wait(stats_interval):
+            send("stats", **_counters(controller))
+
+    def forward_stop() -> None:
+        stop.wait()
+        controller.cancel_flag = True
+
+    threading.Thread(target=report_stats, name="FarmStats", daemon=True).start()
+    threading.Thread(target=forward_stop, name="FarmStop", daemon=True).start()
+    send("ready", macro=macro_name, cpus=cpus, pinned=pinned, **_counters(controller))
+
+    runs = 0
+    try:
+        while not stop.is_set() and (repeat == 0 or runs < repeat):
+            result = run_macro(
+                controller, steps, options,
+                on_step=lambda i, command: send("step", run=runs + 1, index=i, total=len(steps), command=command),
+                progress_callback=lambda progress: send("progress", progress=progress),
+                should_stop=stop.is_set,
+            )
+            runs += 1
+            send("run", runs=runs)
+            if result == "EXIT":
+                break
+    except ExecutionFlag:
+        send("log", level="warning", message="Stopped")
+    except Exception as e:
+        send("error", stage="macro", error=f"{type(e).__name__}: {e}")
+    finally:
+        finished.set()
+        send("stats", **_counters(controller))
+        send("done", runs=runs)
+        controller.close()
+
+
+# =============================================================================
+# Scaling report
+# =============================================================================
+
+class ScalingWindow:
+    """Combined throughput while ``workers`` workers were running."""
+
+    def __init__(self, workers: int, start: float, totals: dict):
+        self.workers = workers
+        self.start = start
+        self.end = start
+        self.first = totals
+        self.last = totals
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def rate(self, counter: str) -> float:
+        return (self.last[counter] - self.first[counter]) / self.duration if self.duration > 0 else 0.0
+
+
+def saturation_point(windows: List[ScalingWindow],
+                     efficiency: float = FARM_SATURATION_EFFICIENCY) -> Optional[Tuple[int, str]]:
+    """(worker count, "decode" or "matching") where per-worker throughput first drops below
+    ``efficiency`` times the single-worker rate, or None if scaling stayed linear."""
+    # Only the ramp up counts; windows after workers start finishing repeat smaller counts
+    ramp = []
+    for window in windows:
+        if not ramp or window.workers > ramp[-1].workers:
+            ramp.append(window)
+    if not ramp:
+        return None
+    base = ramp[0]
+    base_frames = base.rate("frames") / base.workers
+    base_matches = base.rate("matches") / base.workers
+    for window in ramp[1:]:
+        frames = window.rate("frames") / window.workers / base_frames if base_frames else 1.0
+        matches = window.rate("matches") / window.workers / base_matches if base_matches else 1.0
+        if min(frames, matches) < efficiency:
+            return window.workers, "decode" if frames <= matches else "matching"
+    return None
+
+
+def scaling_report(windows: List[ScalingWindow], cores: int,
+                   efficiency: float = FARM_SATURATION_EFFICIENCY) -> str:
+    lines = [f"{'workers':>7} {'frames/s':>9} {'matches/s':>10} {'cores busy':>11}"]
+    for window in windows:
+        lines.append(f"{window.workers:>7} {window.rate('frames'):>9.1f} {window.rate('matches'):>10.1f} "
+                     f"{window.rate('cpu'):>6.2f}/{cores:<4}")
+    point = saturation_point(windows, efficiency)
+    if point is None:
+        lines.append(f"Scaling stayed linear up to {windows[-1].workers} worker(s)" if windows
+                     else "Not enough data for a scaling report")
+    else:
+        workers, resource = point
+        lines.append(f"Saturated at {workers} workers: per-worker {resource} rate fell below "
+                     f"{efficiency:.0%} of a single worker's (linear up to {workers - 1})")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# Supervisor
+# =============================================================================
+
+class FarmSupervisor:
+    def __init__(self, assignments: Dict[str, Tuple[str, list]], options: Optional[dict] = None,
+                 repeat: int = 1, ramp_interval: float = FARM_RAMP_INTERVAL,
+                 stats_interval: float = FARM_STATS_INTERVAL):
+        # serial -> (macro name, macro steps)
+        self.assignments = assignments
+        self.options = options or {}
+        self.repeat = repeat
+        self.ramp_interval = ramp_interval
+        self.stats_interval = stats_interval
+        # Spawned, not forked: the supervisor may hold threads and adb sockets
+        self._context = multiprocessing.get_context("spawn")
+        self._messages = self._context.Queue()
+        self._stop = self._context.Event()
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.counters: Dict[str, dict] = {}
+        self.running: set = set()
+        self.runs: Dict[str, int] = {}
+        self.errors: Dict[str, List[str]] = {}
+        self.windows: List[ScalingWindow] = []
+        self._window: Optional[ScalingWindow] = None
+
+    def _prepare_templates(self) -> None:
+        """Build the template pack once so the workers all map it instead of racing to rebuild it."""
+        from utils.template_pack import load_pack
+        try:
+            load_pack()
+        except OSError as e:
+            logger.warning(f"Template pack unavailable ({e}); each worker will decode the PNGs itself")
+
+    def _start_worker(self, serial: str, cpus: List[int]) -> None:
+        macro_name, steps = self.assignments[serial]
+        process = self._context.Process(
+            target=_worker, name=f"farm-{serial}",
+            args=(serial, macro_name, steps, self.options, self.repeat, cpus,
+                  self._messages, self._stop, self.stats_interval),
+            daemon=True,
+        )
+        process.start()
+        self.processes[serial] = process
+        logger.info(f"[{serial}] started on CPU(s) {cpus}: {macro_name}")
+
+    def _totals(self) -> dict:
+        return {counter: sum(c[counter] for c in self.counters.values()) for counter in ("frames", "matches", "cpu")}
+
+    def _close_window(self, now: float) -> None:
+        """End the window for the current worker count; it is kept only if long enough to mean anything."""
+        window, self._window = self._window, None
+        if window is not None:
+            window.end, window.last = now, self._totals()
+            if window.duration >= 2 * self.stats_interval:
+                self.windows.append(window)
+
+    def _open_window(self, now: float) -> None:
+        """The number of running workers changed: start measuring the new count."""
+        self._close_window(now)
+        if self.running:
+            self._window = ScalingWindow(len(self.running), now, self._totals())
+
+    def _handle(self, message: dict) -> None:
+        serial, kind = message["serial"], message["type"]
+        if kind in ("ready", "stats"):
+            self.counters[serial] = {counter: message[counter] for counter in ("frames", "matches", "cpu")}
+        if kind == "ready":
+            pinned = "" if message["pinned"] else " (not pinned)"
+            logger.info(f"[{serial}] connected{pinned}, running {message['macro']}")
+            self.running.add(serial)
+            self._open_window(message["time"])
+        elif kind == "step":
+            logger.info(f"[{serial}] run {message['run']}: step {message['index'] + 1}/{message['total']} "
+                        f"{message['command']}")
+        elif kind == "progress":
+            logger.debug(f"[{serial}] progress {message['progress']:.0%}")
+        elif kind == "run":
+            self.runs[serial] = message["runs"]
+        elif kind == "log":
+            logger.log(_LOG_LEVELS.get(message["level"], logging.INFO), f"[{serial}] {message['message']}")
+        elif kind == "error":
+            self.errors.setdefault(serial, []).append(f"{message['stage']}: {message['error']}")
+            logger.error(f"[{serial}] {message['stage']} failed: {message['error']}")
+        elif kind == "done":
+            self.runs[serial] = message["runs"]
+            if serial in self.running:
+                self.running.discard(serial)
+                self._open_window(message["time"])
+            self.processes.pop(serial, None)
+
+    def run(self) -> int:
+        """Run the farm until every worker is done (or Ctrl+C); returns 0 if no worker reported an error."""
+        serials = list(self.assignments)
+        plan = plan_affinity(len(serials))
+        self._prepare_templates()
+        pending = list(zip(serials, plan))
+        next_start = time.time()
+        try:
+            while pending or self.processes:
+                if self.ramp_interval <= 0:
+                    while pending:
+                        self._start_worker(*pending.pop(0))
+                # Ramp: the next worker starts once the current count has been measured
+                elif pending and time.time() >= next_start:
+                    self._start_worker(*pending.pop(0))
+                    next_start = float("inf")
+                try:
+                    message = self._messages.get(timeout=0.5)
+                except queue.Empty:
+                    self._reap()
+                    continue
+                self._handle(message)
+                if message["type"] == "ready":
+                    next_start = message["time"] + self.ramp_interval
+                elif message["type"] == "done" and next_start == float("inf"):
+                    # Failed before it was ready; don't hold up the ramp
+                    next_start = time.time()
+        except KeyboardInterrupt:
+            logger.warning("Stopping workers...")
+            self._stop.set()
+            self._drain()
+        self._close_window(time.time())
+        self._summary()
+        return 1 if self.errors else 0
+
+    def _reap(self) -> None:
+        """Account for workers that died without saying so."""
+        for serial, process in list(self.processes.items()):
+            if not process.is_alive() and process.exitcode not in (None, 0):
+                self._handle({"serial": serial, "type": "error", "time": time.time(),
+                              "stage": "process", "error": f"exited with code {process.exitcode}"})
+                self._handle({"serial": serial, "type": "done", "time": time.time(),
+                              "runs": self.runs.get(serial, 0)})
+
+    def _drain(self, timeout: float = 30.0) -> None:
+        deadline = time.time() + timeout
+        while self.processes and time.time() < deadline:
+            try:
+                self._handle(self._messages.get(timeout=0.5))
+            except queue.Empty:
+                self._reap()
+            except KeyboardInterrupt:
+                break
+        for process in self.processes.values():
+            process.terminate()
+
+    def _summary(self) -> None:
+        for serial in self.assignments:
+            errors = self.errors.get(serial, [])
+            status = f"{len(errors)} error(s)" if errors else "ok"
+            logger.info(f"[{serial}] {self.runs.get(serial, 0)} run(s), {status}")
+        if self.ramp_interval > 0 and len(self.assignments) > 1:
+            logger.info(f"Scaling:\n{scaling_report(self.windows, len(available_cpus()))}")
+
+
+def assign_macros(serials: Sequence[str], macro_names: Sequence[str], macros: dict) -> Dict[str, Tuple[str, list]]:
+    """Hand the macros out to the serials round-robin."""
+    missing = [name for name in macro_names if name not in macros]
+    if missing:
+        raise ValueError(f"Unknown macro(s): {', '.join(missing)}")
+    return {serial: (macro_names[i % len(macro_names)], macros[macro_names[i % len(macro_names)]])
+            for i, serial in enumerate(serials)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run macros on several devices at once, one process per device")
+    parser.add_argument("--macro", action="append", required=True,
+                        help="Macro from macros.json; repeat to hand out several round-robin")
+    parser.add_argument("--serial", action="append", help="ADB serial (default: every connected device)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per worker, 0 to loop until Ctrl+C")
+    parser.add_argument("--ramp", type=float, default=FARM_RAMP_INTERVAL,
+                        help="Seconds to measure each worker count before starting the next (0: start all at once)")
+    args = parser.parse_args()
+
+    serials = args.serial
+    if not serials:
+        from adbutils import adb
+        serials = [device.serial for device in adb.device_list()]
+    if not serials:
+        logger.error("No ADB devices found")
+        return 2
+
+    config = ConfigManager()
+    try:
+        assignments = assign_macros(serials, args.macro, config.get_macros())
+    except ValueError as e:
+        logger.error(e)
+        return 2
+
+    supervisor = FarmSupervisor(assignments, config.get_macro_options(), repeat=args.repeat,
+                                ramp_interval=args.ramp)
+    return supervisor.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,17 @@
-from features.game import GameManager
-from features.battle import BattleManager
-from features.ads import AdManager
-from features.monster import MonsterManager
+# The managers pull in cv2 and scrcpy, so they are only imported when first
+# accessed; features.commands (the command registry) stays light to import.
+_MANAGERS = {
+    "GameManager": "features.game",
+    "BattleManager": "features.battle",
+    "AdManager": "features.ads",
+    "MonsterManager": "features.monster",
+}
+
+__all__ = list(_MANAGERS)
+
+
+def __getattr__(name):
+    if name in _MANAGERS:
+        import importlib
+        return getattr(importlib.import_module(_MANAGERS[name]), name)
+    raise AttributeError(f"module 'features' has no attribute {name!r}")
@@ -1,5 +1,4 @@
-import scrcpy
-from utils.assets import ASSETS, AdLocationsHorizontal, AdLocationsVertical
+from utils.assets import ASSETS
 from utils.AutoMonsterErrors import *
 from utils.HelperFunctions import compare_imgs
 from utils.logger import setup_logger
@@ -45,7 +44,8 @@ class AdManager:
         counter = 0
         index = 0
         orientation = self.controller.get_orientation()
-        max_it = max(len(AdLocationsVertical), len(AdLocationsHorizontal)) * 4
+        context = self.controller.context
+        max_it = max(len(context.ad_locations_vertical), len(context.ad_locations_horizontal)) * 4
 
         while not self.controller.in_game():
             if counter > max_it:
@@ -63,13 +63,15 @@ class AdManager:
                 logger.debug("Skipped common ad")
                 return True
 
-            ad_locations = AdLocationsHorizontal
+            ad_locations = context.ad_locations_horizontal
             if orientation == "landscape":
-                ad_locations = AdLocationsVertical
+                ad_locations = context.ad_locations_vertical
                 logger.debug("Switched to vertical ad locations")
 
-            if orientation != self.controller.get_orientation():
-                orientation = self.controller.get_orientation()
+            # Cached from the frame listener, so checking every iteration is cheap
+            current_orientation = self.controller.get_orientation()
+            if orientation != current_orientation:
+                orientation = current_orientation
                 index = 0
             elif index > len(ad_locations) - 1:
                 index = 0
@@ -78,9 +80,7 @@ class AdManager:
             x = self.controller.scale_x(x)
             # y = self.controller.scale_y(y)
 
-            self.controller.client.control.touch(x, y, scrcpy.ACTION_DOWN)
-            self.controller.pause(.1)
-            self.controller.client.control.touch(x, y, scrcpy.ACTION_UP)
+            self.controller.tap(x, y)
 
             index += 1
             counter += 1
@@ -94,9 +94,11 @@ class AdManager:
         return False
 
     def _check_for_change(self, t: float = 0):
-        sc = self.controller.take_screenshot()
+        # Copied: the frame store reuses its buffers while we pause
+        sc = self.controller.take_screenshot().copy()
         self.controller.pause(t)
-        return compare_imgs(sc, self.controller.take_screenshot(), transform_to_black=True)
+        # Compare against a newer frame; a static screen times out and compares equal
+        return compare_imgs(sc, self.controller.take_screenshot(fresh=True), transform_to_black=True)
 
     def _ad_wait_out(self, max_time=18):
         ban = False
@@ -1,3 +1,4 @@
+import time
 from typing import Optional
 from utils.assets import ASSETS
 from config.config import BATTLE_TIMEOUT_SECONDS
@@ -16,7 +17,7 @@ class BattleManager:
                                     ASSETS.AutoBattle, None):
             raise  BattleError("Failed to start battle")
         self.controller.pause(5)
-        counter = 5
+        start = time.perf_counter() - 5
         while True:
             sc = self.controller.take_screenshot()
             if not self.controller.in_screen(ASSETS.AutoBattle, screenshot=sc) or self.controller.in_screen(ASSETS.Cancel, screenshot=sc):
@@ -27,10 +28,12 @@ class BattleManager:
                     logger.debug("Ancestral monster awakened")
             if self.controller.in_screen(ASSETS.NextPVP, screenshot=sc):
                 break
-            counter += 1
-            if counter > BATTLE_TIMEOUT_SECONDS:
+            if time.perf_counter() - start > BATTLE_TIMEOUT_SECONDS:
                 raise  BattleError(f"Battle is not finished after {BATTLE_TIMEOUT_SECONDS // 60} minutes")
-            self.controller.pause(1)
+            # Sleep until auto battle ends (its button goes away or Cancel/NextPVP shows up). While an
+            # ancestral monster hides the button that's already true, so re-check at most once a second
+            self.controller.wait_until(present=(ASSETS.Cancel, ASSETS.NextPVP), absent=(ASSETS.AutoBattle,),
+                                       timeout=10, poll=1)
 
     def spin_wheel(self, screenshot=None):
         if self.controller.in_screen(ASSETS.SpinWheel, screenshot=screenshot, retries=2):
@@ -121,7 +124,7 @@ class BattleManager:
                 self.controller.pause(1)
 
                 for _ in range(15):
-                    sc = self.controller.take_screenshot()
+                    sc = self.controller.take_screenshot().copy()
                     if check_and_select_team():
                         break
                     self.controller.client.control.swipe(self.controller.scale_x(300), self.controller.scale_y(550), self.controller.scale_x(300),
@@ -220,9 +223,11 @@ class BattleManager:
                         logger.warning("Stamina is empty")
                         if wait_for_stamina_to_refill:
                             logger.debug("Waiting for stamina to refill")
-                            for _ in range(10):
-                                self.controller.pause(60)
-                                self.controller.take_screenshot()
+                            # Nothing to react to quickly for 10 minutes, stream at the idle profile
+                            with self.controller.capture_profile("idle"):
+                                for _ in range(10):
+                                    self.controller.pause(60)
+                                    self.controller.take_screenshot()
                             self.controller.click_back()
                             continue
                         else:
@@ -0,0 +1,108 @@
+# =============================================================================
+# Command registry
+# =============================================================================
+# Maps every command name in GUI_COMMANDS to the Controller call that runs it,
+# so the GUI, macros and the headless farm runner all start commands the same
+# way: command_callback(controller, name, progress_callback)(**params).
+# =============================================================================
+
+from typing import Callable, Dict, Optional
+
+from gui.gui_config import GUI_COMMANDS
+from utils.AutoMonsterErrors import ExecutionFlag
+
+ProgressCallback = Optional[Callable[[float], None]]
+# (controller, params, progress_callback) -> result ("EXIT" closes the app)
+CommandRunner = Callable[[object, dict, ProgressCallback], Optional[str]]
+
+# Commands that report progress through progress_callback
+PROGRESS_COMMANDS = {"PVP", "Cavern", "Breed Monsters"}
+
+COMMANDS: Dict[str, CommandRunner] = {
+    "PVP": lambda c, kw, progress: c.do_pvp(
+        kw.pop("num_battles", 2), kw.pop("handle_boxes", True),
+        kw.pop("reduce_box_time", True),
+        progress_callback=progress
+    ),
+    "Era Saga": lambda c, kw, progress: c.do_era_saga(**kw),
+    "Resource Dungeons": lambda c, kw, progress: c.do_resource_dungeons(
+        wait_for_stamina_to_refill=kw.pop("wait_for_stamina", False)
+    ),
+    "Ads": lambda c, kw, progress: c.play_ads(**kw),
+    "Reduce Time": lambda c, kw, progress: c.reduce_time(
+        kw.pop("number_of_ads", 3)
+    ),
+    "Cavern": lambda c, kw, progress: c.do_cavern(
+        *kw.pop("caverns", []), max_rooms=kw.pop("max_rooms", 3),
+        change_team=kw.pop("change_team", True),
+        progress_callback=progress
+    ),
+    "Breed Monsters": lambda c, kw, progress: c.breed_monsters(
+        kw.pop("num_breeds", 1), kw.pop("use_tree", False),
+        kw.pop("feed_and_sell_monsters", False), kw.pop("sell", False),
+        batch_size=kw.pop("batch_size", 15),
+        progress_callback=progress
+    ),
+    "Feed and Sell Monsters": lambda c, kw, progress: c.feed_and_sell_monsters(),
+    "Craft Runes": lambda c, kw, progress: c.craft_runes(
+        kw.pop("num_runes", 10),
+        kw.pop("level", "I"),
+        kw.pop("rune_type", "Life"),
+        kw.pop("team", False),
+        progress_callback=progress
+    ),
+    "Close Game": lambda c, kw, progress: c.close_game(
+        action=kw.pop("action", "Close Game Only")
+    ),
+}
+
+
+def default_params(command_name: str, saved_defaults: Optional[dict] = None) -> dict:
+    """The parameters the command panel starts with: GUI_COMMANDS defaults overridden by the saved
+    defaults (ConfigManager.defaults)."""
+    if command_name not in GUI_COMMANDS:
+        raise ValueError(f"Unknown command: {command_name}")
+    saved = (saved_defaults or {}).get(command_name, {})
+    return {name: saved.get(name, spec.get("default")) for name, spec in GUI_COMMANDS[command_name].items()}
+
+
+def command_callback(controller, command_name: str,
+                     progress_callback: ProgressCallback = None) -> Callable[..., Optional[str]]:
+    """A callable running ``command_name`` on ``controller`` with the command's parameters as keywords."""
+    runner = COMMANDS.get(command_name)
+    if runner is None:
+        raise ValueError(f"Unknown command: {command_name}")
+    return lambda **kwargs: runner(controller, kwargs, progress_callback)
+
+
+def run_macro(controller, steps: list, options: Optional[dict] = None,
+              on_step: Optional[Callable[[int, str], None]] = None,
+              progress_callback: ProgressCallback = None,
+              should_stop: Callable[[], bool] = lambda: False) -> Optional[str]:
+    """Run macro steps in order, without a GUI, honouring the macro options.
+
+    ``on_step(index, command)`` is called before each step. Stops at the first failing step and
+    re-raises its error (ExecutionFlag when cancelled). Returns "EXIT" if a step asked to close the app.
+    """
+    options = options or {}
+    lowered_brightness = False
+    if options.get("lower_brightness", False):
+        lowered_brightness = True
+        controller.lower_brightness()
+    try:
+        for i, step in enumerate(steps):
+            if should_stop():
+                raise ExecutionFlag
+            command = step["command"]
+            if on_step is not None:
+                on_step(i, command)
+            progress = progress_callback if command in PROGRESS_COMMANDS else None
+            result = command_callback(controller, command, progress)(**dict(step["params"]))
+            if result == "EXIT":
+                return result
+        if options.get("lock_device", False):
+            controller.lock_device()
+    finally:
+        if lowered_brightness:
+            controller._reset_brightness_if_lowered()
+    return None
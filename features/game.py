@@ -10,7 +10,7 @@ class GameManager:
         self.controller = controller
 
     def force_close(self):
-        self.controller.client.device.shell(r"am force-stop es.socialpoint.MonsterLegends")
+        self.controller.device_manager.shell(r"am force-stop es.socialpoint.MonsterLegends")
 
     def close_game(self):
         if self.controller.in_game():
@@ -24,7 +24,7 @@ class GameManager:
         logger.info("Game closed")
 
     def launch_game(self):
-        self.controller.client.device.shell(r"monkey -p es.socialpoint.MonsterLegends -c android.intent.category.LAUNCHER 1")
+        self.controller.device_manager.shell(r"monkey -p es.socialpoint.MonsterLegends -c android.intent.category.LAUNCHER 1")
 
     def open_game(self, force_close: bool = True):
         if force_close:
@@ -1,8 +1,8 @@
 import logging
-import scrcpy
 from utils.assets import ASSETS, ROMAN_TO_RUNE_LEVEL, RUNE_LEVEL_TO_ASSET, RUNE_TYPE_TO_ASSET, get_rune_asset
-from config.config import SCROLL_START_Y_FRACTION
+from config.config import SCROLL_START_Y_FRACTION, BREED_TIMEOUT_SECONDS
 from utils.AutoMonsterErrors import *
+from utils import input_dispatcher as gestures
 
 logger = logging.getLogger(__name__)
 
@@ -67,11 +67,12 @@ class MonsterManager:
                 break
             x, y = cords[0]
 
+            # Hold Feed for each duration, with a pause after each hold
+            feeding = []
             for hold_time, pause_time in feeding_list:
-                self.controller.client.control.touch(x, y, scrcpy.ACTION_DOWN)
-                self.controller.pause(hold_time)
-                self.controller.client.control.touch(x, y, scrcpy.ACTION_UP)
-                self.controller.pause(pause_time)
+                feeding += [gestures.tap(x, y, hold_time), pause_time]
+            self.controller.device_manager.perform(gestures.chain(*feeding[:-1]))
+            self.controller.pause(feeding_list[-1][1])
 
             self.controller.follow_sequence(ASSETS.MonsterInfo, ASSETS.SellOwned, ASSETS.Yes, ASSETS.Cancel)
             num_fed += 1
@@ -112,8 +113,8 @@ class MonsterManager:
             while True:
                 while not self.controller.in_screen(ASSETS.Repeat, ASSETS.SpeedUp, pause_for=0):
                     self.controller.click(breader, raise_error=True)
-                while not self.controller.in_screen(ASSETS.Repeat, pause_for=0):
-                    self.controller.pause(1)
+                if not self.controller.wait_for(ASSETS.Repeat, timeout=BREED_TIMEOUT_SECONDS, pause_for=0):
+                    raise AutoMonsterError(f"Repeat button did not show up within {BREED_TIMEOUT_SECONDS // 60} minutes")
                 self.controller.click(ASSETS.Repeat, raise_error=True)
                 if count == max_count:
                     break
@@ -131,13 +132,9 @@ class MonsterManager:
             number_of_monsters = self.controller.count(ASSETS.HatchDino, ASSETS.HatchPanda)
             while self.controller.in_screen(ASSETS.HatchDino, ASSETS.HatchPanda, pause_for=0):
                 self.click_left_moster(sell=sell)
-                timeout = 0
                 if not self.controller.in_screen(ASSETS.Place, pause_for=0):
-                    while self.controller.in_screen(ASSETS.HatchNotYet, pause_for=0):
-                        self.controller.pause(2)
-                        timeout += 2
-                        if timeout >= 30:
-                            raise AutoMonsterError("Hatching timed out")
+                    if not self.controller.wait_for_absent(ASSETS.HatchNotYet, timeout=30):
+                        raise AutoMonsterError("Hatching timed out")
                     self.click_left_moster(sell=sell)
                 
                 num_breeds_done += 1
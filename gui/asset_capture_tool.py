@@ -8,7 +8,6 @@ import cv2
 import numpy as np
 from PIL import Image, ImageTk
 from utils.logger import setup_logger
-from utils.region_utils import recommend_region
 
 logger = setup_logger()
 
@@ -133,9 +132,11 @@ class AssetCaptureTool(ctk.CTkToplevel):
     def capture_screenshot(self):
         """Take a new screenshot."""
         try:
-            self.screenshot = self.controller.device_manager.take_screenshot()
-            if self.screenshot is None or self.screenshot.size == 0:
+            screenshot = self.controller.device_manager.take_screenshot()
+            if screenshot is None or screenshot.size == 0:
                 raise Exception("Screenshot is empty")
+            # Kept while cropping, so copy it out of the frame store
+            self.screenshot = screenshot.copy()
             self.crops.clear()
             self.update_crop_list()
             # Delay display to let window render
@@ -356,7 +357,7 @@ class AssetCaptureTool(ctk.CTkToplevel):
             filename = crop['name'].lower() + ".png"
             x1, y1, x2, y2 = crop['x1'], crop['y1'], crop['x2'], crop['y2']
             w, h = x2 - x1, y2 - y1
-            region = recommend_region(x1, y1, w, h)
+            region = self.controller.context.recommend_region(x1, y1, w, h)
             msg = f"  - {name_upper} = \"{filename}\" (region: {x1},{y1},{w}x{h}, recommended: {region})"
             logger.info(msg)
             self.controller.log_gui(msg, "info")
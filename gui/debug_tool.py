@@ -15,8 +15,8 @@ from utils.region_utils import recommend_region, format_region_display
 logger = logging.getLogger(__name__)
 from utils.assets import ASSETS, ADS_DIR
 from .debug_widgets import SimpleMultiSelectListbox
-from gui.asset_capture_tool import AssetCaptureTool
-from utils.HelperFunctions import crush_assets
+from utils.template_pack import build_pack
+from utils.vision_manager import group_matches
 
 
 class DebugTool(ctk.CTkFrame):
@@ -351,6 +351,7 @@ class DebugTool(ctk.CTkFrame):
     def open_capture_tool(self):
         """Open the asset capture tool."""
         try:
+            from gui.asset_capture_tool import AssetCaptureTool
             AssetCaptureTool(self, self.controller)
         except Exception as e:
             self.status_label.configure(text=f"Error opening capture tool: {e}", text_color="red")
@@ -362,8 +363,8 @@ class DebugTool(ctk.CTkFrame):
 
         def do_refresh():
             try:
-                # Run crush_assets to optimize assets
-                crush_assets()
+                # Crush the PNGs and recompile the template pack
+                build_pack(crush=True)
 
                 # Remove assets module from sys.modules to force reload
                 if 'utils.assets' in sys.modules:
@@ -654,7 +655,10 @@ class DebugTool(ctk.CTkFrame):
                 template_path = f'assets/{filename}'
 
                 try:
-                    template = cv2.imread(template_path, cv2.IMREAD_COLOR)
+                    # Loaded templates match the frame scale (native resolution mode)
+                    template = self.controller.vision_manager.get_template_image(filename)
+                    if template is None:
+                        template = cv2.imread(template_path, cv2.IMREAD_COLOR)
                     if template is None:
                         continue
 
@@ -671,37 +675,10 @@ class DebugTool(ctk.CTkFrame):
 
                     result = cv2.matchTemplate(img_to_match, template, cv2.TM_CCOEFF_NORMED)
                     threshold = self.threshold_slider.get() / 100.0
-                    locations = np.where(result >= threshold)
+                    # Group nearby points (best score first), average each group and adjust to full frame
+                    points = [(x + crop_x, y + crop_y) for x, y in group_matches(result, threshold, by_score=True)]
 
-                    if len(locations[0]) > 0:
-                        # --- NMS / Grouping Logic ---
-                        # Zip into (y, x) tuples for sorting/grouping
-                        locs = list(zip(locations[0], locations[1]))
-                        
-                        # Sort by score (descending)
-                        locs.sort(key=lambda pt: result[pt[0]][pt[1]], reverse=True)
-                        
-                        # Group nearby points (within 5px)
-                        location_groups = []
-                        for loc in locs:
-                            if not location_groups:
-                                location_groups.append([loc])
-                            else:
-                                for group in location_groups:
-                                    if abs(group[-1][0] - loc[0]) < 5 and abs(group[-1][1] - loc[1]) < 5:
-                                        group.append(loc)
-                                        break
-                                else:
-                                    location_groups.append([loc])
-                        
-                        # Calculate average top-left for each group and adjust to full frame
-                        points = []
-                        for group in location_groups:
-                            avg_y = sum(l[0] for l in group) // len(group)
-                            avg_x = sum(l[1] for l in group) // len(group)
-                            points.append((avg_x + crop_x, avg_y + crop_y))
-                        # ---------------------------
-                        
+                    if points:
                         # Calculate regions
                         frame_h, frame_w = frame.shape[:2]
                         match_regions = []
@@ -711,17 +688,17 @@ class DebugTool(ctk.CTkFrame):
                         scaled_points = []
                         scaled_w, scaled_h = w, h
                         
-                        if dm.resized:
+                        if dm.frames_resized:
                             scaled_w = dm.scale_x(w)
                             scaled_h = dm.scale_y(h)
 
                         for x, y in points:
                             # Use unified region utility (center-based on the scanned frame)
-                            region_str = recommend_region(x, y, w, h)
+                            region_str = recommend_region(x, y, w, h, (frame_w, frame_h))
                             match_regions.append(format_region_display(region_str))
                             
                             # Scale points for drawing on the original frame
-                            if dm.resized:
+                            if dm.frames_resized:
                                 sx = dm.scale_x(x)
                                 sy = dm.scale_y(y)
                                 scaled_points.append((sx, sy))
@@ -7,6 +7,7 @@ import logging
 from datetime import datetime
 
 import cv2
+import numpy as np
 import scrcpy
 import customtkinter as ctk
 from PIL import Image
@@ -59,24 +60,43 @@ def update_image(gui, frame):
         # Fallback to initial size from gui_frames
         display_width, display_height = gui.img_size if gui.img_size != (0, 0) else (800, 600)
 
-    img_size = (gui.controller.new_width, GAME_HEIGHT)
+    # Resize straight to the preview size into reused buffers, rotating portrait frames afterwards
+    img_size = (display_width, display_height)
     if gui.is_portrait_frame:
         img_size = img_size[::-1]
-    resized_frame = cv2.resize(frame, img_size)
+    if frame.shape[1::-1] == img_size:
+        resized_frame = frame
+    else:
+        resized_frame = _preview_buffer(gui, "resize", (img_size[1], img_size[0], 3))
+        cv2.resize(frame, img_size, dst=resized_frame, interpolation=cv2.INTER_AREA)
     if gui.is_portrait_frame:
-        resized_frame = cv2.rotate(resized_frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        rotated = _preview_buffer(gui, "rotate", (display_height, display_width, 3))
+        cv2.rotate(resized_frame, cv2.ROTATE_90_COUNTERCLOCKWISE, dst=rotated)
+        resized_frame = rotated
 
+    # Cached by the device telemetry poller, so this never waits on adb
     if (datetime.now() - gui.last_check_battery).seconds > 60:
         gui.battery = gui.controller.get_battery_level()
         gui.last_check_battery = datetime.now()
 
-    image = Image.fromarray(cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB))
+    rgb_frame = _preview_buffer(gui, "rgb", (display_height, display_width, 3))
+    cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+    image = Image.fromarray(rgb_frame)
 
     ctk_image = ctk.CTkImage(light_image=image, dark_image=image, size=(display_width, display_height))
     gui.preview_label.configure(image=ctk_image)
     gui.preview_label.image = ctk_image
 
 
+def _preview_buffer(gui, name, shape):
+    """Reusable per-GUI frame buffer, reallocated only when the preview size changes."""
+    buffer = gui._preview_buffers.get(name)
+    if buffer is None or buffer.shape != shape:
+        buffer = np.empty(shape, np.uint8)
+        gui._preview_buffers[name] = buffer
+    return buffer
+
+
 def update_image_safe(gui, frame):
     """Thread-safe wrapper that schedules update_image on the main thread."""
     gui.after(0, update_image, gui, frame)
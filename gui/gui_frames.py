@@ -8,7 +8,6 @@ import os
 from tkinter import messagebox
 
 import customtkinter as ctk
-import scrcpy
 from config.config import GAME_HEIGHT, CHANGELOG_FILE
 
 
@@ -60,9 +59,7 @@ def build_main_interface(gui):
     # ---- Logs frame ----
     _build_logs_frame(gui)
 
-    # ---- Debug tool (pre-created, hidden) ----
-    from .debug_tool import DebugTool
-    gui.debug_tool = DebugTool(mf, gui.controller)
+    # The debug tool is created when debug mode is first switched on (ControllerGUI.toggle_debug_mode)
 
 
 # =============================================================================
@@ -236,8 +233,11 @@ def _build_preview_frame(gui):
     gui.actual_display_size = gui.img_size
     gui._last_preview_size = (0, 0)
     gui._size_recalc_needed = False
+    # Reused resize/rotate/RGB buffers for the preview (see gui_events.update_image)
+    gui._preview_buffers = {}
 
     # Bind events
+    import scrcpy
     gui.controller.client.add_listener(scrcpy.EVENT_FRAME, lambda frame: gui.update_image_safe(frame))
     gui.bind("<Configure>", gui.on_window_resize)
     gui.bind("<F3>", gui.toggle_debug_mode)
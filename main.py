@@ -1,3 +1,4 @@
+import multiprocessing
 import os
 import sys
 
@@ -36,5 +37,6 @@ def main(is_updated: bool = False) -> None:
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     is_updated = "updated" in sys.argv
     main(is_updated=is_updated)
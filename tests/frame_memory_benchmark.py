@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Frame Memory Benchmark - Test Script
+# =============================================================================
+# Measures the memory allocated per frame on the screenshot path, without a
+# device: synthetic decoded frames (a new array per frame, like the scrcpy
+# decoder) are resized to 720p for several consumers, either with a fresh
+# cv2.resize per frame (previous behavior) or through the FrameStore ring.
+# Reports bytes allocated per frame and retained growth, extrapolated to a
+# long run (12 hours at the capture profile's frame rate by default), and
+# checks that a frame held across many newer ones is never overwritten.
+#
+# Usage: python tests/frame_memory_benchmark.py [--frames N] [--fps F] [--hours H]
+# (Run from project root, with venv activated)
+# =============================================================================
+
+import sys
+import pathlib
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Ensure project root is on sys.path so relative imports work
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config import CAPTURE_PROFILES, DEFAULT_CAPTURE_PROFILE, GAME_HEIGHT
+from utils.frame_store import FrameStore
+from utils.logger import setup_logger
+
+logger = setup_logger("FrameMemoryBenchmark")
+
+# Retained growth above this over the whole extrapolated run counts as a leak
+MAX_RETAINED_GROWTH = 1_000_000
+
+
+def _legacy_consumer():
+    cache = {"seq": -1, "frame": None}
+
+    def consume(seq, frame, dsize):
+        # Resize once per frame into a newly allocated array
+        if cache["seq"] != seq:
+            cache["seq"], cache["frame"] = seq, cv2.resize(frame, dsize)
+        return cache["frame"]
+    return consume
+
+
+def _store_consumer():
+    store = FrameStore()
+
+    def consume(seq, frame, dsize):
+        stored = store.get(seq)
+        return stored if stored is not None else store.put(seq, frame, dsize)
+    return consume
+
+
+def run(name: str, consume, sources: list, frames: int, consumers: int, dsize: tuple) -> dict:
+    """Feed ``frames`` frames through ``consume`` and measure what it allocates."""
+    # Warm up so buffers that live for the whole run are already allocated
+    for seq in range(1, len(sources) * 4):
+        consume(seq, sources[seq % len(sources)], dsize)
+
+    tracemalloc.start()
+    allocated = 0
+    halfway = 0
+    held = []
+    for i in range(frames):
+        seq = len(sources) * 4 + i
+        frame = sources[seq % len(sources)]
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(consumers):
+            result = consume(seq, frame, dsize)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        # Like a caller holding the last screenshot until the next one
+        held = [result]
+        if i == frames // 2:
+            # Growth is measured over the second half, once every steady-state buffer exists
+            halfway, _ = tracemalloc.get_traced_memory()
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+
+    return {"name": name, "per_frame": allocated / frames,
+            "growth_per_frame": (end_current - halfway) / (frames - frames // 2 - 1)}
+
+
+def check_held_frames(sources: list, dsize: tuple) -> bool:
+    """A frame, or only a slice or memoryview of it, held across many newer frames must not be overwritten."""
+    store = FrameStore()
+    held = store.put(1, sources[0], dsize)
+    expected = held.copy()
+    part = store.put(2, sources[1 % len(sources)], dsize)[:10, ::2]
+    expected_part = part.copy()
+    raw = memoryview(store.put(3, sources[2 % len(sources)], dsize))
+    expected_raw = np.asarray(raw).copy()
+    for seq in range(4, store.size * 3):
+        store.put(seq, sources[seq % len(sources)], dsize)
+    stable = (np.array_equal(held, expected) and np.array_equal(part, expected_part)
+              and np.array_equal(np.asarray(raw), expected_raw))
+    if not stable:
+        logger.error("A held frame was overwritten by a newer one")
+    return stable
+
+
+def report(results: list, frames: int, fps: float, hours: float) -> bool:
+    run_frames = fps * 3600 * hours
+    ok = True
+    print(f"\n{'Path':<10} {'Alloc/frame':>14} {f'Alloc/{hours:g}h':>14} {f'Retained/{hours:g}h':>16}")
+    print("-" * 58)
+    for r in results:
+        growth = max(0.0, r["growth_per_frame"] * run_frames)
+        print(f"{r['name']:<10} {r['per_frame'] / 1e3:>11.1f} KB {r['per_frame'] * run_frames / 1e9:>11.1f} GB "
+              f"{growth / 1e6:>13.2f} MB")
+        if growth > MAX_RETAINED_GROWTH:
+            ok = False
+    print(f"\n{frames} frames measured, extrapolated to {run_frames:,.0f} frames ({fps:g} fps for {hours:g} h)")
+    return ok
+
+
+def main() -> int:
+    profile = CAPTURE_PROFILES[DEFAULT_CAPTURE_PROFILE]
+    parser = argparse.ArgumentParser(description="Per-frame allocation benchmark for the screenshot path")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames to measure (at least 10)")
+    parser.add_argument("--fps", type=float, default=profile["max_fps"], help="Frame rate to extrapolate with")
+    parser.add_argument("--hours", type=float, default=12, help="Run length to extrapolate to")
+    parser.add_argument("--consumers", type=int, default=3, help="Screenshot reads per frame (bot, waiter, GUI)")
+    parser.add_argument("--source", default="2400x1080", help="Decoded frame size, WIDTHxHEIGHT")
+    args = parser.parse_args()
+    args.frames = max(10, args.frames)
+
+    try:
+        width, height = (int(v) for v in args.source.lower().split("x"))
+    except ValueError:
+        logger.error(f"Invalid --source {args.source}, expected WIDTHxHEIGHT")
+        return 2
+    dsize = (round(width * GAME_HEIGHT / height), GAME_HEIGHT)
+
+    # A few distinct decoded frames, reused so the decoder's own allocations stay out of the numbers
+    rng = np.random.default_rng(0)
+    sources = [rng.integers(0, 255, (height, width, 3), np.uint8) for _ in range(3)]
+
+    results = [
+        run("resize", _legacy_consumer(), sources, args.frames, args.consumers, dsize),
+        run("store", _store_consumer(), sources, args.frames, args.consumers, dsize),
+    ]
+    ok = report(results, args.frames, args.fps, args.hours)
+    return 0 if check_held_frames(sources, dsize) and ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Import Budget - Test Script
+# =============================================================================
+# Measures GUI cold start: imports the entry module (main.py by default) in a
+# fresh interpreter with `python -X importtime` and sums the time of every
+# top-level import. Fails when that passes the budget, or when a module the
+# device selection screen doesn't need (the Controller, cv2, scrcpy, the
+# debug tool, the macro dialog, ...) is imported at startup again.
+#
+# Usage: python tests/import_budget.py [--target main] [--budget-ms 1500] [--runs 5]
+# (Run from project root, with venv activated. No device needed.)
+# =============================================================================
+
+import sys
+import pathlib
+import argparse
+import statistics
+import subprocess
+
+# Ensure project root is on sys.path so relative imports work
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.logger import setup_logger
+
+logger = setup_logger("ImportBudget")
+
+# Cumulative import time allowed for the target, in milliseconds
+DEFAULT_BUDGET_MS = 1500
+
+# Imported on first use (connect, debug mode, dialogs); never at startup
+DEFERRED_MODULES = (
+    "AutoMonster",
+    "device_manager",
+    "features",
+    "utils.vision_manager",
+    "gui.gui_events",
+    "gui.debug_tool",
+    "gui.asset_capture_tool",
+    "gui.macro_dialog",
+    "cv2",
+    "scrcpy",
+)
+
+
+def measure(target: str) -> tuple:
+    """Import ``target`` in a fresh interpreter.
+
+    Returns (total us of the top-level imports, {module imported directly by ``target``: cumulative us},
+    every module imported).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    total, direct, children, modules = 0, {}, {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.add(name.strip())
+        # Nested imports are indented by two spaces per level and listed before their parent
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cumulative)
+            if name.strip() == target:
+                direct = children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = int(cumulative)
+    return total, direct, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the GUI's cold-start import time against a budget")
+    parser.add_argument("--target", default="main", choices=["main", "controller_gui"], help="GUI entry module to import")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs; the median is compared to the budget")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports of the target to list")
+    args = parser.parse_args()
+
+    try:
+        # Warm-up: writes the .pyc files, so the measured runs are cold starts of an installed app
+        measure(args.target)
+        runs = [measure(args.target) for _ in range(max(1, args.runs))]
+    except RuntimeError as e:
+        logger.error(f"Could not import {args.target}: {e}")
+        return 2
+
+    totals = [total / 1000 for total, _, _ in runs]
+    total_ms = statistics.median(totals)
+    _, direct, modules = runs[totals.index(min(totals, key=lambda t: abs(t - total_ms)))]
+
+    logger.info(f"Slowest imports made by {args.target}:")
+    for name, cumulative in sorted(direct.items(), key=lambda item: -item[1])[:args.top]:
+        logger.info(f"  {cumulative / 1000:8.1f} ms  {name}")
+    logger.info(f"Import time: median {total_ms:.1f} ms over {len(runs)} run(s) "
+                f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    eager = sorted(name for name in modules
+                   if any(name == deferred or name.startswith(f"{deferred}.") for deferred in DEFERRED_MODULES))
+    if eager:
+        logger.error(f"Imported at startup but should load on first use: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        logger.error(f"Cold start is {total_ms - args.budget_ms:.1f} ms over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Match Grouping Check - Test Script
+# =============================================================================
+# Checks that group_matches() (utils/vision_manager.py) groups matchTemplate
+# hits exactly like the original per-pixel loop, and times both. Runs without
+# a device: every template is pasted onto small synthetic frames, once on its
+# own and as neighbouring copies a few pixels apart, and both groupings must
+# return the same points in the same order, in row-major and score order.
+# A dense case (a smooth 360x640 response map at low thresholds, like a flat
+# template lighting up large areas) is checked and timed as well.
+#
+# Usage: python tests/match_grouping_check.py [--thresholds 0.8 0.9] [--dense 0.8 0.7] [--repeat 3]
+# (Run from project root, with venv activated)
+# =============================================================================
+
+import sys
+import time
+import pathlib
+import argparse
+
+import cv2
+import numpy as np
+
+# Ensure project root is on sys.path so relative imports work
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.template_pack import read_templates
+from utils.vision_manager import group_matches
+from utils.logger import setup_logger
+
+logger = setup_logger("MatchGroupingCheck")
+
+# Horizontal gaps (px) between neighbouring copies of a template
+NEIGHBOUR_GAPS = (0, 2, 4, 6)
+
+
+def legacy_group_matches(res: np.ndarray, threshold: float, by_score: bool = False) -> list:
+    """The grouping loop get_cords and the Debug Tool used before group_matches()."""
+    locs = list(zip(*np.where(res >= threshold)))
+    if by_score:
+        locs.sort(key=lambda pt: res[pt[0]][pt[1]], reverse=True)
+    location_groups = []
+    for loc in locs:
+        for group in location_groups:
+            if abs(group[-1][0] - loc[0]) < 5 and abs(group[-1][1] - loc[1]) < 5:
+                group.append(loc)
+                break
+        else:
+            location_groups.append([loc])
+    return [(int(sum(l[1] for l in group) // len(group)), int(sum(l[0] for l in group) // len(group)))
+            for group in location_groups]
+
+
+def synthetic_frames(template: np.ndarray, rng: np.random.Generator) -> list:
+    """Noise frames holding one copy of ``template`` and rows of close neighbours."""
+    h, w = template.shape[:2]
+    frames = []
+    single = rng.integers(0, 255, (h + 20, w + 20, 3), np.uint8)
+    single[10:10 + h, 10:10 + w] = template
+    frames.append(single)
+    for gap in NEIGHBOUR_GAPS:
+        frame = rng.integers(0, 255, (h + 24, 3 * w + 2 * gap + 20, 3), np.uint8)
+        for i in range(3):
+            x = 10 + i * (w + gap)
+            y = 10 + (i % 2) * 3
+            frame[y:y + h, x:x + w] = template
+        frames.append(frame)
+    return frames
+
+
+def dense_response(rng: np.random.Generator) -> np.ndarray:
+    """A smooth response map in 0..1 where low thresholds light up wide areas."""
+    res = cv2.GaussianBlur(rng.random((360, 640)).astype(np.float32), (0, 0), 6)
+    return (res - res.min()) / (res.max() - res.min())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare group_matches() against the original grouping loop")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9])
+    parser.add_argument("--dense", type=float, nargs="*", default=[0.8, 0.7],
+                        help="Thresholds for the dense response map (none to skip)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per response map")
+    args = parser.parse_args()
+
+    templates, _ = read_templates()
+    if not templates:
+        logger.error("No templates found")
+        return 2
+
+    rng = np.random.default_rng(0)
+    cases, mismatches = 0, []
+    legacy_time = new_time = 0.0
+    for key, (template, _, _, _) in sorted(templates.items()):
+        for frame in synthetic_frames(template, rng):
+            res = cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)
+            for threshold in args.thresholds:
+                for by_score in (False, True):
+                    cases += 1
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        expected = legacy_group_matches(res, threshold, by_score)
+                    legacy_time += time.perf_counter() - start
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        actual = group_matches(res, threshold, by_score)
+                    new_time += time.perf_counter() - start
+                    if actual != expected:
+                        mismatches.append((key, threshold, by_score, len(expected), len(actual)))
+
+    res = dense_response(rng)
+    for threshold in args.dense:
+        start = time.perf_counter()
+        expected = legacy_group_matches(res, threshold)
+        legacy_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        actual = group_matches(res, threshold)
+        new_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Dense map at {threshold}: {int((res >= threshold).sum())} hits, {len(expected)} groups, "
+                    f"loop {legacy_ms:.1f} ms, group_matches {new_ms:.1f} ms")
+        if actual != expected:
+            mismatches.append(("dense map", threshold, False, len(expected), len(actual)))
+
+    for key, threshold, by_score, expected, actual in mismatches[:20]:
+        logger.error(f"{key} at {threshold} ({'score' if by_score else 'row'} order): "
+                     f"{expected} hit(s) expected, {actual} grouped")
+    runs = cases * args.repeat
+    logger.info(f"{cases} cases over {len(templates)} templates, {len(mismatches)} mismatch(es)")
+    logger.info(f"Grouping per response map: loop {legacy_time / runs * 1e6:.1f} us, "
+                f"group_matches {new_time / runs * 1e6:.1f} us")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
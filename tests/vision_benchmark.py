@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Vision Benchmark - Test Script
+# =============================================================================
+# Measures template matching latency on recorded frames, without a device.
+#   --mode exists:  compares the boolean exists() query against a full
+#                   get_cords() call and checks both agree on visibility.
+#   --mode pyramid: compares pyramid (coarse-to-fine) get_cords() against exact
+#                   matching per asset and reports which assets are safe to add
+#                   to PYRAMID_ASSETS.
+#   --mode threads: times detect_many() over every template with 1..N pool
+#                   workers and checks each pool size gives the same answer.
+#
+# Usage: python tests/vision_benchmark.py [frames_dir] [--mode M] [--repeat N]
+# (Run from project root, with venv activated. frames_dir defaults to sc/,
+#  the folder used by Controller.save_screen)
+# =============================================================================
+
+import sys
+import time
+import pathlib
+import os
+import argparse
+import statistics
+
+import cv2
+
+# Ensure project root is on sys.path so relative imports work
+PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.config import DEFAULT_TEMPLATE_THRESHOLD, GAME_WIDTH, GAME_HEIGHT
+from utils.vision_manager import VisionManager
+from utils.logger import setup_logger
+
+logger = setup_logger("VisionBenchmark")
+
+
+class _FixedScale:
+    """Stands in for DeviceManager on recorded frames that are already 1280x720."""
+    resized = False
+
+    def scale_x(self, x: int) -> int:
+        return x
+
+    def scale_y(self, y: int) -> int:
+        return y
+
+    def frame_to_device(self, x: int, y: int) -> tuple:
+        return x, y
+
+
+def load_frames(frames_dir: pathlib.Path) -> list:
+    frames = []
+    for file in sorted(frames_dir.glob("*.png")):
+        img = cv2.imread(str(file))
+        if img is None:
+            continue
+        if img.shape[:2] != (GAME_HEIGHT, GAME_WIDTH):
+            logger.debug(f"Skipping {file.name}: {img.shape[1]}x{img.shape[0]} is not {GAME_WIDTH}x{GAME_HEIGHT}")
+            continue
+        frames.append(img)
+    return frames
+
+
+def _timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench_exists_vs_get_cords(vm: VisionManager, frames: list, repeat: int) -> dict:
+    """Time exists() and get_cords() for every asset on every frame (cache disabled)."""
+    cords_times, exists_times = [], []
+    mismatches = 0
+    assets = list(vm.template_dict.keys())
+
+    for _ in range(repeat):
+        for frame in frames:
+            for asset in assets:
+                vm.invalidate_cache()
+                cords, t_cords = _timed(vm.get_cords, asset, frame, DEFAULT_TEMPLATE_THRESHOLD)
+                vm.invalidate_cache()
+                found, t_exists = _timed(vm.exists, asset, frame, DEFAULT_TEMPLATE_THRESHOLD)
+                cords_times.append(t_cords)
+                exists_times.append(t_exists)
+                if found != (len(cords) > 0):
+                    mismatches += 1
+
+    return {"get_cords": cords_times, "exists": exists_times, "mismatches": mismatches}
+
+
+def bench_pyramid(vm: VisionManager, frames: list, repeat: int) -> dict:
+    """Per asset: exact vs pyramid get_cords() latency and whether coordinates match."""
+    report = {}
+    for asset in vm.template_dict:
+        exact_times, pyramid_times = [], []
+        mismatched_frames = 0
+        for _ in range(repeat):
+            for frame in frames:
+                vm.pyramid_assets = set()
+                vm.invalidate_cache()
+                exact, t_exact = _timed(vm.get_cords, asset, frame, DEFAULT_TEMPLATE_THRESHOLD)
+                vm.pyramid_assets = {asset}
+                vm.invalidate_cache()
+                pyramid, t_pyramid = _timed(vm.get_cords, asset, frame, DEFAULT_TEMPLATE_THRESHOLD)
+                exact_times.append(t_exact)
+                pyramid_times.append(t_pyramid)
+                if exact != pyramid:
+                    mismatched_frames += 1
+        report[asset] = {"exact": exact_times, "pyramid": pyramid_times, "mismatches": mismatched_frames}
+    vm.pyramid_assets = set()
+    return report
+
+
+def bench_threads(frames: list, repeat: int, max_workers: int) -> dict:
+    """detect_many() over all templates per frame, for each pool size (cache disabled)."""
+    report = {}
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        vm = VisionManager(_FixedScale(), workers=workers)
+        assets = list(vm.template_dict.keys())
+        times, answers = [], []
+        for _ in range(repeat):
+            for frame in frames:
+                vm.invalidate_cache()
+                found, elapsed = _timed(vm.detect_many, assets, frame, DEFAULT_TEMPLATE_THRESHOLD)
+                times.append(elapsed)
+                answers.append(found)
+        vm.close()
+        if baseline is None:
+            baseline = answers
+        report[workers] = {"times": times, "mismatches": sum(a != b for a, b in zip(answers, baseline))}
+    return report
+
+
+def _summary(times: list) -> str:
+    return (f"mean {statistics.mean(times):7.3f} ms   median {statistics.median(times):7.3f} ms   "
+            f"total {sum(times):9.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark template matching on recorded frames")
+    parser.add_argument("frames_dir", nargs="?", default=str(PROJECT_ROOT / "sc"))
+    parser.add_argument("--mode", choices=["exists", "pyramid", "threads"], default="exists")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Largest pool size tried by --mode threads")
+    args = parser.parse_args()
+
+    frames = load_frames(pathlib.Path(args.frames_dir))
+    if not frames:
+        logger.error(f"No {GAME_WIDTH}x{GAME_HEIGHT} frames found in {args.frames_dir}")
+        return 2
+
+    if args.mode == "threads":
+        return report_threads(bench_threads(frames, args.repeat, args.max_workers))
+
+    vm = VisionManager(_FixedScale(), workers=1)
+    logger.info(f"Benchmarking {len(vm.template_dict)} templates on {len(frames)} frames")
+
+    if args.mode == "pyramid":
+        return report_pyramid(bench_pyramid(vm, frames, args.repeat))
+    return report_exists(bench_exists_vs_get_cords(vm, frames, args.repeat))
+
+
+def report_exists(result: dict) -> int:
+    print("\n" + "=" * 60)
+    print("  VISION BENCHMARK - exists() vs get_cords()")
+    print("=" * 60)
+    print(f"  get_cords: {_summary(result['get_cords'])}")
+    print(f"  exists:    {_summary(result['exists'])}")
+    speedup = sum(result['get_cords']) / max(sum(result['exists']), 1e-9)
+    print(f"  Speedup:   {speedup:.2f}x")
+    print(f"  Disagreements: {result['mismatches']}")
+    print("=" * 60 + "\n")
+
+    return 1 if result["mismatches"] else 0
+
+
+def report_pyramid(report: dict) -> int:
+    all_exact = [t for r in report.values() for t in r["exact"]]
+    all_pyramid = [t for r in report.values() for t in r["pyramid"]]
+
+    print("\n" + "=" * 60)
+    print("  VISION BENCHMARK - pyramid vs exact get_cords()")
+    print("=" * 60)
+    print(f"  exact:   {_summary(all_exact)}")
+    print(f"  pyramid: {_summary(all_pyramid)}")
+    print("-" * 60)
+
+    safe, unsafe = [], []
+    for asset, r in sorted(report.items()):
+        exact_ms, pyramid_ms = sum(r["exact"]), sum(r["pyramid"])
+        if r["mismatches"]:
+            unsafe.append(asset)
+            print(f"  [!!] {asset}: coordinates differ on {r['mismatches']} frame(s)")
+        elif pyramid_ms < exact_ms:
+            safe.append(asset)
+
+    print(f"\n  [OK] Identical and faster ({len(safe)}):")
+    for asset in safe:
+        r = report[asset]
+        print(f"    - {asset}: {sum(r['exact']) / sum(r['pyramid']):.2f}x")
+    print("=" * 60 + "\n")
+
+    return 1 if unsafe else 0
+
+
+def report_threads(report: dict) -> int:
+    single = sum(report[1]["times"])
+
+    print("\n" + "=" * 60)
+    print("  VISION BENCHMARK - detect_many() pool scaling")
+    print("=" * 60)
+    for workers, r in report.items():
+        speedup = single / max(sum(r["times"]), 1e-9)
+        print(f"  {workers:2d} worker(s): {_summary(r['times'])}   {speedup:5.2f}x")
+        if r["mismatches"]:
+            print(f"     [!!] answer differs from 1 worker on {r['mismatches']} frame(s)")
+    print("=" * 60 + "\n")
+
+    return 1 if any(r["mismatches"] for r in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
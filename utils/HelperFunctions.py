@@ -1,8 +1,5 @@
-import os
-import pathlib
 import cv2
 import logging
-from PIL import Image
 from config.config import IMAGE_SIMILARITY_THRESHOLD
 
 logger = logging.getLogger(__name__)
@@ -25,23 +22,3 @@ def compare_imgs(img1, img2, transform_to_black=False):
         similarity = 1 - error_l2 / (height * width)
         return similarity > IMAGE_SIMILARITY_THRESHOLD
     return False
-
-
-def crush_png(image_path):
-    """Re-save a PNG to strip metadata and reduce file size."""
-    image = Image.open(image_path)
-    image.save(image_path)
-
-
-def crush_assets():
-    """Crush all PNG assets in assets/ and assets/ads/."""
-    for file in os.listdir("assets"):
-        if file.endswith(".png"):
-            crush_png(f"assets/{file}")
-
-    ads_dir = pathlib.Path("assets/ads")
-    if ads_dir.exists():
-        for file in ads_dir.glob("*.png"):
-            crush_png(str(file))
-
-    logger.debug("Crushed all assets")
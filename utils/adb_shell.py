@@ -0,0 +1,198 @@
+# =============================================================================
+# Persistent ADB shell sessions
+# =============================================================================
+# Every device.shell() call opens a new adb transport, which costs 50-300 ms
+# over wireless adb. ShellPool keeps a few long-lived `sh` sessions open and
+# writes commands to their stdin instead; each command is followed by a unique
+# marker echoed with its exit code, so its output can be cut out of the stream.
+# Several commands can be written before reading (pipelining). A failed session
+# is dropped and the command retried as a one-shot device.shell() call.
+# =============================================================================
+
+import bisect
+import itertools
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+from config.config import ADB_SHELL_SESSIONS, ADB_SHELL_TIMEOUT
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Latency histogram bucket upper bounds in milliseconds (last bucket is open)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000)
+
+_MARKER = "__AUTOMONSTER_DONE__"
+
+
+def command_key(command: str) -> str:
+    """Histogram key: the first two words, e.g. "input keyevent" or "settings put"."""
+    return " ".join(command.split()[:2])
+
+
+class ShellSession:
+    """One persistent ``sh`` on the device, fed commands through its stdin."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, device, timeout: float = ADB_SHELL_TIMEOUT):
+        self._stream = device.shell("sh", stream=True)
+        self._sock: socket.socket = self._stream.conn
+        self._sock.settimeout(timeout)
+        self.timeout = timeout
+        self._buffer = b""
+        self.lock = threading.Lock()
+
+    def send(self, command: str) -> str:
+        """Write ``command`` without waiting; returns the marker to pass to ``receive``."""
+        marker = f"{_MARKER}{next(self._ids)}"
+        # Braces with stdin closed, so a command can't swallow the ones queued after it
+        self._sock.sendall(f"{{ {command}\n}} </dev/null 2>&1; echo \"{marker} $?\"\n".encode())
+        return marker
+
+    def receive(self, marker: str) -> str:
+        """Output of the command ``send`` returned ``marker`` for, right-stripped like device.shell()."""
+        token = marker.encode() + b" "
+        # The socket timeout only bounds each read; a command that keeps printing needs an overall limit
+        deadline = time.monotonic() + self.timeout
+        while True:
+            index = self._buffer.find(token)
+            if index >= 0:
+                end = self._buffer.find(b"\n", index)
+                if end >= 0:
+                    output = self._buffer[:index]
+                    self._buffer = self._buffer[end + 1:]
+                    return output.decode(errors="replace").rstrip()
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no end marker within {self.timeout:g}s")
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("adb shell session closed")
+            self._buffer += chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        except Exception:
+            pass
+
+
+class ShellPool:
+    """Runs shell commands over pooled persistent sessions, falling back to one-shot device.shell()."""
+
+    def __init__(self, device, size: int = ADB_SHELL_SESSIONS, timeout: float = ADB_SHELL_TIMEOUT):
+        self.device = device
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._sessions: List[ShellSession] = []
+        self._lock = threading.Lock()
+        # Persistent sessions are skipped once the device refuses them
+        self._persistent = True
+        self._histogram: Dict[str, List[int]] = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        self._totals: Dict[str, float] = defaultdict(float)
+
+    def shell(self, command: str) -> str:
+        """Run one command and return its output."""
+        return self.shell_many([command])[0]
+
+    def shell_many(self, commands: Sequence[str]) -> List[str]:
+        """Run commands in order, writing them all before reading any output.
+
+        If the session fails part-way, only the commands whose end marker never
+        arrived are run again with the one-shot shell; the ones that finished
+        (e.g. a keyevent or a force-stop) are not repeated.
+        """
+        start = time.perf_counter()
+        outputs: List[str] = []
+        session = self._acquire()
+        if session is not None:
+            try:
+                markers = [session.send(command) for command in commands]
+                for marker in markers:
+                    outputs.append(session.receive(marker))
+            except (OSError, ConnectionError) as e:
+                # Includes timeouts; the session's stream position is unknown now
+                logger.debug(f"adb shell session failed after {len(outputs)} of {len(commands)} command(s), "
+                             f"running the rest with one-shot shell: {e}")
+                self._drop(session)
+            else:
+                session.lock.release()
+
+        outputs += [self.device.shell(command) for command in commands[len(outputs):]]
+        self._record(commands, start)
+        return outputs
+
+    def _acquire(self) -> Optional[ShellSession]:
+        """A locked idle session, a new one while the pool has room, or else wait for the first.
+
+        Returns None (use the one-shot shell) when sessions are unavailable, or
+        when the awaited session stays busy for a whole timeout; that session is
+        stuck and is dropped, so the next caller opens a fresh one.
+        """
+        if not self._persistent:
+            return None
+        with self._lock:
+            for session in self._sessions:
+                if session.lock.acquire(blocking=False):
+                    return session
+            if len(self._sessions) < self.size:
+                try:
+                    session = ShellSession(self.device, self.timeout)
+                except Exception as e:
+                    logger.debug(f"Persistent adb shell unavailable: {e}")
+                    self._persistent = False
+                    return None
+                session.lock.acquire()
+                self._sessions.append(session)
+                return session
+            session = self._sessions[0]
+        if session.lock.acquire(timeout=self.timeout):
+            return session
+        logger.debug(f"adb shell session busy for {self.timeout:g}s, dropping it and using one-shot shell")
+        # Closing the stream also makes the stuck holder fail over to the one-shot shell
+        self._discard(session)
+        return None
+
+    def _discard(self, session: ShellSession) -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        session.close()
+
+    def _drop(self, session: ShellSession) -> None:
+        """Discard a session the caller holds, releasing it."""
+        self._discard(session)
+        session.lock.release()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        report = self.latency_report()
+        if report:
+            logger.debug(f"adb shell latency:\n{report}")
+
+    def _record(self, commands: Sequence[str], start: float) -> None:
+        # Pipelined commands share the elapsed time equally
+        elapsed_ms = (time.perf_counter() - start) * 1000 / len(commands)
+        bucket = bisect.bisect_right(LATENCY_BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            for command in commands:
+                key = command_key(command)
+                self._histogram[key][bucket] += 1
+                self._totals[key] += elapsed_ms
+
+    def latency_report(self) -> str:
+        """Per-command latency histogram, one line per command."""
+        labels = [f"<{b}ms" for b in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}ms"]
+        lines = []
+        with self._lock:
+            for key, counts in sorted(self._histogram.items()):
+                calls = sum(counts)
+                buckets = " ".join(f"{label}:{count}" for label, count in zip(labels, counts) if count)
+                lines.append(f"{key}: {calls} call(s), avg {self._totals[key] / calls:.1f} ms [{buckets}]")
+        return "\n".join(lines)
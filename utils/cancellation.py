@@ -0,0 +1,75 @@
+# =============================================================================
+# Cancellation token
+# =============================================================================
+# The Stop button sets one CancelToken per device. Waits block on the token's
+# Event (or have the token wake them through a callback) instead of sleeping
+# in short slices and polling a flag, so a stop takes effect at once and an
+# idle bot doesn't wake up periodically.
+# =============================================================================
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from utils.AutoMonsterErrors import ExecutionFlag
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class CancelToken:
+    """A thread-safe stop request. Has the threading.Event interface, so it can stand in for one."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def set(self) -> None:
+        """Request cancellation and wake everything watching the token."""
+        with self._lock:
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Cancel callback failed: {e}")
+
+    cancel = set
+
+    def clear(self) -> None:
+        self._event.clear()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or ``timeout``; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self, where: str = "") -> None:
+        """Consume a pending cancellation by raising ExecutionFlag."""
+        if self._event.is_set():
+            self._event.clear()
+            logger.debug(f"Cancelled current operation{f' in {where}' if where else ''}")
+            raise ExecutionFlag
+
+    def sleep(self, seconds: float, where: str = "pause") -> None:
+        """Sleep, raising ExecutionFlag the moment cancellation is requested."""
+        if self._event.wait(seconds):
+            self.raise_if_cancelled(where)
+
+    @contextmanager
+    def watch(self, callback: Callable[[], None]) -> Iterator[None]:
+        """Run ``callback`` if cancellation is requested inside the block (at once if it already was)."""
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self._event.is_set()
+        if cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.remove(callback)
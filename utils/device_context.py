@@ -0,0 +1,51 @@
+# =============================================================================
+# Per-device context
+# =============================================================================
+# State that depends on the connected device and used to live in module
+# globals: the frame size used for region suggestions, the ad close-button
+# locations (the first one depends on the screen width) and the asset regions
+# (rune templates are added when they load). Each Controller owns one, so
+# several controllers can run in one process and share a single TemplateStore.
+# =============================================================================
+
+from typing import Dict, List, Tuple
+
+from config.config import GAME_WIDTH, GAME_HEIGHT
+from config.regions import ASSET_REGIONS, AD_REGION, Region
+from utils.assets import ADS_DIR, AdLocationsHorizontal, AdLocationsVertical
+from utils.region_utils import recommend_region
+
+
+class DeviceContext:
+    def __init__(self, screen_w: int = GAME_WIDTH, screen_h: int = GAME_HEIGHT):
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+        # Copies: the module-level lists and dict stay the pristine defaults
+        self.ad_locations_horizontal: List[Tuple[int, int]] = list(AdLocationsHorizontal)
+        self.ad_locations_vertical: List[Tuple[int, int]] = list(AdLocationsVertical)
+        self.asset_regions: Dict[str, int] = dict(ASSET_REGIONS)
+
+    @property
+    def screen_size(self) -> Tuple[int, int]:
+        return self.screen_w, self.screen_h
+
+    def set_screen_size(self, screen_w: int, screen_h: int) -> None:
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+
+    def add_ad_location(self, x: int, y: int) -> None:
+        """Try a device-specific close-button location before the defaults."""
+        self.ad_locations_horizontal.insert(0, (x, y))
+
+    def set_template_regions(self, rune_keys) -> None:
+        """Rune templates are only known once loaded; they all sit in the bottom half."""
+        for key in rune_keys:
+            self.asset_regions[key] = Region.BOTTOM
+
+    def region_for(self, asset_code: str) -> int:
+        if asset_code.startswith(f"{ADS_DIR}/"):
+            return AD_REGION
+        return self.asset_regions.get(asset_code, Region.ALL)
+
+    def recommend_region(self, x: int, y: int, w: int = 0, h: int = 0) -> str:
+        return recommend_region(x, y, w, h, self.screen_size)
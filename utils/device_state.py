@@ -0,0 +1,120 @@
+# =============================================================================
+# Device state
+# =============================================================================
+# Cached device facts (resolution, orientation, screen on) kept up to date from
+# the scrcpy frame listener, with listeners notified when a fact changes. Shell
+# queries are only the fallback for answers the frames can't give: the first
+# orientation (to learn the device's natural orientation), square frames, and
+# screen state while no frames arrive.
+# =============================================================================
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Frames this recent mean the display is on (scrcpy sends none while it is off)
+SCREEN_ON_FRAME_AGE = 1.0
+
+# listener(fact, old_value, new_value)
+StateListener = Callable[[str, object, object], None]
+
+
+class DeviceState:
+    """Device facts derived from frames, falling back to ``shell`` queries when frames are ambiguous."""
+
+    def __init__(self, shell: Callable[[str], str]):
+        self._shell = shell
+        self._facts: Dict[str, object] = {}
+        self._listeners: List[StateListener] = []
+        self._lock = threading.Lock()
+        self._frame_time = 0.0
+        # Whether SurfaceOrientation 1/3 gives wide frames (natural portrait, i.e. phones); None until calibrated
+        self._rotated_when_wide: Optional[bool] = None
+
+    def add_listener(self, listener: StateListener) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: StateListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def get(self, fact: str, default=None):
+        return self._facts.get(fact, default)
+
+    def set(self, fact: str, value) -> None:
+        """Record a fact and notify listeners if it changed."""
+        with self._lock:
+            old = self._facts.get(fact)
+            self._facts[fact] = value
+        if old != value:
+            for listener in list(self._listeners):
+                try:
+                    listener(fact, old, value)
+                except Exception as e:
+                    logger.error(f"Device state listener failed: {e}")
+
+    def reset(self) -> None:
+        """Forget everything, e.g. after connecting to another device."""
+        with self._lock:
+            self._facts.clear()
+            self._frame_time = 0.0
+            self._rotated_when_wide = None
+
+    def on_frame(self, frame: np.ndarray) -> None:
+        """Frame listener: only looks at the shape, so it is cheap enough for every frame."""
+        self._frame_time = time.perf_counter()
+        height, width = frame.shape[:2]
+        self.set("resolution", (width, height))
+        orientation = self._orientation_from_size(width, height)
+        if orientation is not None:
+            self.set("orientation", orientation)
+
+    def _orientation_from_size(self, width: int, height: int) -> Optional[str]:
+        if self._rotated_when_wide is None or width == height:
+            return None
+        rotated = (width > height) == self._rotated_when_wide
+        return self._orientation_name(rotated)
+
+    @staticmethod
+    def _orientation_name(rotated: bool) -> str:
+        # Kept from the shell-based check: SurfaceOrientation 1/3 reads as "portrait"
+        return "portrait" if rotated else "landscape"
+
+    def orientation(self) -> str:
+        """"portrait" if the display is rotated 90/270 degrees from its natural orientation, else "landscape"."""
+        resolution = self._facts.get("resolution")
+        if resolution is not None and self._orientation_from_size(*resolution) is not None:
+            # Kept current by on_frame once calibrated
+            return self._facts["orientation"]
+        return self.query_orientation()
+
+    def query_orientation(self) -> str:
+        """Ask the device, and learn its natural orientation so later frames answer on their own."""
+        resolution = self._facts.get("resolution")
+        output = self._shell(r"dumpsys input | grep SurfaceOrientation").strip()
+        rotated = output in ["SurfaceOrientation: 1", "SurfaceOrientation: 3"]
+        # Only calibrate if the frame size didn't change while the shell call ran
+        if resolution is not None and resolution == self._facts.get("resolution") and resolution[0] != resolution[1]:
+            self._rotated_when_wide = rotated == (resolution[0] > resolution[1])
+        orientation = self._orientation_name(rotated)
+        self.set("orientation", orientation)
+        return orientation
+
+    def screen_on(self) -> bool:
+        """True if the display is on: recent frames say so, otherwise the device's power state decides."""
+        if time.perf_counter() - self._frame_time < SCREEN_ON_FRAME_AGE:
+            self.set("screen_on", True)
+            return True
+        # A static screen sends no frames either, so ask the device
+        return self.query_screen_on()
+
+    def query_screen_on(self) -> bool:
+        screen_on = "mWakefulness=Awake" in self._shell("dumpsys power")
+        self.set("screen_on", screen_on)
+        return screen_on
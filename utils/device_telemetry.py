@@ -0,0 +1,115 @@
+# =============================================================================
+# Device telemetry
+# =============================================================================
+# Polls battery, brightness and power/lock state on a background thread with a
+# single batched shell command per poll, and caches each reading with the time
+# it was taken. Readers (the GUI preview, brightness helpers) never block on
+# adb.
+# =============================================================================
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from config.config import TELEMETRY_INTERVAL
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+_SEPARATOR = "__AUTOMONSTER_TELEMETRY__"
+
+# Section name -> shell query; all of them run in one shell call, in this order
+_QUERIES = {
+    "battery": "dumpsys battery | grep level",
+    "brightness_mode": "settings get system screen_brightness_mode",
+    "brightness": "settings get system screen_brightness",
+    "power": "dumpsys power | grep mWakefulness=",
+    "keyguard": "dumpsys window policy | grep -i showing=",
+}
+BATCH_COMMAND = f"; echo {_SEPARATOR}; ".join(_QUERIES.values())
+
+# listener(readings) after every successful poll
+TelemetryListener = Callable[[Dict[str, object]], None]
+
+
+def parse_batch(output: str) -> Dict[str, object]:
+    """Readings from the output of BATCH_COMMAND."""
+    sections = dict(zip(_QUERIES, (part.strip() for part in output.split(_SEPARATOR))))
+    keyguard = sections.get("keyguard", "")
+    return {
+        "battery": sections.get("battery", "").replace("level: ", ""),
+        "brightness_mode": sections.get("brightness_mode", ""),
+        "brightness": sections.get("brightness", ""),
+        "screen_on": "mWakefulness=Awake" in sections.get("power", ""),
+        "locked": ("mIsShowing=true" in keyguard or "mKeyguardShowing=true" in keyguard
+                   or "showing=true" in keyguard.lower()),
+    }
+
+
+class DeviceTelemetry:
+    """Cached device readings, refreshed every ``interval`` seconds by one shell call."""
+
+    def __init__(self, shell: Callable[[str], str], interval: float = TELEMETRY_INTERVAL):
+        self._shell = shell
+        self.interval = interval
+        # name -> (value, time.time() when read)
+        self._readings: Dict[str, Tuple[object, float]] = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: TelemetryListener) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Take a first reading right away (unless there already is one), then keep polling in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not self._readings:
+            self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="DeviceTelemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> Optional[Dict[str, object]]:
+        """Run the batched query now and cache it; returns the readings, or None if the shell call failed."""
+        try:
+            readings = parse_batch(self._shell(BATCH_COMMAND))
+        except Exception as e:
+            logger.debug(f"Telemetry poll failed: {e}")
+            return None
+        now = time.time()
+        with self._lock:
+            for name, value in readings.items():
+                self._readings[name] = (value, now)
+        for listener in list(self._listeners):
+            try:
+                listener(readings)
+            except Exception as e:
+                logger.error(f"Telemetry listener failed: {e}")
+        return readings
+
+    def get(self, name: str, default=None):
+        """Last cached reading, never blocking on the device."""
+        with self._lock:
+            reading = self._readings.get(name)
+        return default if reading is None else reading[0]
+
+    def age(self, name: str) -> Optional[float]:
+        """Seconds since ``name`` was read, None if it never was."""
+        with self._lock:
+            reading = self._readings.get(name)
+        return None if reading is None else time.time() - reading[1]
+
+    def set(self, name: str, value) -> None:
+        """Record a value we just changed ourselves (e.g. brightness), so the cache doesn't lag a poll behind."""
+        with self._lock:
+            self._readings[name] = (value, time.time())
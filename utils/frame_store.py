@@ -0,0 +1,116 @@
+# =============================================================================
+# Frame store
+# =============================================================================
+# Fixed ring of preallocated frame buffers. Each decoded frame is resized (or
+# referenced, when it needs no resizing) into the next slot at most once, and
+# every consumer gets the same read-only view of it. The last few frames stay
+# available for diffing.
+#
+# A slot's buffer is only written again once nothing outside the store still
+# references a frame handed out from it. Every frame is a view of a per-frame
+# lease object, and every view, slice or memoryview derived from the frame
+# keeps that lease alive; the store only keeps a weak reference to it. A frame
+# someone is holding, e.g. the last screenshot or one being matched on a pool
+# thread, pins its buffer; the slot then gets a new buffer and the pinned one
+# is freed with its last holder. Handed-out frames therefore never change
+# under a caller. Code that keeps only a raw pointer to the pixels (ctypes,
+# frame.ctypes.data) is not tracked and must hold on to the frame or copy it.
+# =============================================================================
+
+import threading
+import weakref
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.config import FRAME_STORE_SIZE
+
+
+class _Lease:
+    """Owner of one handed-out frame: the frame and everything derived from it keep it alive."""
+
+    def __init__(self, buffer: np.ndarray):
+        self.buffer = buffer
+        interface = dict(buffer.__array_interface__)
+        interface["data"] = (interface["data"][0], True)  # read-only
+        self.__array_interface__ = interface
+
+
+class FrameStore:
+    def __init__(self, size: int = FRAME_STORE_SIZE):
+        self.size = max(2, size)
+        self._buffers: List[Optional[np.ndarray]] = [None] * self.size
+        # Weak reference to the lease of the frame last handed out from each buffer
+        self._leases: List[Optional[weakref.ref]] = [None] * self.size
+        # (seq, read-only view) per slot, seq -1 while empty
+        self._slots: List[Tuple[int, Optional[np.ndarray]]] = [(-1, None)] * self.size
+        self._next = 0
+        self._lock = threading.Lock()
+        self.allocations = 0
+
+    def get(self, seq: int) -> Optional[np.ndarray]:
+        """The stored view of frame ``seq``, if it is still in the ring."""
+        with self._lock:
+            for slot_seq, view in self._slots:
+                if slot_seq == seq:
+                    return view
+        return None
+
+    def seq_of(self, frame: np.ndarray) -> Optional[int]:
+        """Seq of ``frame`` if it is a view this store handed out, else None."""
+        with self._lock:
+            for slot_seq, view in self._slots:
+                if view is frame:
+                    return slot_seq
+        return None
+
+    def put(self, seq: int, frame: np.ndarray, dsize: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Store frame ``seq`` (resized to ``dsize`` if given) and return its read-only view.
+
+        Storing the same seq twice returns the existing view, so the resize runs
+        once per frame no matter how many consumers ask for it.
+        """
+        with self._lock:
+            for slot_seq, stored in self._slots:
+                if slot_seq == seq and seq > 0:
+                    return stored
+            stored = None
+
+            index = self._next
+            self._next = (index + 1) % self.size
+            if dsize is None:
+                # Already the right size: keep a reference, the decoder allocates a new array per frame anyway
+                view = frame.view()
+            else:
+                shape = (dsize[1], dsize[0]) + frame.shape[2:]
+                # Drop this slot's own view first, so only outside holders can pin the buffer
+                self._slots[index] = (-1, None)
+                buffer = self._buffers[index] if self._is_free(index) else None
+                if buffer is None or buffer.shape != shape or buffer.dtype != frame.dtype:
+                    buffer = np.empty(shape, frame.dtype)
+                    self._buffers[index] = buffer
+                    self.allocations += 1
+                cv2.resize(frame, dsize, dst=buffer)
+                lease = _Lease(buffer)
+                self._leases[index] = weakref.ref(lease)
+                view = np.asarray(lease)
+            view.flags.writeable = False
+            self._slots[index] = (seq, view)
+            return view
+
+    def _is_free(self, index: int) -> bool:
+        """True if no frame handed out from the buffer in ``index`` (or anything derived from it) is alive."""
+        lease = self._leases[index]
+        return self._buffers[index] is not None and (lease is None or lease() is None)
+
+    def recent(self, n: int = 2) -> List[Tuple[int, np.ndarray]]:
+        """Up to ``n`` stored (seq, view) pairs, newest first."""
+        with self._lock:
+            stored = [slot for slot in self._slots if slot[1] is not None]
+        stored.sort(key=lambda slot: slot[0], reverse=True)
+        return stored[:n]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots = [(-1, None)] * self.size
@@ -0,0 +1,137 @@
+# =============================================================================
+# Event-driven frame waiter
+# =============================================================================
+# A worker thread evaluates waiting callers' asset conditions on every new
+# frame from the scrcpy listener and wakes the caller as soon as one is met,
+# instead of each caller sleeping and polling screenshots.
+# =============================================================================
+
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.cancellation import CancelToken
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# (asset_code, threshold, gray_img), as taken by VisionManager.detect_many
+Query = Tuple[str, float, bool]
+
+
+class _Subscription:
+    def __init__(self, present: Sequence[Query], absent: Sequence[Query], after_seq: int,
+                 timeout: Optional[float]):
+        self.present = list(present)
+        self.absent = list(absent)
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        # Last frame evaluated for this subscription
+        self.seen_seq = after_seq
+        self.matched_seq: Optional[int] = None
+        self.event = threading.Event()
+
+
+class FrameWaiter:
+    """Wakes callers when any ``present`` asset shows up or any ``absent`` asset disappears."""
+
+    def __init__(self, device_manager, vision_manager):
+        self.device_manager = device_manager
+        self.vision_manager = vision_manager
+        self._subscriptions: List[_Subscription] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._has_work = threading.Event()
+        # Wakes the worker out of its frame wait when callers come or go (or on close)
+        self._wake = CancelToken()
+        self._thread: Optional[threading.Thread] = None
+
+    def wait(self, present: Sequence[Query] = (), absent: Sequence[Query] = (), after_seq: int = 0,
+             timeout: Optional[float] = None, cancel_token: Optional[CancelToken] = None) -> Optional[int]:
+        """Block until a frame newer than ``after_seq`` meets the condition and return its sequence number.
+
+        Returns None on timeout, or at once (without consuming it) when ``cancel_token`` is set.
+        """
+        subscription = _Subscription(present, absent, after_seq, timeout)
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._has_work.set()
+            self._ensure_worker()
+        self._wake.set()
+
+        try:
+            if cancel_token is None:
+                subscription.event.wait(timeout)
+            else:
+                with cancel_token.watch(subscription.event.set):
+                    subscription.event.wait(timeout)
+            return subscription.matched_seq
+        finally:
+            with self._lock:
+                self._subscriptions.remove(subscription)
+                if not self._subscriptions:
+                    self._has_work.clear()
+            self._wake.set()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._has_work.set()
+        self._wake.set()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="FrameWaiter", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        seq = self.device_manager.frame_seq
+        while not self._stop.is_set():
+            # Blocks without waking up while nobody is waiting
+            self._has_work.wait()
+            if self._stop.is_set():
+                break
+            # Sleeps until the next frame, the last caller's timeout, or a caller coming or going
+            self.device_manager.wait_for_frame(seq, self._wait_timeout(), self._wake)
+            self._wake.clear()
+            seq, frame = self.device_manager.current_frame()
+            if frame is None:
+                continue
+            # Also catches subscriptions that arrived after this frame was first seen
+            with self._lock:
+                pending = [s for s in self._subscriptions if s.seen_seq < seq and not s.event.is_set()]
+            for subscription in pending:
+                subscription.seen_seq = seq
+                try:
+                    if self._satisfied(subscription, frame):
+                        subscription.matched_seq = seq
+                        subscription.event.set()
+                except Exception as e:
+                    # Keep the worker alive; the caller's own checks still run
+                    logger.error(f"Frame waiter check failed: {e}")
+
+    def _wait_timeout(self) -> Optional[float]:
+        """Time left until the last waiting caller gives up; None if one waits without a timeout.
+
+        Callers already past their deadline are left out: they wake the worker when they unsubscribe.
+        """
+        with self._lock:
+            deadlines = [s.deadline for s in self._subscriptions]
+        if None in deadlines:
+            return None
+        now = time.monotonic()
+        pending = [deadline for deadline in deadlines if deadline > now]
+        return max(pending) - now if pending else None
+
+    def _visible(self, queries: List[Query], frame: np.ndarray, any_of: bool = False) -> List[str]:
+        possible = set(self.vision_manager.possible_assets([q[0] for q in queries], frame))
+        queries = [q for q in queries if q[0] in possible]
+        return self.vision_manager.detect_many(queries, frame, any_of=any_of) if queries else []
+
+    def _satisfied(self, subscription: _Subscription, frame: np.ndarray) -> bool:
+        if subscription.present and self._visible(subscription.present, frame, any_of=True):
+            return True
+        if subscription.absent:
+            return len(set(self._visible(subscription.absent, frame))) < len({q[0] for q in subscription.absent})
+        return False
@@ -0,0 +1,201 @@
+# =============================================================================
+# Input dispatcher
+# =============================================================================
+# Gestures (tap, long press, swipe, pinch) are declared as timed touch-event
+# lists and played by one dispatcher thread that schedules every event against
+# perf_counter, instead of callers interleaving touches with sleeps on a thread
+# that is also busy template matching. Callers can fire and forget or wait for
+# completion. Gesture builders are cached, so repeated gestures (the same
+# button, the same pinch) are built once.
+# =============================================================================
+
+import queue
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, Union
+
+import scrcpy
+
+from utils.cancellation import CancelToken
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# (seconds from gesture start, scrcpy action, x, y, touch_id)
+TouchEvent = Tuple[float, int, int, int, int]
+Gesture = Tuple[TouchEvent, ...]
+
+# scrcpy-client's default touch id, used by single taps
+DEFAULT_TOUCH_ID = -1
+
+# Sleep until this close to an event, then spin for the rest (seconds)
+_SPIN_MARGIN = 0.002
+
+
+@lru_cache(maxsize=256)
+def tap(x: int, y: int, hold: float = 0.1, touch_id: int = DEFAULT_TOUCH_ID) -> Gesture:
+    """Press and release; a long ``hold`` makes it a long press."""
+    return ((0.0, scrcpy.ACTION_DOWN, x, y, touch_id),
+            (hold, scrcpy.ACTION_UP, x, y, touch_id))
+
+
+@lru_cache(maxsize=256)
+def swipe(x1: int, y1: int, x2: int, y2: int, steps: int = 10, hold: float = 0.15,
+          interval: float = 0.03, touch_id: int = 1) -> Gesture:
+    """Press at (x1, y1), wait ``hold``, move in ``steps`` steps ``interval`` apart, release at (x2, y2)."""
+    events = [(0.0, scrcpy.ACTION_DOWN, x1, y1, touch_id)]
+    t = hold
+    for i in range(1, steps + 1):
+        x = int(x1 + (x2 - x1) * i / steps)
+        y = int(y1 + (y2 - y1) * i / steps)
+        events.append((t, scrcpy.ACTION_MOVE, x, y, touch_id))
+        t += interval
+    events.append((t, scrcpy.ACTION_UP, x2, y2, touch_id))
+    return tuple(events)
+
+
+@lru_cache(maxsize=64)
+def pinch(cx: int, cy: int, start_offset: int, end_offset: int, steps: int = 15,
+          interval: float = 0.01, settle: float = 0.02) -> Gesture:
+    """Two fingers on a horizontal line through (cx, cy), from ``start_offset`` to ``end_offset``
+    either side of it: a growing offset zooms in, a shrinking one zooms out."""
+    events = [(0.0, scrcpy.ACTION_DOWN, cx - start_offset, cy, 1),
+              (0.0, scrcpy.ACTION_DOWN, cx + start_offset, cy, 2)]
+    t = settle
+    for step in range(steps):
+        offset = int(start_offset + (end_offset - start_offset) * (step + 1) / steps)
+        events.append((t, scrcpy.ACTION_MOVE, cx - offset, cy, 1))
+        events.append((t, scrcpy.ACTION_MOVE, cx + offset, cy, 2))
+        t += interval
+    events.append((t, scrcpy.ACTION_UP, cx - end_offset, cy, 1))
+    events.append((t, scrcpy.ACTION_UP, cx + end_offset, cy, 2))
+    return tuple(events)
+
+
+@lru_cache(maxsize=64)
+def chain(*parts: Union[Gesture, float]) -> Gesture:
+    """Play gestures one after another; a number between them is a gap in seconds."""
+    events = []
+    offset = 0.0
+    for part in parts:
+        if isinstance(part, (int, float)):
+            offset += part
+            continue
+        events.extend((t + offset, action, x, y, touch_id) for t, action, x, y, touch_id in part)
+        offset += part[-1][0]
+    return tuple(events)
+
+
+def duration(gesture: Gesture) -> float:
+    return gesture[-1][0] if gesture else 0.0
+
+
+def _raise_thread_priority() -> None:
+    """Best effort: only Windows lets a single thread ask for a higher priority."""
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 2)  # THREAD_PRIORITY_HIGHEST
+    except Exception as e:
+        logger.debug(f"Could not raise input thread priority: {e}")
+
+
+class GestureJob:
+    """A submitted gesture: wait for it, or abort it."""
+
+    def __init__(self, gesture: Gesture):
+        self.gesture = gesture
+        self.completed: Optional[bool] = None
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._abort = threading.Event()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """True once played in full, False if aborted; re-raises a failure to send it."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Gesture still running")
+        if self.error is not None:
+            raise self.error
+        return bool(self.completed)
+
+    def abort(self) -> None:
+        """Skip the gesture if still queued, or stop it and lift any finger it holds down."""
+        self._abort.set()
+
+    def _finish(self, completed: Optional[bool] = None, error: Optional[BaseException] = None) -> None:
+        self.completed, self.error = completed, error
+        self._done.set()
+
+
+class InputDispatcher:
+    """Plays gestures in submission order on a dedicated thread."""
+
+    def __init__(self, control: Callable[[], object]):
+        # Called per gesture, so a restarted scrcpy client is picked up
+        self._control = control
+        self._jobs: "queue.Queue[GestureJob]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, gesture: Gesture) -> GestureJob:
+        """Queue a gesture and return at once (fire and forget, or wait on the job)."""
+        job = GestureJob(gesture)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="InputDispatcher", daemon=True)
+                self._thread.start()
+        self._jobs.put(job)
+        return job
+
+    def perform(self, gesture: Gesture, cancel_token: Optional[CancelToken] = None) -> bool:
+        """Play a gesture and wait for it. Returns False (gesture skipped or aborted, fingers lifted)
+        if ``cancel_token`` is set before it finishes; the token is left for the caller to handle."""
+        job = self.submit(gesture)
+        if cancel_token is None:
+            return job.wait()
+        with cancel_token.watch(job.abort):
+            return job.wait()
+
+    def _run(self) -> None:
+        _raise_thread_priority()
+        while True:
+            job = self._jobs.get()
+            if job._abort.is_set():
+                job._finish(False)
+                continue
+            try:
+                job._finish(self._play(job))
+            except Exception as e:
+                logger.error(f"Gesture failed: {e}")
+                job._finish(error=e)
+
+    def _play(self, job: GestureJob) -> bool:
+        control = self._control()
+        pressed = {}
+        start = time.perf_counter()
+        for t, action, x, y, touch_id in job.gesture:
+            target = start + t
+            while True:
+                remaining = target - time.perf_counter()
+                if remaining <= 0 or job._abort.is_set():
+                    break
+                if remaining > _SPIN_MARGIN:
+                    # Wakes early on abort, otherwise sleeps to just before the event
+                    job._abort.wait(remaining - _SPIN_MARGIN)
+            if job._abort.is_set():
+                for held_id, (held_x, held_y) in pressed.items():
+                    control.touch(held_x, held_y, scrcpy.ACTION_UP, touch_id=held_id)
+                return False
+            control.touch(x, y, action, touch_id=touch_id)
+            if action == scrcpy.ACTION_UP:
+                pressed.pop(touch_id, None)
+            else:
+                pressed[touch_id] = (x, y)
+        return True
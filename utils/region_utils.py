@@ -2,21 +2,24 @@
 # Unified region recommendation utility
 # =============================================================================
 # Single source of truth for determining which Region a coordinate falls into.
-# Screen dimensions are set once at startup from the device manager.
+# Screen dimensions come from the caller (DeviceContext.recommend_region passes
+# the device's frame size); 1280x720 otherwise.
 # =============================================================================
 
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
 from config.regions import Region
 
-# Screen dimensions (set at startup from device_manager)
-SCREEN_W: int = 1280
-SCREEN_H: int = 720
+logger = logging.getLogger(__name__)
 
+Rect = Tuple[int, int, int, int]
 
-def init(screen_w: int, screen_h: int) -> None:
-    """Update screen dimensions at startup."""
-    global SCREEN_W, SCREEN_H
-    SCREEN_W = screen_w
-    SCREEN_H = screen_h
+# Default screen dimensions (the game frame)
+SCREEN_W: int = 1280
+SCREEN_H: int = 720
 
 # Map bitmask -> exact Region constant name (for composite regions)
 _BITMASK_TO_NAME = {
@@ -31,26 +34,28 @@ _BITMASK_TO_NAME = {
 }
 
 
-def recommend_region(x: int, y: int, w: int = 0, h: int = 0) -> str:
+def recommend_region(x: int, y: int, w: int = 0, h: int = 0,
+                     screen_size: Optional[Tuple[int, int]] = None) -> str:
     """Recommend a Region string based on asset position.
 
-    Uses the **center** of the asset to determine the quadrant.
-    Screen dimensions are read from module-level SCREEN_W/SCREEN_H (set at startup via init()).
+    Uses the **center** of the asset to determine the quadrant of a
+    ``screen_size`` (w, h) frame, SCREEN_W x SCREEN_H if not given.
 
     Returns
     -------
     str
         e.g. ``"Region.BOTTOM_LEFT"``, ``"Region.ALL"``
     """
+    screen_w, screen_h = screen_size or (SCREEN_W, SCREEN_H)
     center_x = x + w / 2
     center_y = y + h / 2
 
     r = 0
-    if center_y < SCREEN_H / 2:
+    if center_y < screen_h / 2:
         r |= Region.TOP
     else:
         r |= Region.BOTTOM
-    if center_x < SCREEN_W / 2:
+    if center_x < screen_w / 2:
         r |= Region.LEFT
     else:
         r |= Region.RIGHT
@@ -72,3 +77,56 @@ def format_region_display(region_str: str) -> str:
         return "All"
     # Strip "Region.", split on "_", title-case each part, rejoin
     return "".join(part.title() for part in region_str.replace("Region.", "").split("_"))
+
+
+def merge_rects(rects: List[Rect]) -> List[Rect]:
+    """Merge overlapping or touching (x, y, w, h) rectangles into their bounding boxes."""
+    merged = list(rects)
+    changed = True
+    while changed:
+        changed = False
+        result: List[Rect] = []
+        for x, y, w, h in merged:
+            for i, (mx, my, mw, mh) in enumerate(result):
+                if x <= mx + mw and mx <= x + w and y <= my + mh and my <= y + h:
+                    nx, ny = min(x, mx), min(y, my)
+                    result[i] = (nx, ny, max(x + w, mx + mw) - nx, max(y + h, my + mh) - ny)
+                    changed = True
+                    break
+            else:
+                result.append((x, y, w, h))
+        merged = result
+    return sorted(merged)
+
+
+def save_roi_table(path: str, frame_size: Tuple[int, int], rois: Dict[str, List[Rect]]) -> None:
+    """Write learned ROIs as JSON: ``{"frame_size": [w, h], "rois": {asset: [[x, y, w, h], ...]}}``."""
+    data = {
+        "frame_size": list(frame_size),
+        "rois": {asset: [list(r) for r in rects] for asset, rects in sorted(rois.items())},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+def load_roi_table(path: str, margin: int) -> Tuple[Dict[str, List[Rect]], Optional[Tuple[int, int]]]:
+    """Load a learned ROI table, growing every rectangle by ``margin`` on each side.
+
+    Returns ``({}, None)`` if the file is missing or invalid.
+    """
+    if not os.path.isfile(path):
+        return {}, None
+
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        frame_size = tuple(data["frame_size"])
+        rois = {
+            asset: [(x - margin, y - margin, w + 2 * margin, h + 2 * margin) for x, y, w, h in rects]
+            for asset, rects in data["rois"].items()
+        }
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        logger.error(f"Invalid ROI table {path}: {e}")
+        return {}, None
+
+    return rois, frame_size
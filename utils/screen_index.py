@@ -0,0 +1,177 @@
+# =============================================================================
+# Screen fingerprint index
+# =============================================================================
+# Identifies which screen a frame shows (islands, PVP lobby, cavern page, ...)
+# from a small normalized thumbnail, and knows which templates can appear on
+# each screen, so callers can skip the ones that can't.
+#
+# Build from recorded frames in SCREENS_DIR/<label>/*.png:
+#   python -m utils.screen_index [screens_dir] [--out screen_index.json]
+# =============================================================================
+
+import json
+import os
+import pathlib
+import sys
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.config import (
+    SCREENS_DIR, SCREEN_INDEX_FILE, SCREEN_SIGNATURE_SIZE, SCREEN_MATCH_SIMILARITY,
+    SCREEN_INDEX_BUILD_THRESHOLD, GAME_WIDTH, GAME_HEIGHT
+)
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def frame_signature(frame: np.ndarray, size: Tuple[int, int] = SCREEN_SIGNATURE_SIZE) -> np.ndarray:
+    """Mean-removed, unit-length gray thumbnail; the dot product of two is their cosine similarity."""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    thumb -= thumb.mean()
+    norm = np.linalg.norm(thumb)
+    return thumb / norm if norm > 0 else thumb
+
+
+class ScreenIndex:
+    """Known screens: their recorded signatures and the assets seen on them."""
+
+    def __init__(self, size: Tuple[int, int] = SCREEN_SIGNATURE_SIZE, similarity: float = SCREEN_MATCH_SIMILARITY):
+        self.size = tuple(size)
+        self.similarity = similarity
+        self.labels: List[str] = []
+        self.possible: Dict[str, FrozenSet[str]] = {}
+        # Templates the index was built with; anything newer is never skipped
+        self.indexed_assets: FrozenSet[str] = frozenset()
+        self._signatures = np.empty((0, self.size[0] * self.size[1]), np.float32)
+        self._row_labels: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def add(self, label: str, signatures: Iterable[np.ndarray], assets: Iterable[str]) -> None:
+        signatures = [np.asarray(s, np.float32) for s in signatures]
+        if label not in self.possible:
+            self.labels.append(label)
+            self.possible[label] = frozenset()
+        self.possible[label] = self.possible[label] | frozenset(assets)
+        if signatures:
+            self._signatures = np.vstack([self._signatures, *signatures])
+            self._row_labels.extend([label] * len(signatures))
+
+    def identify(self, frame: np.ndarray) -> Tuple[Optional[str], float]:
+        """Return (label, similarity) of the closest recorded frame, label None if below the threshold."""
+        if not self._row_labels:
+            return None, 0.0
+        scores = self._signatures @ frame_signature(frame, self.size)
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        return (self._row_labels[best] if score >= self.similarity else None), score
+
+    def can_appear(self, label: Optional[str], asset_code: str) -> bool:
+        """False only if the asset was indexed and never seen on this screen."""
+        if label is None or asset_code not in self.indexed_assets:
+            return True
+        return asset_code in self.possible.get(label, ())
+
+    def save(self, path: str = SCREEN_INDEX_FILE) -> None:
+        data = {
+            "size": list(self.size),
+            "indexed_assets": sorted(self.indexed_assets),
+            "screens": {
+                label: {
+                    "assets": sorted(self.possible[label]),
+                    "signatures": [np.round(s, 5).tolist() for s, row_label in
+                                   zip(self._signatures, self._row_labels) if row_label == label],
+                }
+                for label in self.labels
+            },
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path: str = SCREEN_INDEX_FILE) -> "ScreenIndex":
+        """Load an index, returning an empty one (identifies nothing) if missing or invalid."""
+        if not os.path.isfile(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            index = cls(size=tuple(data["size"]))
+            index.indexed_assets = frozenset(data["indexed_assets"])
+            for label, screen in data["screens"].items():
+                index.add(label, screen["signatures"], screen["assets"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid screen index {path}: {e}")
+            return cls()
+        return index
+
+
+def build_index(vision_manager, screens_dir: str = SCREENS_DIR,
+                threshold: float = SCREEN_INDEX_BUILD_THRESHOLD) -> ScreenIndex:
+    """Index every SCREENS_DIR/<label>/*.png frame with the templates visible on it."""
+    index = ScreenIndex()
+    assets = list(vision_manager.template_dict.keys())
+    index.indexed_assets = frozenset(assets)
+    # Lenient color and gray passes, so the possible-set covers every per-asset override
+    queries = [(a, threshold, False) for a in assets] + [(a, threshold, True) for a in assets]
+
+    for label_dir in sorted(p for p in pathlib.Path(screens_dir).iterdir() if p.is_dir()):
+        signatures, seen = [], set()
+        for file in sorted(label_dir.glob("*.png")):
+            frame = cv2.imread(str(file))
+            if frame is None or frame.shape[:2] != (GAME_HEIGHT, GAME_WIDTH):
+                logger.warning(f"Skipping {file}: not a {GAME_WIDTH}x{GAME_HEIGHT} frame")
+                continue
+            signatures.append(frame_signature(frame, index.size))
+            seen.update(vision_manager.detect_many(queries, frame))
+        if signatures:
+            index.add(label_dir.name, signatures, seen)
+            logger.info(f"{label_dir.name}: {len(signatures)} frame(s), {len(seen)} possible asset(s)")
+    return index
+
+
+def _ambiguous_frames(index: ScreenIndex) -> List[Tuple[str, str, float]]:
+    """Leave-one-out check: recorded frames whose nearest other frame has a different label."""
+    problems = []
+    sims = index._signatures @ index._signatures.T
+    np.fill_diagonal(sims, -1.0)
+    for row, label in enumerate(index._row_labels):
+        best = int(np.argmax(sims[row]))
+        if sims[row, best] >= index.similarity and index._row_labels[best] != label:
+            problems.append((label, index._row_labels[best], float(sims[row, best])))
+    return problems
+
+
+def main() -> int:
+    import argparse
+    from utils.vision_manager import VisionManager
+
+    parser = argparse.ArgumentParser(description="Build the screen fingerprint index from recorded frames")
+    parser.add_argument("screens_dir", nargs="?", default=SCREENS_DIR)
+    parser.add_argument("--out", default=SCREEN_INDEX_FILE)
+    args = parser.parse_args()
+
+    if not pathlib.Path(args.screens_dir).is_dir():
+        logger.error(f"No recorded screens in {args.screens_dir}/<label>/*.png")
+        return 2
+
+    # Only visibility is needed, which never touches device scaling
+    index = build_index(VisionManager(None), args.screens_dir)
+    if not len(index):
+        logger.error(f"No usable frames in {args.screens_dir}")
+        return 2
+
+    for label, other, score in _ambiguous_frames(index):
+        logger.warning(f"A '{label}' frame looks like '{other}' ({score:.3f}); consider raising SCREEN_MATCH_SIMILARITY")
+    index.save(args.out)
+    logger.info(f"Wrote {args.out} with {len(index)} screen(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
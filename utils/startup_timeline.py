@@ -0,0 +1,74 @@
+# =============================================================================
+# Startup timeline
+# =============================================================================
+# Records when each Controller startup phase (adb connect, unlock, scrcpy
+# handshake, template loading, game launch, ...) started and ended, including
+# phases running on background threads, and renders them as a text timeline so
+# it is visible which phases overlap and which one startup is waiting on.
+# =============================================================================
+
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Width of the bar column in report()
+_BAR_WIDTH = 40
+
+
+class StartupTimeline:
+    def __init__(self):
+        self._origin = time.perf_counter()
+        # (name, start, end, background), times relative to the origin
+        self._phases: List[Tuple[str, float, float, bool]] = []
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @contextmanager
+    def phase(self, name: str, background: bool = False) -> Iterator[None]:
+        start = self.elapsed()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases.append((name, start, self.elapsed(), background))
+
+    def background(self, name: str, fn: Callable, *args) -> Future:
+        """Run ``fn(*args)`` as a phase on its own thread; the Future holds its result or error."""
+        future = Future()
+
+        def run() -> None:
+            with self.phase(name, background=True):
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    logger.debug(f"Startup phase '{name}' failed: {e}")
+                    future.set_exception(e)
+
+        threading.Thread(target=run, name=f"startup-{name}", daemon=True).start()
+        return future
+
+    def durations(self) -> dict:
+        with self._lock:
+            return {name: end - start for name, start, end, _ in self._phases}
+
+    def report(self) -> str:
+        """One line per phase in start order: offset, duration and a bar; background phases are marked with *."""
+        with self._lock:
+            phases = sorted(self._phases, key=lambda p: p[1])
+        total = max((end for _, _, end, _ in phases), default=0.0) or 1e-9
+        lines = []
+        for name, start, end, background in phases:
+            left = int(start / total * _BAR_WIDTH)
+            width = max(1, round((end - start) / total * _BAR_WIDTH))
+            bar = (" " * left + "#" * width).ljust(_BAR_WIDTH)[:_BAR_WIDTH]
+            lines.append(f"{start:6.2f}s +{end - start:5.2f}s |{bar}| {name}{' *' if background else ''}")
+        lines.append(f"ready after {total:.2f}s (* = background)")
+        return "\n".join(lines)
@@ -0,0 +1,351 @@
+# =============================================================================
+# Precompiled template pack
+# =============================================================================
+# Compiles every template PNG (ASSETS, assets/ads/*.png, rune1-5*.png) into one
+# binary blob of BGR + gray arrays plus a JSON manifest with shapes, offsets,
+# match metadata and source-file hashes. At runtime the blob is memory-mapped
+# read-only, so startup does no PNG decoding and several processes share the
+# same pages. The pack rebuilds itself when a PNG or the metadata changes.
+# TemplateStore maps it once per process and scale, so every VisionManager in
+# the process (one per device) shares the same read-only templates.
+#
+# Build (and crush the PNGs) manually with:
+#   python -m utils.template_pack
+# =============================================================================
+
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.config import (
+    ASSET_THRESHOLDS, ASSET_GRAY_IMG, DEFAULT_TEMPLATE_THRESHOLD, RUNE_THRESHOLD,
+    TEMPLATE_PACK_DIR, TEMPLATE_PACK_WORKERS
+)
+from config.regions import ASSET_REGIONS, AD_REGION, Region
+from utils.assets import ASSETS, ADS_DIR
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+PACK_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+# Arrays start on a 64-byte boundary inside the blob
+_ALIGN = 64
+# Unreferenced blobs younger than this may belong to a build still in progress
+_STALE_BLOB_AGE = 60
+
+RUNE_PREFIXES = ('rune1', 'rune2', 'rune3', 'rune4', 'rune5')
+
+# Template entry as stored in VisionManager.template_dict
+Template = Tuple[np.ndarray, int, int, np.ndarray]
+
+
+def match_params(asset_code: str, threshold: float = DEFAULT_TEMPLATE_THRESHOLD,
+                 gray_img: bool = False) -> Tuple[float, bool]:
+    """Apply the per-asset threshold and gray overrides from config."""
+    # Check for per-asset threshold override (ASSETS enum or string key)
+    for key, value in ASSET_THRESHOLDS.items():
+        key_str = key.value if hasattr(key, 'value') else key
+        if asset_code == key_str:
+            threshold = value
+            break
+    # Dynamic rune variants (rune{level}{type}{s/t}.png) need higher threshold
+    if threshold == DEFAULT_TEMPLATE_THRESHOLD and asset_code.startswith(RUNE_PREFIXES):
+        threshold = RUNE_THRESHOLD
+    # Check for per-asset gray image override
+    for key in ASSET_GRAY_IMG:
+        key_str = key.value if hasattr(key, 'value') else key
+        if asset_code == key_str:
+            gray_img = True
+            break
+    return threshold, gray_img
+
+
+def template_files(assets_dir: str = "assets") -> List[Tuple[str, str, str]]:
+    """Every template source as (key, kind, path); kind is "asset", "ad" or "rune"."""
+    root = pathlib.Path(assets_dir)
+    files = []
+    for asset in dir(ASSETS):
+        if asset.startswith('__'):
+            continue
+        png_file = getattr(ASSETS, asset)
+        if (root / png_file).exists():
+            files.append((png_file, "asset", str(root / png_file)))
+        else:
+            logger.warning(f'Asset {png_file} is missing')
+
+    ads_path = root / ADS_DIR
+    if ads_path.exists():
+        for file in sorted(ads_path.glob('*.png')):
+            files.append((f"{ADS_DIR}/{file.name}", "ad", str(file)))
+
+    # Only dynamic rune variants (rune{level}{type}{s/t}.png)
+    for file in sorted(root.glob('rune*.png')):
+        if file.name.startswith(RUNE_PREFIXES):
+            files.append((file.name, "rune", str(file)))
+    return files
+
+
+def template_meta(key: str, kind: str) -> dict:
+    """Region and match settings recorded in the manifest for one template."""
+    if kind == "ad":
+        region = AD_REGION
+    elif kind == "rune":
+        region = Region.BOTTOM
+    else:
+        region = ASSET_REGIONS.get(key, Region.ALL)
+    threshold, gray = match_params(key)
+    return {"kind": kind, "region": int(region), "threshold": threshold, "gray": gray}
+
+
+def _file_stamp(path: str) -> dict:
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def scale_template(img: np.ndarray, scale: float) -> np.ndarray:
+    """Resize a template for frames at ``scale`` times the 720p game resolution."""
+    if scale == 1.0:
+        return img
+    h, w = img.shape[:2]
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC)
+
+
+def pack_dir_for(scale: float, pack_dir: str = TEMPLATE_PACK_DIR) -> str:
+    """Each template scale (device resolution) gets its own pack next to the 720p one."""
+    return pack_dir if scale == 1.0 else os.path.join(pack_dir, f"scale-{scale:.4f}")
+
+
+def _process_template(path: str, crush: bool, scale: float = 1.0) -> Tuple[Optional[bytes], Tuple[int, ...], str, dict]:
+    """Pool worker: optionally crush the PNG, then decode and scale it. Returns (bgr bytes, shape, sha256, stamp)."""
+    if crush:
+        from PIL import Image
+        with Image.open(path) as image:
+            image.load()
+        # Re-save to strip metadata and reduce file size
+        image.save(path)
+    img = cv2.imread(path)
+    if img is None:
+        return None, (), _sha256(path), _file_stamp(path)
+    img = scale_template(img, scale)
+    return img.tobytes(), img.shape, _sha256(path), _file_stamp(path)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def build_pack(assets_dir: str = "assets", pack_dir: str = TEMPLATE_PACK_DIR, crush: bool = False,
+               workers: int = TEMPLATE_PACK_WORKERS, scale: float = 1.0) -> dict:
+    """Decode (and optionally crush) every template on a process pool and write a fresh pack.
+
+    The blob gets a unique name and the manifest is swapped in atomically, so
+    processes still mapping the previous pack keep working. Returns the manifest.
+    In the frozen exe the pool uses threads instead: a spawned worker would re-run
+    the bundled entry point (the GUI) rather than decode templates.
+    """
+    files = template_files(assets_dir)
+    paths = [path for _, _, path in files]
+    if workers > 1 and len(paths) > 1:
+        executor = ThreadPoolExecutor if getattr(sys, 'frozen', False) else ProcessPoolExecutor
+        with executor(max_workers=workers) as pool:
+            results = list(pool.map(_process_template, paths, [crush] * len(paths), [scale] * len(paths),
+                                    chunksize=8))
+    else:
+        results = [_process_template(path, crush, scale) for path in paths]
+
+    os.makedirs(pack_dir, exist_ok=True)
+    blob_name = f"templates-{uuid.uuid4().hex[:12]}.bin"
+    entries, sources = {}, {}
+    offset = 0
+    with open(os.path.join(pack_dir, blob_name), 'wb') as blob:
+        for (key, kind, path), (data, shape, digest, stamp) in zip(files, results):
+            # Sources are recorded even when decoding fails, so a broken PNG doesn't force a rebuild every start
+            sources[key] = {"path": pathlib.Path(path).as_posix(), "sha256": digest, **stamp}
+            if data is None:
+                logger.warning(f"Failed to load image: {path}")
+                continue
+            gray = cv2.cvtColor(np.frombuffer(data, np.uint8).reshape(shape), cv2.COLOR_BGR2GRAY)
+
+            bgr_offset = _aligned(offset)
+            blob.write(b'\0' * (bgr_offset - offset))
+            blob.write(data)
+            gray_offset = _aligned(bgr_offset + len(data))
+            blob.write(b'\0' * (gray_offset - bgr_offset - len(data)))
+            blob.write(gray.tobytes())
+            offset = gray_offset + gray.nbytes
+
+            entries[key] = {"shape": list(shape), "bgr_offset": bgr_offset, "gray_offset": gray_offset,
+                            **template_meta(key, kind)}
+
+    manifest = {"version": PACK_VERSION, "scale": scale, "blob": blob_name, "size": offset,
+                "templates": entries, "sources": sources}
+    manifest_path = os.path.join(pack_dir, MANIFEST_NAME)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+    _remove_old_blobs(pack_dir, keep=blob_name)
+    logger.debug(f"Built template pack: {len(entries)} templates, {offset / 1e6:.1f} MB")
+    return manifest
+
+
+def _remove_old_blobs(pack_dir: str, keep: str) -> None:
+    now = time.time()
+    for file in pathlib.Path(pack_dir).glob("templates-*.bin"):
+        try:
+            if file.name == keep or now - file.stat().st_mtime < _STALE_BLOB_AGE:
+                continue
+            file.unlink()
+        except OSError:
+            # Still mapped by another process (Windows); cleaned up on a later build
+            pass
+
+
+def read_manifest(pack_dir: str = TEMPLATE_PACK_DIR) -> Optional[dict]:
+    try:
+        with open(os.path.join(pack_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != PACK_VERSION:
+        return None
+    return manifest
+
+
+def is_stale(manifest: Optional[dict], assets_dir: str = "assets", pack_dir: str = TEMPLATE_PACK_DIR,
+             scale: float = 1.0) -> bool:
+    """True if any template PNG was added, removed or changed, or its metadata moved on."""
+    if manifest is None or not os.path.isfile(os.path.join(pack_dir, manifest["blob"])):
+        return True
+    if manifest.get("scale", 1.0) != scale:
+        return True
+    files = template_files(assets_dir)
+    sources = manifest["sources"]
+    if {key for key, _, _ in files} != set(sources):
+        return True
+
+    for key, kind, path in files:
+        source = sources[key]
+        entry = manifest["templates"].get(key)
+        if entry is not None and entry != {**entry, **template_meta(key, kind)}:
+            return True
+        stamp = _file_stamp(path)
+        if stamp["mtime_ns"] == source["mtime_ns"] and stamp["size"] == source["size"]:
+            continue
+        # Touched but maybe not changed (checkout, copy); the content hash decides
+        if _sha256(path) != source["sha256"]:
+            return True
+    return False
+
+
+def load_pack(assets_dir: str = "assets", pack_dir: str = TEMPLATE_PACK_DIR,
+              scale: float = 1.0) -> Tuple[Dict[str, Template], dict]:
+    """Map the pack for this template scale (rebuilding it first if stale) and return (templates, manifest).
+
+    Templates are read-only views into the mapped blob: (bgr, h, w, gray).
+    """
+    pack_dir = pack_dir_for(scale, pack_dir)
+    manifest = read_manifest(pack_dir)
+    if is_stale(manifest, assets_dir, pack_dir, scale):
+        logger.debug(f"Template pack (scale {scale:.4f}) is stale, rebuilding")
+        manifest = build_pack(assets_dir, pack_dir, scale=scale)
+    if not manifest["templates"]:
+        return {}, manifest
+
+    blob = np.memmap(os.path.join(pack_dir, manifest["blob"]), dtype=np.uint8, mode='r')
+    templates = {}
+    for key, entry in manifest["templates"].items():
+        h, w, c = entry["shape"]
+        bgr = blob[entry["bgr_offset"]:entry["bgr_offset"] + h * w * c].reshape(h, w, c)
+        gray = blob[entry["gray_offset"]:entry["gray_offset"] + h * w].reshape(h, w)
+        templates[key] = (bgr, h, w, gray)
+    return templates, manifest
+
+
+def read_templates(assets_dir: str = "assets", scale: float = 1.0) -> Tuple[Dict[str, Template], Dict[str, str]]:
+    """Decode every template PNG without the pack, as ({key: (bgr, h, w, gray)}, {key: kind})."""
+    templates, kinds = {}, {}
+    for key, kind, path in template_files(assets_dir):
+        img = cv2.imread(path)
+        if img is None:
+            logger.warning(f"Failed to load image: {path}")
+            continue
+        img = scale_template(img, scale)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        img.flags.writeable = False
+        gray.flags.writeable = False
+        templates[key] = (img, img.shape[0], img.shape[1], gray)
+        kinds[key] = kind
+    return templates, kinds
+
+
+class TemplateStore:
+    """The templates for one scale, loaded once per process and shared read-only by every VisionManager."""
+
+    _stores: Dict[float, "TemplateStore"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, templates: Dict[str, Template], kinds: Dict[str, str]):
+        self.templates = MappingProxyType(templates)
+        self.kinds = MappingProxyType(kinds)
+        self.ad_keys = tuple(key for key, kind in kinds.items() if kind == "ad")
+        self.rune_keys = tuple(key for key, kind in kinds.items() if kind == "rune")
+
+    @classmethod
+    def for_scale(cls, scale: float = 1.0, reload: bool = False) -> "TemplateStore":
+        """The shared store for ``scale``; ``reload`` re-reads the pack (VisionManagers already
+        holding the old store keep it until they reload too)."""
+        with cls._lock:
+            store = cls._stores.get(scale)
+            if store is None or reload:
+                store = cls._stores[scale] = cls._load(scale)
+            return store
+
+    @staticmethod
+    def _load(scale: float) -> "TemplateStore":
+        try:
+            templates, manifest = load_pack(scale=scale)
+            kinds = {key: entry["kind"] for key, entry in manifest["templates"].items()}
+        except OSError as e:
+            # Read-only install or similar: decode the PNGs in-process instead
+            logger.warning(f"Template pack unavailable ({e}), loading PNGs directly")
+            templates, kinds = read_templates(scale=scale)
+        return TemplateStore(templates, kinds)
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crush template PNGs and compile them into the template pack")
+    parser.add_argument("--assets-dir", default="assets")
+    parser.add_argument("--pack-dir", default=TEMPLATE_PACK_DIR)
+    parser.add_argument("--no-crush", action="store_true", help="Only compile, leave the PNGs untouched")
+    parser.add_argument("--workers", type=int, default=TEMPLATE_PACK_WORKERS)
+    args = parser.parse_args()
+
+    manifest = build_pack(args.assets_dir, args.pack_dir, crush=not args.no_crush, workers=args.workers)
+    logger.info(f"Packed {len(manifest['templates'])} templates ({manifest['size'] / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,194 +1,661 @@
 import cv2
 import numpy as np
-import pathlib
-from typing import List, Optional
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
 
-from utils.assets import ASSETS, ADS_DIR
-from config.regions import ASSET_REGIONS, AD_REGION, Region
-from config.config import DEFAULT_TEMPLATE_THRESHOLD
+from utils.assets import ASSETS
+from config.regions import ASSET_ROIS, ROI_MARGIN, ROI_TABLE_FILE, Region
+from config.config import (
+    DEFAULT_TEMPLATE_THRESHOLD,
+    PYRAMID_ASSETS, PYRAMID_SCALE, PYRAMID_THRESHOLD_MARGIN,
+    PYRAMID_MIN_TEMPLATE_SIZE, PYRAMID_MAX_CANDIDATES, VISION_WORKERS, VISION_FRAME_CACHE_SIZE, SCREEN_INDEX_FILE
+)
 from utils.logger import setup_logger
-from utils.region_utils import recommend_region
+from utils.device_context import DeviceContext
+from utils.region_utils import merge_rects, load_roi_table, save_roi_table
+from utils.screen_index import ScreenIndex
+from utils.template_pack import TemplateStore
 
 logger = setup_logger()
 
+# Matches whose top-left corners are closer than this (in both x and y) are one hit
+MATCH_GROUP_DISTANCE = 5
+
+
+def group_matches(res: np.ndarray, threshold: float, by_score: bool = False) -> List[Tuple[int, int]]:
+    """Collapse a matchTemplate response map into one (x, y) point per hit.
+
+    Same grouping as the original loop: above-threshold pixels are visited in
+    row-major order (best score first with ``by_score``), and each joins the
+    first group whose most recent pixel is closer than MATCH_GROUP_DISTANCE in
+    both axes, or starts a new group. Groups are reported as the integer mean
+    of their pixels, in order of creation.
+
+    In row-major order the pixels are first cut into horizontal runs in NumPy
+    and the loop steps through runs instead of pixels (see _group_runs), so
+    dense hits from flat templates or low thresholds stay cheap.
+    """
+    points = cv2.findNonZero((res >= threshold).astype(np.uint8))
+    if points is None:
+        return []
+    points = points.reshape(-1, 2)
+    xs, ys = points[:, 0], points[:, 1]
+    if len(xs) == 1:
+        return [(int(xs[0]), int(ys[0]))]
+    if by_score:
+        order = np.argsort(-res[ys, xs], kind="stable")
+        groups = _group_greedy(ys[order].tolist(), xs[order].tolist())
+    else:
+        groups = _group_runs(ys, xs)
+    return [(int(x), int(y)) for _, x, y in groups]
+
+
+def _group_runs(ys: np.ndarray, xs: np.ndarray) -> List[Tuple[int, int, int]]:
+    """The original grouping for pixels in row-major order, one horizontal run at a time.
+
+    Along a run of adjacent pixels each pixel joins the same group as the one
+    before it, until an older (lower id) group comes into range; the other
+    groups don't move meanwhile. So each run costs
+    one step per such switch instead of one per pixel. Returns (id, x, y) per group.
+    """
+    d = MATCH_GROUP_DISTANCE
+    n = len(ys)
+    starts = np.flatnonzero(np.r_[True, (ys[1:] != ys[:-1]) | (xs[1:] != xs[:-1] + 1)])
+    ends = np.r_[starts[1:], n] - 1
+
+    # Per group: most recent pixel, pixel sums and count; ids are in creation order
+    last_y, last_x, sum_y, sum_x, count = [], [], [], [], []
+    # Groups whose most recent pixel is less than d rows up
+    active, row = [], None
+    for y, a, b in zip(ys[starts].tolist(), xs[starts].tolist(), xs[ends].tolist()):
+        if y != row:
+            row = y
+            active = [g for g in active if last_y[g] > y - d]
+        near = sorted(g for g in active if a - d < last_x[g] < b + d)
+        cur = next((g for g in near if -d < last_x[g] - a < d), None)
+        if cur is None:
+            cur = len(count)
+            last_y.append(y)
+            last_x.append(a)
+            sum_y.append(0)
+            sum_x.append(0)
+            count.append(0)
+            active.append(cur)
+        # cur owns segment_start..x so far; x + 1..b still to place
+        x, segment_start = a, a
+        while True:
+            entry, switch = b + 1, None
+            for g in near:
+                if g >= cur:
+                    break
+                lx = last_x[g]
+                e = max(x + 1, lx - d + 1)
+                if e <= min(b, lx + d - 1) and e < entry:
+                    entry, switch = e, g
+            # segment_start..entry - 1 joins cur (sum of consecutive ints, always even before halving)
+            k = entry - segment_start
+            sum_y[cur] += y * k
+            sum_x[cur] += (segment_start + entry - 1) * k // 2
+            count[cur] += k
+            last_y[cur], last_x[cur] = y, entry - 1
+            if switch is None:
+                break
+            cur, x, segment_start = switch, entry, entry
+    return [(g, sx // c, sy // c) for g, (sy, sx, c) in enumerate(zip(sum_y, sum_x, count))]
+
+
+def _group_greedy(ys: List[int], xs: List[int]) -> List[Tuple[int, int, int]]:
+    """The original grouping loop for pixels in any order, with the open groups bucketed by grid
+    cell so each pixel only looks at the groups around it. Returns (id, x, y) per group."""
+    d = MATCH_GROUP_DISTANCE
+    # [last y, last x, sum y, sum x, count] per group, and group ids by the cell of their last pixel
+    groups = []
+    cells = defaultdict(set)
+    for y, x in zip(ys, xs):
+        cy, cx = y // d, x // d
+        best = None
+        for ny in (cy - 1, cy, cy + 1):
+            for nx in (cx - 1, cx, cx + 1):
+                for g in cells.get((ny, nx), ()):
+                    if (best is None or g < best) and -d < groups[g][0] - y < d and -d < groups[g][1] - x < d:
+                        best = g
+        if best is None:
+            cells[(cy, cx)].add(len(groups))
+            groups.append([y, x, y, x, 1])
+            continue
+        group = groups[best]
+        old_cell = (group[0] // d, group[1] // d)
+        if old_cell != (cy, cx):
+            cells[old_cell].discard(best)
+            cells[(cy, cx)].add(best)
+        group[0], group[1] = y, x
+        group[2] += y
+        group[3] += x
+        group[4] += 1
+    return [(g, sum_x // count, sum_y // count) for g, (_, _, sum_y, sum_x, count) in enumerate(groups)]
+
+
+class _FrameCache:
+    """Detection results for a single frame.
+
+    The frame array itself is kept as the identity key, so results can never be
+    served for a different screenshot even if its ``id()`` gets reused.
+    """
+
+    def __init__(self, frame: Optional[np.ndarray] = None):
+        self.frame = frame
+        self.results = {}
+        # Frame-level checks (in game, slider present) shared by every query on this frame
+        self.guards = {}
+        self._guard_locks = {}
+        self._gray = None
+        self._small = {}
+        # Pool workers share one cache, so derived frames are built under a lock
+        self._lock = threading.RLock()
+
+    def guard_lock(self, name: str) -> threading.RLock:
+        with self._lock:
+            return self._guard_locks.setdefault(name, threading.RLock())
+
+    def gray(self) -> np.ndarray:
+        """Grayscale version of the frame, converted once and shared by every gray lookup."""
+        if self._gray is None:
+            with self._lock:
+                if self._gray is None:
+                    self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def small(self, gray_img: bool) -> np.ndarray:
+        """Downscaled frame for the pyramid coarse pass."""
+        if gray_img not in self._small:
+            with self._lock:
+                if gray_img not in self._small:
+                    source = self.gray() if gray_img else self.frame
+                    self._small[gray_img] = cv2.resize(source, None, fx=PYRAMID_SCALE, fy=PYRAMID_SCALE,
+                                                       interpolation=cv2.INTER_AREA)
+        return self._small[gray_img]
+
+
+def _scale_rois(rois: dict, scale: float) -> dict:
+    """Scale {asset: [(x, y, w, h), ...]} rectangles by ``scale``."""
+    if scale == 1.0:
+        return dict(rois)
+    return {asset: [tuple(int(round(v * scale)) for v in rect) for rect in rects] for asset, rects in rois.items()}
+
+
+# A detect_many() query: an asset code, or (asset_code, threshold, gray_img)
+Query = Union[str, Tuple[str, float, bool]]
+
+
 class VisionManager:
-    def __init__(self, device_manager):
+    def __init__(self, device_manager, workers: int = VISION_WORKERS, context: Optional[DeviceContext] = None):
         self.device_manager = device_manager
+        # Per-device regions (rune templates are added on load); templates themselves are shared
+        self.context = context or DeviceContext()
+        self.cancel_token = getattr(device_manager, "cancel_token", None)
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="vision") if self.workers > 1 else None
+        self._lock = threading.Lock()
         self.template_dict = {}
         self.asset_reverse_map = {v: k for k, v in ASSETS.__dict__.items() if not k.startswith('__')}
-        self.load_templates()
+        # Recent frames' caches, least recently used first
+        self._frame_caches: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Assets actually matched against a frame (cache misses that reached matchTemplate)
+        self.template_matches = 0
+        self.pyramid_assets = set(PYRAMID_ASSETS)
+        # Templates and ROIs are kept at the scale of the frames being matched
+        self.scale = getattr(device_manager, "template_scale", 1.0)
+        self.asset_rois = _scale_rois(ASSET_ROIS, self.scale)
+        self.learn_rois = False
+        self.roi_history = {}
+        # Hits are recorded from the pool threads while save_roi_table may be reading them
+        self._roi_lock = threading.Lock()
+        self._roi_frame_size = None
+        self.learned_rois, self._learned_frame_size = load_roi_table(ROI_TABLE_FILE, ROI_MARGIN)
+        self._learned_by_size = {}
+        self.screen_index = ScreenIndex.load(SCREEN_INDEX_FILE)
+        if len(self.screen_index):
+            logger.debug(f"Loaded screen index with {len(self.screen_index)} screens")
+        self.load_templates(reload=False)
 
-    def load_templates(self):
-        """Reload all templates from disk and Constants.py"""
-        self.template_dict = {}
-        self.ad_keys = []
+    def load_templates(self, reload: bool = True):
+        """Reload all templates from disk and Constants.py (``reload=False`` reuses the process's shared store)"""
+        self._small_templates = {}
+        self.invalidate_cache()
+        asset_regions = self.context.asset_regions
         for asset in dir(ASSETS):
             if asset.startswith('__'):
                 continue
             png_file = getattr(ASSETS, asset)
 
-            if png_file not in ASSET_REGIONS:
+            if png_file not in asset_regions:
                 logger.debug(f"Asset '{png_file}' (ASSETS.{asset}) has no region defined. Defaulting to Region.ALL")
-            elif ASSET_REGIONS[png_file] == Region.ALL:
+            elif asset_regions[png_file] == Region.ALL:
                 logger.debug(f"Asset '{png_file}' (ASSETS.{asset}) is using Region.ALL. Consider optimizing.")
 
-            if pathlib.Path(f'assets/{png_file}').exists():
-                img = cv2.imread(f'assets/{png_file}')
-                if img is None:
-                    logger.warning(f"Failed to load image: assets/{png_file}")
-                    continue
-                self.template_dict[png_file] = (img, img.shape[0], img.shape[1])
+        # Read-only views into the mapped pack, shared with every VisionManager in the process
+        store = TemplateStore.for_scale(self.scale, reload=reload)
+        self.template_dict = store.templates
+        self.ad_keys = list(store.ad_keys)
+        self.context.set_template_regions(store.rune_keys)
+
+    def set_scale(self, scale: float) -> None:
+        """Rescale templates and ROIs for frames at ``scale`` times 720p (native resolution mode)."""
+        if scale == self.scale:
+            return
+        logger.debug(f"Rescaling templates by {scale:.3f} for native resolution matching")
+        self.scale = scale
+        self.asset_rois = _scale_rois(ASSET_ROIS, scale)
+        self.load_templates(reload=False)
+
+    def _frame_key(self, screenshot: np.ndarray) -> tuple:
+        """Frames from the device's frame store are keyed by seq, anything else (debug tools) by identity."""
+        frame_store = getattr(self.device_manager, "frame_store", None)
+        seq = frame_store.seq_of(screenshot) if frame_store is not None else None
+        return ("seq", seq) if seq is not None else ("id", id(screenshot))
+
+    def _cache_for(self, screenshot: np.ndarray) -> _FrameCache:
+        """Return the cache for this frame; the least recently used frame is dropped once
+        VISION_FRAME_CACHE_SIZE frames are cached."""
+        key = self._frame_key(screenshot)
+        with self._lock:
+            cache = self._frame_caches.get(key)
+            # The cache holds its frame, so an identity key can't be reused while cached;
+            # the check also catches a seq stored again after the frame store was cleared
+            if cache is None or cache.frame is not screenshot:
+                cache = _FrameCache(screenshot)
+                self._frame_caches[key] = cache
+                while len(self._frame_caches) > VISION_FRAME_CACHE_SIZE:
+                    self._frame_caches.popitem(last=False)
+            self._frame_caches.move_to_end(key)
+            return cache
+
+    def frame_guard(self, screenshot: np.ndarray, name: str, compute: Callable[[], Any]) -> Any:
+        """Result of the frame-level check ``name``, computed once per frame.
+
+        Every in_screen/find_visible on a frame runs the same ad and slider
+        checks first; the answer is kept with the frame's cache and dropped with
+        it when the frame leaves the cache. Threads asking for the same guard on
+        the same frame wait for the first one's answer instead of matching again.
+        """
+        cache = self._cache_for(screenshot)
+        if name not in cache.guards:
+            with cache.guard_lock(name):
+                if name not in cache.guards:
+                    cache.guards[name] = compute()
+        return cache.guards[name]
+
+    def invalidate_cache(self) -> None:
+        with self._lock:
+            self._frame_caches.clear()
+
+    def _count_lookup(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
             else:
-                logger.warning(f'Asset {png_file} is missing')
-
-        # Load ads
-        ads_path = pathlib.Path('assets') / ADS_DIR
-        if ads_path.exists():
-            for file in ads_path.glob('*.png'):
-                key = f"{ADS_DIR}/{file.name}"
-                img = cv2.imread(str(file))
-                if img is not None:
-                    self.template_dict[key] = (img, img.shape[0], img.shape[1])
-                    self.ad_keys.append(key)
-        
-        # Load rune variants dynamically
-        assets_path = pathlib.Path('assets')
-        for file in assets_path.glob('rune*.png'):
-            # Only load dynamic rune variants (rune{level}{type}{s/t}.png)
-            if file.name.startswith(('rune1', 'rune2', 'rune3', 'rune4', 'rune5')):
-                img = cv2.imread(str(file))
-                if img is not None:
-                    self.template_dict[file.name] = (img, img.shape[0], img.shape[1])
-                    ASSET_REGIONS[file.name] = Region.BOTTOM
+                self.cache_misses += 1
+
+    def _count_match(self) -> None:
+        with self._lock:
+            self.template_matches += 1
+
+    def cache_stats(self) -> dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "matches": self.template_matches,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+        }
 
     def get_cords(self, asset_code: str, screenshot: np.ndarray, threshold: float = .9, gray_img: bool = False) -> List[List[int]]:
-        if asset_code not in self.template_dict:
-            logger.error(f"Asset {asset_code} not found in templates")
-            return []
+        cache = self._cache_for(screenshot)
+        key = (asset_code, gray_img, threshold)
+        cords = cache.results.get(key)
+        self._count_lookup(cords is not None)
+        if cords is None:
+            cords = self._match_cords(asset_code, screenshot, threshold, gray_img)
+            cache.results[key] = cords
+        # Hand out a copy so callers can't mutate the cached result
+        return [list(c) for c in cords]
+
+    def exists(self, asset_code: str, screenshot: np.ndarray, threshold: float = .9, gray_img: bool = False) -> bool:
+        """Return True if the asset is visible, without building its coordinates.
+
+        Stops at the first search area whose best score reaches the threshold and
+        reuses any get_cords result already cached for this frame.
+        """
+        cache = self._cache_for(screenshot)
+        found = self._cached_exists(cache, asset_code, threshold, gray_img)
+        self._count_lookup(found is not None)
+        if found is None:
+            found = self._match_exists(asset_code, screenshot, threshold, gray_img)
+            cache.results[("exists", asset_code, gray_img, threshold)] = found
+        return found
+
+    @staticmethod
+    def _cached_exists(cache: _FrameCache, asset_code: str, threshold: float, gray_img: bool) -> Optional[bool]:
+        """Visibility already known for this frame (from exists or get_cords), else None."""
+        cords = cache.results.get((asset_code, gray_img, threshold))
+        if cords is not None:
+            return len(cords) > 0
+        return cache.results.get(("exists", asset_code, gray_img, threshold))
+
+    def identify_screen(self, screenshot: np.ndarray) -> Optional[str]:
+        """Label of the recorded screen this frame matches, or None if unknown (or no index)."""
+        if not len(self.screen_index):
+            return None
+        cache = self._cache_for(screenshot)
+        if "screen" not in cache.results:
+            cache.results["screen"] = self.screen_index.identify(cache.gray())[0]
+        return cache.results["screen"]
+
+    def possible_assets(self, assets: Iterable[str], screenshot: np.ndarray) -> List[str]:
+        """Drop the assets that can't appear on the screen this frame is identified as."""
+        label = self.identify_screen(screenshot)
+        if label is None:
+            return list(assets)
+        return [a for a in assets if self.screen_index.can_appear(label, a)]
+
+    def detect_many(self, assets: Iterable[Query], screenshot: np.ndarray, threshold: float = .9,
+                    gray_img: bool = False, any_of: bool = False) -> List[str]:
+        """Check several assets against one frame on the vision pool.
+
+        Each query is an asset code (matched with ``threshold``/``gray_img``) or an
+        ``(asset_code, threshold, gray_img)`` tuple. Returns the visible assets in
+        query order. With ``any_of`` the first hit is returned on its own and the
+        work still queued is cancelled.
+        """
+        queries = [(q, threshold, gray_img) if isinstance(q, str) else tuple(q) for q in assets]
+        cache = self._cache_for(screenshot)
+
+        # Answer what this frame already knows before handing anything to the pool
+        known, pending = {}, []
+        for query in queries:
+            found = self._cached_exists(cache, *query)
+            if found is None:
+                pending.append(query)
+                continue
+            self._count_lookup(True)
+            if found and any_of:
+                return [query[0]]
+            known[query] = found
+
+        if self._pool is None or len(pending) < 2:
+            for query in pending:
+                known[query] = self.exists(query[0], screenshot, query[1], query[2])
+                if known[query] and any_of:
+                    return [query[0]]
+            return [q[0] for q in queries if known[q]]
+
+        stop = threading.Event()
 
-        template, h, w = self.template_dict[asset_code]
+        def task(query):
+            # Tasks that start after an any_of hit (or a stop request) return without matching
+            if stop.is_set():
+                return None
+            return self.exists(query[0], screenshot, query[1], query[2])
 
-        # Determine region and crop
-        region = ASSET_REGIONS.get(asset_code, Region.ALL)
-        if asset_code.startswith(f"{ADS_DIR}/"):
-            region = AD_REGION
+        # A stop request skips the queued work; the caller's next pause or screenshot raises
+        with self.cancel_token.watch(stop.set) if self.cancel_token is not None else nullcontext():
+            futures = {self._pool.submit(task, query): query for query in pending}
+            if any_of:
+                remaining = set(futures)
+                while remaining:
+                    done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+                    hits = [futures[f] for f in done if f.result()]
+                    if hits:
+                        stop.set()
+                        for f in remaining:
+                            f.cancel()
+                        # Keep query order when several finished together
+                        return [min(hits, key=queries.index)[0]]
+                return []
+
+            for future, query in futures.items():
+                known[query] = future.result()
+        return [q[0] for q in queries if known[q]]
+
+    def _region_for(self, asset_code: str) -> int:
+        return self.context.region_for(asset_code)
+
+    def _search_areas(self, asset_code: str, screenshot: np.ndarray) -> List[Tuple[np.ndarray, int, int]]:
+        """Crop the screenshot (BGR or gray) to the asset's region as (crop, crop_x, crop_y) tuples."""
+        region = self._region_for(asset_code)
         sh, sw = screenshot.shape[:2]
-        
-        # Calculate crop boundaries
-        y_start, y_end = 0, sh
-        x_start, x_end = 0, sw
-        
+
         if region == Region.AD_AREA:
             # Special region for ads: Top-Left (1/9) and Top-Right (1/9)
-            # We'll search in two separate crops and combine results
-            
-            # Top 1/3 height
             y_end = sh // 3
-            
-            # Left 1/3 width
             x_end_left = sw // 3
-            
-            # Right 1/3 width
             x_start_right = (sw * 2) // 3
-            
-            crops = [
+            return [
                 (screenshot[0:y_end, 0:x_end_left], 0, 0),  # Top-Left
                 (screenshot[0:y_end, x_start_right:sw], x_start_right, 0)  # Top-Right
             ]
-            
-            final_locations = []
-            
-            for img_crop, crop_x, crop_y in crops:
-                if gray_img:
-                    img_crop = cv2.cvtColor(img_crop, cv2.COLOR_BGR2GRAY)
-                    # Template conversion happens once outside loop if needed, but here we do it per crop if not done
-                    # Actually template is already converted if gray_img is True? No, let's check below.
-                
-                # Prepare template
-                curr_template = template
-                if gray_img and len(curr_template.shape) == 3:
-                    curr_template = cv2.cvtColor(curr_template, cv2.COLOR_BGR2GRAY)
-                
-                res = cv2.matchTemplate(img_crop, curr_template, cv2.TM_CCOEFF_NORMED)
-                locs = np.where(res >= threshold)
-                
-                # Adjust coordinates back to full image
-                for i in range(len(locs[0])):
-                    final_locations.append((locs[0][i] + crop_y, locs[1][i] + crop_x))
-            
-            # Group locations (copied from below)
-            location_groups = []
-            for loc in final_locations:
-                if len(location_groups) == 0:
-                    location_groups.append([loc])
-                else:
-                    for group in location_groups:
-                        if abs(group[-1][0] - loc[0]) < 5 and abs(group[-1][1] - loc[1]) < 5:
-                            group.append(loc)
-                            break
-                    else:
-                        location_groups.append([loc])
-
-            # update location to be the center of the group
-            result_locations = []
-            for group in location_groups:
-                x = sum(loc[1] for loc in group) // len(group)
-                y = sum(loc[0] for loc in group) // len(group)
-                # Add half width/height to get center of match
-                result_locations.append([x + w // 2, y + h // 2])
-                
-            return result_locations
+
+        # Calculate crop boundaries
+        y_start, y_end = 0, sh
+        x_start, x_end = 0, sw
 
         if region & Region.TOP:
             y_end = sh // 2
         elif region & Region.BOTTOM:
             y_start = sh // 2
-            
+
         if region & Region.LEFT:
             x_end = sw // 2
         elif region & Region.RIGHT:
             x_start = sw // 2
-            
-        # Apply crop
-        img_to_match = screenshot[y_start:y_end, x_start:x_end]
-        crop_x, crop_y = x_start, y_start
 
+        return [(screenshot[y_start:y_end, x_start:x_end], x_start, y_start)]
+
+    @staticmethod
+    def _rect_areas(source: np.ndarray, rects, w: int, h: int) -> List[Tuple[np.ndarray, int, int]]:
+        """Crop (x, y, w, h) rectangles out of the source, never smaller than the template."""
+        sh, sw = source.shape[:2]
+        areas = []
+        for x, y, rw, rh in rects:
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + rw, sw), min(y + rh, sh)
+            if x1 - x0 < w:
+                x0 = max(min(x0, x1 - w), 0)
+                x1 = min(x0 + w, sw)
+            if y1 - y0 < h:
+                y0 = max(min(y0, y1 - h), 0)
+                y1 = min(y0 + h, sh)
+            if x1 - x0 < w or y1 - y0 < h:
+                continue
+            areas.append((source[y0:y1, x0:x1], x0, y0))
+        return areas
+
+    def _search_passes(self, asset_code: str, source: np.ndarray) -> List[List[Tuple[np.ndarray, int, int]]]:
+        """Search areas to try in order; later passes only run if the earlier ones found nothing.
+
+        Explicit ASSET_ROIS replace the asset's region. Learned ROIs are tried first,
+        falling back to the asset's region (the full frame for Region.ALL) on a miss.
+        Only visibility checks use the learned pass; get_cords searches the last one.
+        """
+        _, h, w, _ = self.template_dict[asset_code]
+        if asset_code in self.asset_rois:
+            return [self._rect_areas(source, self.asset_rois[asset_code], w, h)]
+
+        region_areas = self._search_areas(asset_code, source)
+        # While learning, search the whole region so the history isn't biased by old ROIs
+        if not self.learn_rois:
+            learned = self._learned_for(source.shape[1], source.shape[0]).get(asset_code)
+            if learned:
+                return [self._rect_areas(source, learned, w, h), region_areas]
+        return [region_areas]
+
+    def _learned_for(self, sw: int, sh: int) -> dict:
+        """Learned ROIs for this frame size, rescaled once from the recorded size if only the scale differs."""
+        if (sw, sh) not in self._learned_by_size:
+            rois = {}
+            if self._learned_frame_size == (sw, sh):
+                rois = self.learned_rois
+            elif self._learned_frame_size:
+                lw, lh = self._learned_frame_size
+                # Same aspect ratio (within a pixel): a different resolution of the same layout
+                if abs(sw * lh / lw - sh) <= 1:
+                    rois = _scale_rois(self.learned_rois, sh / lh)
+            self._learned_by_size[(sw, sh)] = rois
+        return self._learned_by_size[(sw, sh)]
+
+    def _record_roi(self, asset_code: str, source: np.ndarray, x: int, y: int) -> None:
+        if not self.learn_rois:
+            return
+        _, h, w, _ = self.template_dict[asset_code]
+        with self._roi_lock:
+            self.roi_history.setdefault(asset_code, []).append((int(x), int(y), w, h))
+            self._roi_frame_size = (source.shape[1], source.shape[0])
+
+    def clear_roi_history(self) -> None:
+        with self._roi_lock:
+            self.roi_history = {}
+
+    def save_roi_table(self, path: str = ROI_TABLE_FILE) -> None:
+        """Write the tight ROIs learned so far and start using them."""
+        with self._roi_lock:
+            history = {asset: list(boxes) for asset, boxes in self.roi_history.items()}
+            frame_size = self._roi_frame_size
+        if not history:
+            logger.warning("No ROI matches recorded, nothing to save")
+            return
+        rois = {asset: merge_rects(boxes) for asset, boxes in history.items()}
+        save_roi_table(path, frame_size, rois)
+        logger.info(f"Saved learned ROIs for {len(rois)} assets to {path}")
+        self.learned_rois, self._learned_frame_size = load_roi_table(path, ROI_MARGIN)
+        self._learned_by_size = {}
+        self.invalidate_cache()
+
+    def _source(self, screenshot: np.ndarray, gray_img: bool) -> np.ndarray:
+        """The frame to crop from: the screenshot itself or its cached gray version."""
         if gray_img:
-            img_to_match = cv2.cvtColor(img_to_match, cv2.COLOR_BGR2GRAY)
-            template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            return self._cache_for(screenshot).gray()
+        return screenshot
 
-        res = cv2.matchTemplate(img_to_match, template, cv2.TM_CCOEFF_NORMED)
+    def _small_template(self, asset_code: str, gray_img: bool) -> Optional[np.ndarray]:
+        """Downscaled template for the pyramid pass, or None if it is too small to use."""
+        key = (asset_code, gray_img)
+        if key not in self._small_templates:
+            _, h, w, _ = self.template_dict[asset_code]
+            small = None
+            if min(h, w) >= PYRAMID_MIN_TEMPLATE_SIZE:
+                template = self.template_dict[asset_code][3 if gray_img else 0]
+                small = cv2.resize(template, None, fx=PYRAMID_SCALE, fy=PYRAMID_SCALE,
+                                   interpolation=cv2.INTER_AREA)
+            self._small_templates[key] = small
+        return self._small_templates[key]
 
-        location = np.where(res >= threshold)
+    def _pyramid_response(self, crop: np.ndarray, crop_x: int, crop_y: int, template: np.ndarray,
+                          small_frame: np.ndarray, small_template: np.ndarray,
+                          threshold: float) -> Optional[np.ndarray]:
+        """Full-resolution response map computed only around coarse-pass candidates.
 
-        location = [(location[0][i], location[1][i]) for i in range(len(location[0]))]
+        Positions outside the candidate windows are filled with -1, so the map can be
+        fed to the same thresholding/grouping as an exact one. Returns None when the
+        coarse pass can't help and the caller should match exactly.
+        """
+        s = PYRAMID_SCALE
+        ch, cw = crop.shape[:2]
+        th, tw = template.shape[:2]
+        sx0, sy0 = int(crop_x * s), int(crop_y * s)
+        small_crop = small_frame[sy0:int((crop_y + ch) * s), sx0:int((crop_x + cw) * s)]
+        sth, stw = small_template.shape[:2]
+        if small_crop.shape[0] < sth or small_crop.shape[1] < stw:
+            return None
 
-        # group the locations that are close to each other by 5px in each direction
-        location_groups = []
-        for loc in location:
-            if len(location_groups) == 0:
-                location_groups.append([loc])
-            else:
-                for group in location_groups:
-                    if abs(group[-1][0] - loc[0]) < 5 and abs(group[-1][1] - loc[1]) < 5:
-                        group.append(loc)
-                        break
-                else:
-                    location_groups.append([loc])
+        coarse = cv2.matchTemplate(small_crop, small_template, cv2.TM_CCOEFF_NORMED)
+        mask = (coarse >= threshold - PYRAMID_THRESHOLD_MARGIN).astype(np.uint8)
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if num_labels - 1 > PYRAMID_MAX_CANDIDATES:
+            return None
 
-        # update location to be the center of the group
-        final_locations = []
-        for group in location_groups:
-            x = sum(loc[1] for loc in group) // len(group)
-            y = sum(loc[0] for loc in group) // len(group)
-            
-            # Adjust coordinates back to full screen
-            x += crop_x
-            y += crop_y
+        res = np.full((ch - th + 1, cw - tw + 1), -1, np.float32)
+        pad = int(np.ceil(1 / s)) + 2
+        for bx, by, bw, bh, _ in stats[1:]:
+            # Map the candidate box back to full-resolution response coordinates
+            x0 = max(int((bx + sx0) / s) - crop_x - pad, 0)
+            y0 = max(int((by + sy0) / s) - crop_y - pad, 0)
+            x1 = min(int(np.ceil((bx + bw + sx0) / s)) - crop_x + pad, res.shape[1])
+            y1 = min(int(np.ceil((by + bh + sy0) / s)) - crop_y + pad, res.shape[0])
+            if x1 <= x0 or y1 <= y0:
+                continue
+            window = crop[y0:y1 + th - 1, x0:x1 + tw - 1]
+            res[y0:y1, x0:x1] = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        return res
+
+    def _responses(self, asset_code: str, screenshot: np.ndarray, areas, threshold: float, gray_img: bool):
+        """Yield (response map, crop_x, crop_y) for each of the given search areas."""
+        template = self.template_dict[asset_code][3 if gray_img else 0]
+        small_template = None
+        if asset_code in self.pyramid_assets:
+            small_template = self._small_template(asset_code, gray_img)
+
+        for crop, crop_x, crop_y in areas:
+            res = None
+            if small_template is not None:
+                small_frame = self._cache_for(screenshot).small(gray_img)
+                res = self._pyramid_response(crop, crop_x, crop_y, template, small_frame, small_template, threshold)
+            if res is None:
+                res = cv2.matchTemplate(crop, template, cv2.TM_CCOEFF_NORMED)
+            yield res, crop_x, crop_y
 
+    def _match_exists(self, asset_code: str, screenshot: np.ndarray, threshold: float, gray_img: bool) -> bool:
+        if asset_code not in self.template_dict:
+            logger.error(f"Asset {asset_code} not found in templates")
+            return False
+        self._count_match()
+
+        source = self._source(screenshot, gray_img)
+        for areas in self._search_passes(asset_code, source):
+            for res, crop_x, crop_y in self._responses(asset_code, screenshot, areas, threshold, gray_img):
+                _, max_val, _, max_loc = cv2.minMaxLoc(res)
+                if max_val >= threshold:
+                    self._record_roi(asset_code, source, max_loc[0] + crop_x, max_loc[1] + crop_y)
+                    return True
+        return False
+
+    def _match_cords(self, asset_code: str, screenshot: np.ndarray, threshold: float, gray_img: bool) -> List[List[int]]:
+        if asset_code not in self.template_dict:
+            logger.error(f"Asset {asset_code} not found in templates")
+            return []
+        self._count_match()
+
+        _, h, w, _ = self.template_dict[asset_code]
+        source = self._source(screenshot, gray_img)
+
+        # Top-left corners of every hit, adjusted back to full screen. Only the last pass (the
+        # configured region or ASSET_ROIS): learned ROIs are where the asset was seen before, and
+        # stopping at them would miss other instances that count() and click(index=...) need
+        areas = self._search_passes(asset_code, source)[-1]
+        points = []
+        for res, crop_x, crop_y in self._responses(asset_code, screenshot, areas, threshold, gray_img):
+            for x, y in group_matches(res, threshold):
+                point = (x + crop_x, y + crop_y)
+                # Overlapping ROIs can report the same hit twice
+                if point not in points:
+                    points.append(point)
+
+        for x, y in points:
+            self._record_roi(asset_code, source, x, y)
+
+        if self._region_for(asset_code) == Region.AD_AREA:
+            # Add half width/height to get center of match
+            return [[x + w // 2, y + h // 2] for x, y in points]
+
+        final_locations = []
+        for x, y in points:
             # Suggest region optimization only for assets not defined in ASSET_REGIONS
-            if asset_code not in ASSET_REGIONS:
-                suggested_str = recommend_region(x, y, w, h)
+            if asset_code not in self.context.asset_regions:
+                suggested_str = self.context.recommend_region(x, y, w, h)
                 asset_name = self.asset_reverse_map.get(asset_code)
                 if asset_name:
                     logger.debug(f"Optimization Suggestion: ASSETS.{asset_name}: {suggested_str},")
@@ -196,19 +663,28 @@ class VisionManager:
                     logger.debug(f"Optimization Suggestion: Asset '{asset_code}' found in {suggested_str}")
 
             # add half the width and height of the template to the location and cast to int
-            # Use device_manager for scaling
-            final_locations.append([self.device_manager.scale_x(int(x + w / 1.9)), self.device_manager.scale_y(int(y + h / 1.9))])
-        
+            # Use device_manager to map frame coordinates to touch coordinates
+            final_locations.append(list(self.device_manager.frame_to_device(int(x + w / 1.9), int(y + h / 1.9))))
+
         # Sort by x-coordinate (left to right)
         final_locations.sort(key=lambda loc: loc[0])
-        
+
         return final_locations
 
     def count(self, *assets, screenshot: np.ndarray, gray_img=False, threshold=DEFAULT_TEMPLATE_THRESHOLD):
-        total = 0
-        for a in assets:
-            total += len(self.get_cords(a, screenshot, gray_img=gray_img, threshold=threshold))
-        return total
+        # Goes through get_cords, so only assets not yet matched on this frame add to template_matches
+        def count_one(a):
+            return len(self.get_cords(a, screenshot, gray_img=gray_img, threshold=threshold))
+
+        if self._pool is None or len(assets) < 2:
+            return sum(count_one(a) for a in assets)
+        return sum(self._pool.map(count_one, assets))
+
+    def close(self) -> None:
+        """Shut down the matching pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
 
     def get_template_image(self, asset_code: str) -> Optional[np.ndarray]:
         if asset_code in self.template_dict: